@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Frozen copy of `emoji_semantic_clean` from backend/demojify_lib.py as it was before
+the precompiled SemanticCleaner (commit 46bdc48), kept verbatim so the benchmark
+has a fixed "before" to compare against. Do not edit or import outside bench/.
+"""
+
+import re
+
+
+def emoji_semantic_clean(text: str, *, keep_case: bool = False) -> str:
+    import unicodedata
+    import emoji
+    from collections import deque
+
+    EMOJI_MAP = {
+        "❤️": "love","♥️":"love","💙":"love","💜":"love","🖤":"love",
+        "👍":"okay","👎":"no","😂":"laughing","🤣":"laughing hard","😅":"embarrassed",
+        "😊":"smiling","😃":"smiling","😁":"smiling","🙂":"smiling","😢":"crying","😭":"crying",
+        "😡":"angry","😠":"angry","😮":"surprised","😲":"surprised","😎":"cool","😍":"in love",
+        "🤔":"thinking","🙄":"eyeroll","😒":"unamused","🔥":"awesome","✨":"sparkles","🎉":"congrats",
+        "👏":"applause","🙏":"please","🤝":"handshake","👍🏻":"okay","🍕":"pizza","🍺":"beer",
+        "🍿":"popcorn","🏆":"trophy","🚀":"taking off","💀":"dead (figuratively)","😤":"frustrated",
+        "😴":"sleepy","😜":"playful","😉":"wink","🤷":"shrug","🤷‍♂️":"shrug","🤷‍♀️":"shrug",
+        "🇺🇸":"USA","🇯🇵":"Japan","🇬🇧":"UK",
+    }
+    EMOJI_COMBOS = {"🍕🍺":"pizza and beer","😂😂":"hilarious","🔥🔥":"absolutely awesome","💀😂":"dead from laughter","🎉🎉":"congratulations"}
+    ALIAS_FALLBACK = {
+        "thumbs up":"okay","thumbs down":"no","red heart":"love","smiling face with sunglasses":"cool","fire":"awesome",
+        "united states":"USA","united kingdom":"UK","japan":"Japan","woman technologist":"technologist","man technologist":"technologist","technologist":"technologist",
+    }
+
+    _SKIN_TONE_RE = re.compile(r"(?: light| medium| medium-light| medium-dark| dark)? skin tone", re.I)
+    _VS_ZW_RE     = re.compile(r"[\uFE0F\u200D]")
+    MULTISPACE_RE = re.compile(r"\s+")
+    ELONG_RE      = re.compile(r"(.)\1{2,}")
+    ONLY_EMOJI_OR_PUNCT_RE = re.compile(r"^[\W_]+$")
+    WORD_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
+
+    def _wrap(w: str) -> str: return f"({w})"
+    def _strip_parens(t: str) -> str: return t[1:-1] if len(t)>=2 and t[0]=="(" and t[-1]==")" else t
+    def _normalize(s: str) -> str: return _VS_ZW_RE.sub("", unicodedata.normalize("NFKC", s))
+    def _apply_combos(s: str) -> str:
+        for combo, phrase in EMOJI_COMBOS.items():
+            if combo in s: s = s.replace(combo, " "+_wrap(phrase)+" ")
+        return s
+    def _alias_words(alias: str) -> str:
+        name = alias.strip(":").replace("_"," ")
+        name = _SKIN_TONE_RE.sub("", name).strip().lower()
+        return ALIAS_FALLBACK.get(name, name)
+    def _emoji_to_word(e: str) -> str:
+        if e in EMOJI_MAP: return EMOJI_MAP[e]
+        alias = emoji.demojize(e, language="en")
+        words = _alias_words(alias)
+        return ALIAS_FALLBACK.get(words, words)
+    def _merge_punct(t: str) -> str:
+        t = re.sub(r"[!?.]{3,}", "!!", t)
+        t = re.sub(r"\s+([!?,.;:])", r"\1", t)
+        t = re.sub(r"([!?,.;:]){2,}", r"\1\1", t)
+        return t.strip()
+    def _emoji_only_or_lowinfo(raw: str) -> bool:
+        raw = raw.strip()
+        return bool(ONLY_EMOJI_OR_PUNCT_RE.fullmatch(re.sub(r"\s+","",raw)))
+    def _collapse_repeats(s: str):
+        if not hasattr(emoji, "emoji_list"): return s, False
+        items = emoji.emoji_list(s)
+        if not items: return s, False
+        out=[]; pos=0; i=0; n=len(items); had=False
+        while i<n:
+            st=items[i]["match_start"]; e=items[i]["emoji"]
+            if pos<st: out.append(s[pos:st])
+            j=i+1
+            while j<n and items[j]["match_start"]==items[j-1]["match_end"] and items[j]["emoji"]==e: j+=1
+            if j-i>=2: had=True
+            out.append(e); pos=items[j-1]["match_end"]; i=j
+        if pos<len(s): out.append(s[pos:])
+        return "".join(out), had
+
+    # pipeline
+    s = _normalize(text)
+    s, had_repeat = _collapse_repeats(s)
+
+    import emoji as _emoji_lib
+    def _replace(s: str) -> str:
+        def cb(e, data=None): return " "+f"({_emoji_to_word(e)})"+" "
+        s = _apply_combos(s)
+        s = _emoji_lib.replace_emoji(s, replace=cb)
+        return MULTISPACE_RE.sub(" ", s).strip()
+
+    s = _replace(s)
+    s = ELONG_RE.sub(r"\1\1", s)
+    s = MULTISPACE_RE.sub(" ", s).strip()
+    if not keep_case: s = s.lower()
+
+    if _emoji_only_or_lowinfo(text):
+        words = s.split()
+        core = [_strip_parens(w) for w in words]
+        if len(core)==1 and core[0] in {"awesome","sparkles","applause","congrats","hilarious","love","laughing","laughing hard"}:
+            return f"({core[0]})"
+        return ""
+
+    # drop emoji tokens if neighbors already express the meaning
+    _SYN = {
+        "awesome":{"awesome","amazing","great","fantastic","lit","fire"},
+        "love":{"love","loved","loving","adore","heart"},
+        "laughing":{"lol","lmao","rofl","haha","hahaha","funny"},
+        "laughing hard":{"lmao","rofl","hysterical"},
+        "hilarious":{"hilarious","hysterical"},
+        "crying":{"crying","tears","sad","sobbing"},
+        "angry":{"angry","mad","furious"},
+        "surprised":{"surprised","shocked","wow"},
+        "cool":{"cool","chill"},
+        "please":{"please","pls","plz"},
+        "okay":{"ok","okay","k","kk","ack"},
+        "congrats":{"congrats","congratulations","gg"},
+        "applause":{"applause","clap","clapping"},
+        "wink":{"wink","winking"},
+        "thinking":{"thinking","think"},
+        "in love":{"in","love"},
+    }
+    WORD_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
+    def _norm(w: str) -> str: return WORD_STRIP_RE.sub("", w or "").lower()
+    def _similar(a: str, meaning: str) -> bool:
+        a=_norm(a); b=_norm(meaning)
+        if not a or not b: return False
+        if a==b or a in b or b in a: return True
+        return a in _SYN.get(b, set())
+
+    toks = s.split()
+    def _drop(idx) -> bool:
+        tok = toks[idx]
+        if not (tok.startswith("(") and tok.endswith(")")): return False
+        meaning = tok[1:-1]
+        prev = toks[idx-1][1:-1] if idx-1>=0 and toks[idx-1].startswith("(") and toks[idx-1].endswith(")") else toks[idx-1] if idx-1>=0 else ""
+        next_ = toks[idx+1][1:-1] if idx+1<len(toks) and toks[idx+1].startswith("(") and toks[idx+1].endswith(")") else toks[idx+1] if idx+1<len(toks) else ""
+        if (prev and prev.isalpha() and _similar(prev, meaning)) or (next_ and next_.isalpha() and _similar(next_, meaning)):
+            return True
+        return False
+    toks = [t for i,t in enumerate(toks) if not _drop(i)]
+
+    # collapse duplicates
+    out=[]
+    def _base(x): return x[1:-1] if x.startswith("(") and x.endswith(")") else x
+    for i,t in enumerate(toks):
+        prev_same = (i>0 and _base(toks[i-1])==_base(t))
+        next_same = (i<len(toks)-1 and _base(toks[i+1])==_base(t))
+        if prev_same or next_same:
+            if not prev_same: out.append(t)
+        else:
+            out.append(t)
+    toks = out
+
+    # mild intensifier handling
+    from collections import deque
+    buf, out = deque(), []
+    def flush():
+        if not buf: return
+        last = buf[-1]; b=_base(last)
+        if len(buf)>1 and b in {"laughing","laughing hard","hilarious","awesome","sparkles","applause","congrats","love"}:
+            out.append(last); out.append("!!")
+        else:
+            out.append(last)
+        buf.clear()
+    for t in toks:
+        if not buf or _base(buf[-1])==_base(t): buf.append(t)
+        else: flush(); buf.append(t)
+    flush(); toks=out
+
+    # remove decorative sparkles if we already have words
+    if any(_base(t).isalpha() and _base(t)!="sparkles" for t in toks):
+        toks = [t for t in toks if _base(t)!="sparkles"]
+
+    s = " ".join(toks)
+    s = _merge_punct(s)
+    if any(_base(t) in {"laughing","laughing hard","hilarious"} for t in toks) and "!" not in s:
+        s += "!"
+    if had_repeat and "!" not in s:
+        s += "!"
+    return s
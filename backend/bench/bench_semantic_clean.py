@@ -0,0 +1,55 @@
+"""
+Microbenchmark for the STANDARD path.
+
+Compares the per-call cost of `emoji_semantic_clean` (shared, precompiled
+SemanticCleaner) against:
+- the function as it was before the precompiled cleaner, frozen in
+  baseline_semantic_clean.py;
+- building a fresh SemanticCleaner on every call with today's code.
+
+    python backend/bench/bench_semantic_clean.py [--number N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, BACKEND)
+
+from baseline_semantic_clean import emoji_semantic_clean as baseline  # noqa: E402
+from demojify_lib import SemanticCleaner, emoji_semantic_clean  # noqa: E402
+
+SAMPLES = [
+    "LOL soooo funny 😂😂🔥🔥",
+    "That exam was 😭 but I finally passed 🎉",
+    "pizza night 🍕🍺 with the team 👍🏽 🇺🇸",
+    "so what's up man 😚",
+    "no emoji here, just a plain sentence.",
+]
+
+
+def _per_call_us(fn, number: int) -> float:
+    total = timeit.timeit(lambda: [fn(t) for t in SAMPLES], number=number)
+    return total / (number * len(SAMPLES)) * 1e6
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--number", type=int, default=2000)
+    args = ap.parse_args(argv)
+
+    baseline(SAMPLES[0])  # first-call imports are not part of the steady state
+    emoji_semantic_clean(SAMPLES[0])  # warm the shared instance
+    before = _per_call_us(baseline, args.number)
+    rebuild = _per_call_us(lambda t: SemanticCleaner().clean(t), args.number)
+    after = _per_call_us(emoji_semantic_clean, args.number)
+    print(f"baseline           : {before:8.1f} us/call")
+    print(f"rebuild per call   : {rebuild:8.1f} us/call")
+    print(f"precompiled        : {after:8.1f} us/call")
+    print(f"speedup vs baseline: {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
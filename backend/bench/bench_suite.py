@@ -0,0 +1,199 @@
+"""
+Benchmark suite for the rules engine and the full pipeline.
+
+Measures, over the fixed corpus in corpus.py:
+- emoji_semantic_clean and _to_words_no_parens, per corpus category
+- parse_llm_demojify_output on typical LLM replies
+- end-to-end demojify (sync) and ademojify (concurrent) against an in-process
+  fake client with configurable latency
+
+Results are written as JSON. Pass `--baseline` to compare with an earlier run
+and exit with status 1 if any benchmark's throughput regressed by more than
+`--max-regression` (CI gate).
+
+    python backend/bench/bench_suite.py --out bench.json
+    python backend/bench/bench_suite.py --baseline bench.json --max-regression 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import demojify_lib as lib  # noqa: E402
+from corpus import CATEGORIES, LLM_REPLIES, SEED, build_corpus  # noqa: E402
+
+SCHEMA_VERSION = 1
+
+
+# ---- fake LLM client ----
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                           usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0))
+
+
+class FakeClient:
+    """Answers rewrite and validator prompts after `latency_s` (sleep, so it costs no CPU)."""
+
+    def __init__(self, latency_s: float = 0.0):
+        self.latency_s = latency_s
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def _answer(messages):
+        if messages[0]["content"] == lib.VALIDATOR_SYSTEM:
+            return _completion("1")
+        return _completion('{"response": "That is a plain-language rewrite."}')
+
+    def create(self, *, messages, **kwargs):
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        return self._answer(messages)
+
+
+class FakeAsyncClient(FakeClient):
+    async def create(self, *, messages, **kwargs):
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        return self._answer(messages)
+
+
+# ---- timing ----
+def _measure(fn, items, min_time: float, repeat: int) -> dict:
+    """Runs `fn` over `items` until `min_time` elapses, `repeat` times; reports the median round."""
+    fn(items[0])  # warm caches / lazy tables
+    rounds = []
+    for _ in range(repeat):
+        ops, start = 0, time.perf_counter()
+        while True:
+            for it in items:
+                fn(it)
+            ops += len(items)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        rounds.append(ops / elapsed)
+    ops_per_s = statistics.median(rounds)
+    return {"ops_per_s": round(ops_per_s, 2), "us_per_op": round(1e6 / ops_per_s, 3),
+            "items": len(items), "rounds": [round(r, 2) for r in rounds]}
+
+
+def _measure_async(texts, latency_s: float, concurrency: int, repeat: int) -> dict:
+    client = FakeAsyncClient(latency_s)
+
+    async def run():
+        limit = asyncio.Semaphore(concurrency)
+
+        async def one(t):
+            async with limit:
+                await lib.ademojify(t, client)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(t) for t in texts))
+        return len(texts) / (time.perf_counter() - start)
+
+    rounds = [asyncio.run(run()) for _ in range(repeat)]
+    ops_per_s = statistics.median(rounds)
+    return {"ops_per_s": round(ops_per_s, 2), "us_per_op": round(1e6 / ops_per_s, 3),
+            "items": len(texts), "concurrency": concurrency, "rounds": [round(r, 2) for r in rounds]}
+
+
+def run_suite(min_time: float = 0.2, repeat: int = 3, llm_latency_ms: float = 0.0,
+              concurrency: int = 32, only=None) -> dict:
+    corpus = build_corpus()
+    latency_s = llm_latency_ms / 1000.0
+    benches = {}
+    for cat in CATEGORIES:
+        benches[f"emoji_semantic_clean/{cat}"] = lambda c=cat: _measure(
+            lib.emoji_semantic_clean, corpus[c], min_time, repeat)
+        benches[f"to_words_no_parens/{cat}"] = lambda c=cat: _measure(
+            lib._to_words_no_parens, corpus[c], min_time, repeat)
+    benches["parse_llm_demojify_output/replies"] = lambda: _measure(
+        lib.parse_llm_demojify_output, LLM_REPLIES, min_time, repeat)
+
+    mixed = [t for cat in CATEGORIES for t in corpus[cat][:25]]
+    client = FakeClient(latency_s)
+    # with real latency, a sync run is latency-bound, so a handful of items is enough
+    sync_items = mixed if latency_s == 0 else mixed[:max(1, int(min_time / max(latency_s, 1e-9)) // 2)]
+    benches["demojify/mixed"] = lambda: _measure(
+        lambda t: lib.demojify(t, client), sync_items, min_time, repeat)
+    benches["ademojify/mixed"] = lambda: _measure_async(mixed, latency_s, concurrency, repeat)
+
+    results = {}
+    for name, bench in benches.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        results[name] = bench()
+        print(f"{name:45s} {results[name]['ops_per_s']:12.1f} ops/s {results[name]['us_per_op']:12.1f} us/op",
+              file=sys.stderr)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "emoji": lib._EMOJI_VERSION,
+            "corpus_seed": SEED, "min_time_s": min_time, "repeat": repeat,
+            "llm_latency_ms": llm_latency_ms, "concurrency": concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float) -> list:
+    """Benchmarks whose throughput dropped by more than `max_regression` (fraction) vs the baseline."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        cur = current["results"].get(name)
+        if cur is None or not base.get("ops_per_s"):
+            continue
+        change = cur["ops_per_s"] / base["ops_per_s"] - 1.0
+        if change < -max_regression:
+            regressions.append({"benchmark": name, "baseline_ops_per_s": base["ops_per_s"],
+                                "ops_per_s": cur["ops_per_s"], "change": round(change, 4)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--out", help="write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    ap.add_argument("--max-regression", type=float, default=0.2,
+                    help="allowed throughput drop vs the baseline, as a fraction (default 0.2)")
+    ap.add_argument("--min-time", type=float, default=0.2, help="seconds per measurement round")
+    ap.add_argument("--repeat", type=int, default=3, help="rounds per benchmark (median is reported)")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0, help="fake client latency per LLM call")
+    ap.add_argument("--concurrency", type=int, default=32, help="in-flight requests for ademojify")
+    ap.add_argument("--only", nargs="*", help="benchmark name prefixes to run")
+    args = ap.parse_args(argv)
+
+    report = run_suite(args.min_time, args.repeat, args.llm_latency_ms, args.concurrency, args.only)
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['benchmark']}: {r['baseline_ops_per_s']} -> {r['ops_per_s']} ops/s "
+                  f"({r['change']:+.1%})", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    payload = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
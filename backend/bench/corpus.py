@@ -0,0 +1,93 @@
+"""
+Representative, reproducible benchmark corpus.
+
+Every category is generated from a fixed seed, so two runs (or two machines)
+benchmark exactly the same texts:
+
+- short_chat:  one-line chat messages with a few emojis, combos and repeats
+- long_paragraphs: multi-sentence paragraphs with sparse emojis
+- flags_zwj_skin: flags, ZWJ sequences, skin tones and keycaps
+- emoji_free: plain text (the rules engine should skip almost everything)
+"""
+
+import random
+
+SEED = 210
+
+_WORDS = ("the team shipped release notes tonight after a long week of reviews and everyone "
+          "agreed the demo went well so we are getting pizza and celebrating with friends "
+          "tomorrow morning before standup because honestly it was a lot of work").split()
+
+_CHAT_EMOJIS = ["😂", "🔥", "🎉", "👍", "❤️", "😭", "🙏", "😚", "🍕", "🍺", "💀", "✨", "👏", "🤔", "😅"]
+_CHAT_OPENERS = ["lol", "LOL", "omg", "ok", "sooo", "nice", "haha", "wait", "yes", "ugh"]
+
+_HEAVY_EMOJIS = [
+    "🇺🇸", "🇬🇧", "🇯🇵", "🇧🇷", "🇩🇪",                              # flags
+    "👨‍👩‍👧‍👦", "👩‍💻", "🧑‍🚀", "🏳️‍🌈", "❤️‍🔥", "👨🏽‍🍳",          # ZWJ sequences
+    "👍🏻", "👍🏽", "👋🏿", "🙌🏼", "💪🏾",                              # skin tones
+    "1️⃣", "#️⃣",                                                    # keycaps
+]
+
+
+def _short_chat(rng: random.Random) -> str:
+    words = [rng.choice(_CHAT_OPENERS)] + rng.sample(_WORDS, rng.randint(2, 7))
+    for _ in range(rng.randint(1, 4)):
+        e = rng.choice(_CHAT_EMOJIS)
+        words.insert(rng.randint(1, len(words)), e * rng.choice((1, 1, 2, 3)))
+    return " ".join(words)
+
+
+def _long_paragraph(rng: random.Random) -> str:
+    sentences = []
+    for _ in range(rng.randint(6, 12)):
+        s = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 20))).capitalize()
+        if rng.random() < 0.35:
+            s += " " + rng.choice(_CHAT_EMOJIS)
+        sentences.append(s + rng.choice((".", "!", "?")))
+    return " ".join(sentences)
+
+
+def _flags_zwj_skin(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(4, 10)):
+        parts.append(rng.choice(_HEAVY_EMOJIS) * rng.choice((1, 1, 2)))
+        if rng.random() < 0.5:
+            parts.append(rng.choice(_WORDS))
+    return " ".join(parts)
+
+
+def _emoji_free(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 40))).capitalize() + "."
+
+
+_GENERATORS = {
+    "short_chat": (_short_chat, 200),
+    "long_paragraphs": (_long_paragraph, 40),
+    "flags_zwj_skin": (_flags_zwj_skin, 200),
+    "emoji_free": (_emoji_free, 200),
+}
+
+CATEGORIES = tuple(_GENERATORS)
+
+
+def build_corpus(seed: int = SEED) -> dict:
+    """{category: [texts]} — identical for a given seed."""
+    corpus = {}
+    for i, (name, (gen, count)) in enumerate(_GENERATORS.items()):
+        rng = random.Random(seed * 1000 + i)
+        corpus[name] = [gen(rng) for _ in range(count)]
+    return corpus
+
+
+# Typical LLM replies for the parser: strict JSON, fenced, chatter around JSON,
+# a "response:" line, plain text, and replies that still contain emojis.
+LLM_REPLIES = [
+    '{"response": "That is hilarious!"}',
+    '```json\n{"response": "Congratulations on the new job!"}\n```',
+    'Sure! Here is the rewrite: {"response": "We are getting pizza and beer tonight."} Hope that helps.',
+    "response: Thanks so much, I really appreciate it",
+    "I love this so much",
+    '{"response": "Great work 👍 team 🎉"}',
+    '{"response": "Happy Pride 🏳️‍🌈 from the USA 🇺🇸"}',
+    '{"answer": "wrong key"}',
+]
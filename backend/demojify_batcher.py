@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-batching of LLM calls.
+
+Requests arriving within a short window (or until `max_items` are pending) share
+one prompt: the rewrite prompt asks for a JSON array of responses and the validator
+prompt for an array of verdicts, so the long system prompt and the round trip are
+paid once per batch instead of once per text.
+
+- MicroBatcher: generic asyncio collector. If a batched reply is malformed or has
+  the wrong length (ValueError), every item is retried on its own; a provider error
+  is passed to every caller in the batch.
+- LLMBatcher: the rewrite + validator batchers for one client/model, used through
+  `ademojify(..., batcher=...)`.
+
+Usage example:
+    batcher = LLMBatcher(client, model=model, window_s=0.015, max_items=16)
+    res = await ademojify(text, client, model=model, batcher=batcher)
+"""
+
+import asyncio
+import json
+from typing import Optional
+
+import demojify_lib as lib
+
+
+class MicroBatcher:
+    """
+    `batch_fn(items)` must return one result per item (or raise ValueError on a bad
+    reply); `single_fn(item)` is the one-item call used for retries and lone items.
+    """
+
+    def __init__(self, batch_fn, single_fn, *, window_s: float = 0.015, max_items: int = 16):
+        self.batch_fn = batch_fn
+        self.single_fn = single_fn
+        self.window_s = window_s
+        self.max_items = max(1, max_items)
+        self._pending = []  # (item, future)
+        self._timer = None
+        self._running = set()
+        self.submitted = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.retried_items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((item, fut))
+        self.submitted += 1
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_s, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run(self, batch) -> None:
+        batch = [(item, fut) for item, fut in batch if not fut.done()]  # callers that gave up
+        if not batch:
+            return
+        items = [item for item, _ in batch]
+        if len(items) == 1:
+            results = await self._one_by_one(items)
+        else:
+            self.batches += 1
+            self.batched_items += len(items)
+            try:
+                results = await self.batch_fn(items)
+                if len(results) != len(items):
+                    raise ValueError("batch result has the wrong length")
+            except ValueError:
+                self.retried_items += len(items)
+                results = await self._one_by_one(items)
+            except Exception as e:
+                results = [e] * len(items)
+        for (_, fut), res in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(res, BaseException):
+                fut.set_exception(res)
+            else:
+                fut.set_result(res)
+
+    async def _one_by_one(self, items) -> list:
+        return await asyncio.gather(*(self.single_fn(item) for item in items), return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {"submitted": self.submitted, "batches": self.batches, "batched_items": self.batched_items,
+                "retried_items": self.retried_items, "pending": len(self._pending),
+                "avg_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0}
+
+
+class LLMBatcher:
+    """Rewrite and validator micro-batchers sharing one client and model."""
+
+    def __init__(self, client, model: str = lib.MODEL, *, window_s: float = 0.015, max_items: int = 16):
+        self.client = client
+        self.model = model
+        self.rewrites = MicroBatcher(self._rewrite_many, self._rewrite_one, window_s=window_s, max_items=max_items)
+        self.validations = MicroBatcher(self._validate_many, self._validate_one, window_s=window_s, max_items=max_items)
+
+    async def meaning(self, text: str, analysis: Optional[lib.EmojiAnalysis] = None) -> str:
+        """Batched `aemoji_to_meaning`; texts without emojis never reach the model."""
+        if not lib._input_has_emoji(text, analysis):
+            return json.dumps({"response": text})
+        return await self.rewrites.submit(text)
+
+    async def validate(self, standard_text: str, llm_text: str):
+        """Batched `aevaluate_consistency_zero_one`."""
+        return await self.validations.submit((standard_text, llm_text))
+
+    # module lookups (not bound at import) so tests can monkeypatch demojify_lib
+    def _rewrite_many(self, texts):
+        return lib.aemoji_to_meaning_many(self.client, texts, model=self.model)
+
+    def _rewrite_one(self, text):
+        return lib.aemoji_to_meaning(self.client, text, model=self.model)
+
+    def _validate_many(self, pairs):
+        return lib.aevaluate_consistency_many(self.client, pairs, model=self.model)
+
+    def _validate_one(self, pair):
+        return lib.aevaluate_consistency_zero_one(self.client, *pair, model=self.model)
+
+    def stats(self) -> dict:
+        return {"rewrite": self.rewrites.stats(), "validator": self.validations.stats()}
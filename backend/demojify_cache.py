@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Result cache for demojify.
+
+- Keyed on (normalized text, model, mode); stores the full DemojifyResult. Inputs
+  that may be chunked are keyed with their layout (`keep_layout`), since a "chunked"
+  result puts its output back in the input's exact whitespace.
+- LRUCache: in-memory, bounded by entry count and TTL.
+- SQLiteCache: optional persistent tier that survives restarts.
+- TieredCache: memory in front of SQLite (hits on the slow tier are promoted).
+Only results in CACHEABLE_REASONS are stored, so a transient LLM/validator
+error never gets pinned.
+
+Usage example:
+    cache = build_cache(max_entries=10_000, ttl=3600, sqlite_path="demojify.db")
+    key = cache_key(text, model, "auto")
+    res = cache.get(key)
+    if res is None:
+        res = demojify(text, client, model=model)
+        cache.put(key, res)
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from typing import Optional
+
+from demojify_lib import DemojifyResult
+
+# Outcomes that are a property of the text, not of a transient failure.
+# "chunked" is only given when every chunk of the document had one of these outcomes.
+CACHEABLE_REASONS = frozenset({"llm_valid", "validator_rejected", "local_accept", "local_reject", "rules_only",
+                               "chunked"})
+
+
+def cache_key(text: str, model: str, mode: str, keep_layout: bool = False) -> str:
+    norm = text.strip() if keep_layout else " ".join(unicodedata.normalize("NFKC", text).split())
+    return json.dumps([norm, model, mode], ensure_ascii=False)
+
+
+def is_cacheable(result: DemojifyResult) -> bool:
+    return result.reason in CACHEABLE_REASONS
+
+
+def _without_timings(result: DemojifyResult) -> DemojifyResult:
+    # timings describe the run that produced the result, not a later cache hit
+    return replace(result, timings=None) if result.timings is not None else result
+
+
+class _Stats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def as_dict(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "expired": self.expired, "hit_rate": round(self.hits / total, 4) if total else 0.0}
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with a per-entry TTL (ttl=None: never expires)."""
+
+    def __init__(self, max_entries: int = 10_000, ttl: Optional[float] = 3600.0, *, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # key -> (stored_at, result)
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+
+    def get(self, key: str) -> Optional[DemojifyResult]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._stats.misses += 1
+                return None
+            stored_at, result = item
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                del self._data[key]
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats.hits += 1
+            return result
+
+    def put(self, key: str, result: DemojifyResult) -> None:
+        if self.max_entries <= 0 or not is_cacheable(result):
+            return
+        result = _without_timings(result)
+        with self._lock:
+            self._data[key] = (self._clock(), result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self._stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"type": "memory", "size": len(self._data), "max_entries": self.max_entries,
+                    **self._stats.as_dict()}
+
+
+class SQLiteCache:
+    """Persistent tier; rows older than `ttl` are ignored and trimmed to `max_entries`."""
+
+    _PRUNE_EVERY = 256
+
+    def __init__(self, path: str, max_entries: int = 100_000, ttl: Optional[float] = 7 * 24 * 3600.0,
+                 *, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._stats = _Stats()
+        self._puts = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, stored_at REAL NOT NULL, result TEXT NOT NULL)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[DemojifyResult]:
+        with self._lock:
+            row = self._db.execute("SELECT stored_at, result FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats.misses += 1
+                return None
+            stored_at, payload = row
+            if self.ttl is not None and self._clock() - stored_at > self.ttl:
+                self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                self._db.commit()
+                self._stats.expired += 1
+                self._stats.misses += 1
+                return None
+            self._stats.hits += 1
+        return DemojifyResult(**json.loads(payload))
+
+    def put(self, key: str, result: DemojifyResult) -> None:
+        if self.max_entries <= 0 or not is_cacheable(result):
+            return
+        payload = json.dumps(asdict(_without_timings(result)), ensure_ascii=False)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results (key, stored_at, result) VALUES (?, ?, ?)",
+                             (key, self._clock(), payload))
+            self._puts += 1
+            if self._puts % self._PRUNE_EVERY == 0:
+                self._prune()
+            self._db.commit()
+
+    def _prune(self) -> None:
+        cur = self._db.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._stats.evictions += max(cur.rowcount, 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM results")
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> dict:
+        size = len(self)
+        with self._lock:
+            return {"type": "sqlite", "path": self.path, "size": size, "max_entries": self.max_entries,
+                    **self._stats.as_dict()}
+
+
+class TieredCache:
+    """Memory LRU in front of a persistent tier; persistent hits are promoted to memory."""
+
+    def __init__(self, memory: LRUCache, persistent: SQLiteCache):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, key: str) -> Optional[DemojifyResult]:
+        result = self.memory.get(key)
+        if result is None:
+            result = self.persistent.get(key)
+            if result is not None:
+                self.memory.put(key, result)
+        return result
+
+    def put(self, key: str, result: DemojifyResult) -> None:
+        self.memory.put(key, result)
+        self.persistent.put(key, result)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.persistent.clear()
+
+    def stats(self) -> dict:
+        return {"type": "tiered", "memory": self.memory.stats(), "persistent": self.persistent.stats()}
+
+
+def build_cache(max_entries: int = 10_000, ttl: Optional[float] = 3600.0,
+                sqlite_path: Optional[str] = None, sqlite_ttl: Optional[float] = 7 * 24 * 3600.0):
+    memory = LRUCache(max_entries=max_entries, ttl=ttl)
+    if not sqlite_path:
+        return memory
+    return TieredCache(memory, SQLiteCache(sqlite_path, ttl=sqlite_ttl))
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk demojify for message archives (JSONL or plain text), streamed line by line.
+
+- STANDARD path: lines are read lazily, cut into chunks and cleaned on a process
+  pool (JSON parsing/serialisation included). At most 2 x workers chunks are in
+  flight, and results are written in input order as they arrive, so memory stays
+  flat however large the file is.
+- --llm: the full pipeline (ademojify) with bounded concurrency over a sliding
+  window of lines, behind a circuit breaker so a dead provider degrades to the
+  STANDARD output quickly. In plain-text output, line breaks in an LLM answer are
+  collapsed to spaces so output lines stay aligned with input lines.
+- Progress (lines, lines/s) goes to stderr while running.
+
+JSONL lines are objects; the text is read from --field and the result is added as
+--output-field (plus "source" and "reason"). Plain-text input gives one output line
+per input line.
+
+Usage example:
+    python -m demojify_lib messages.jsonl -o clean.jsonl --workers 8
+    cat chat.txt | python backend/demojify_cli.py - --format text > clean.txt
+    DEMOJIFY_LLM_API_KEY=... python -m demojify_lib msgs.jsonl -o out.jsonl --llm --llm-concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import demojify_lib as lib
+
+DEFAULT_BASE_URL = "https://fast-api.snova.ai/v1"
+
+
+def _chunks(lines, size: int):
+    it = iter(lines)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ---- per-line conversion ----
+def _jsonl_record(line: str, field: str):
+    """(object, text) for one JSONL line; text is None (and object carries "error") when unusable."""
+    try:
+        obj = json.loads(line)
+    except ValueError as e:
+        return {"error": f"invalid JSON: {e}", "line": line}, None
+    if not isinstance(obj, dict):
+        return {"error": "line is not a JSON object", "line": line}, None
+    text = obj.get(field)
+    if not isinstance(text, str):
+        obj["error"] = f"missing text field {field!r}"
+        return obj, None
+    return obj, text
+
+
+def _dump(obj: dict) -> str:
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def process_chunk(lines, fmt: str = "jsonl", field: str = "text", output_field: str = "output",
+                  keep_case: bool = False) -> list:
+    """STANDARD path for one chunk of raw lines -> output lines (runs in pool workers)."""
+    clean = lib._default_cleaner().clean
+    if fmt == "text":
+        return [clean(line, keep_case=keep_case) if line else "" for line in lines]
+    out = []
+    for line in lines:
+        if not line.strip():
+            out.append("")
+            continue
+        obj, text = _jsonl_record(line, field)
+        if text is not None:
+            obj[output_field] = clean(text, keep_case=keep_case)
+            obj["source"], obj["reason"] = "standard", "rules_only"
+        out.append(_dump(obj))
+    return out
+
+
+def _init_worker() -> None:
+    lib.warm_up()
+
+
+def iter_standard(lines, *, fmt: str = "jsonl", field: str = "text", output_field: str = "output",
+                  keep_case: bool = False, workers: int = 0, chunk_size: int = 1000):
+    """Output lines in input order; `workers=0` cleans in this process."""
+    args = (fmt, field, output_field, keep_case)
+    if workers <= 0:
+        for chunk in _chunks(lines, chunk_size):
+            yield from process_chunk(chunk, *args)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in _chunks(lines, chunk_size):
+            pending.append(pool.submit(process_chunk, chunk, *args))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _one_line(text: str) -> str:
+    # a plain-text output line must stay one line, whatever the LLM answered
+    return " ".join(text.splitlines())
+
+
+async def aiter_llm(lines, client, *, model: str = lib.MODEL, fmt: str = "jsonl", field: str = "text",
+                    output_field: str = "output", concurrency: int = 8, chunk_size: int = 1000,
+                    deadline: float = None):
+    """
+    LLM path: at most `concurrency` pipelines in flight over a sliding window of
+    `chunk_size` lines, written in input order; a slow line holds back the output,
+    not the conversions behind it.
+    """
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def convert(text: str):
+        async with limit:
+            try:
+                return await lib.ademojify(text, client, model=model, deadline=deadline)
+            except Exception as e:
+                standard_out = lib.emoji_semantic_clean(text)
+                return lib.DemojifyResult(final_text=standard_out, source="standard", standard_text=standard_out,
+                                          llm_text=None, reason=f"llm_error: {e}")
+
+    def output(obj, res) -> str:
+        if fmt == "text":
+            return _one_line(res.final_text) if res is not None else ""
+        if obj is None:
+            return ""
+        if res is not None:
+            obj[output_field], obj["source"], obj["reason"] = res.final_text, res.source, res.reason
+        return _dump(obj)
+
+    window = max(1, chunk_size, concurrency)
+    pending = deque()  # (obj, task or None), in input order
+    try:
+        for line in lines:
+            obj, text = (None, line) if fmt == "text" else \
+                ((None, None) if not line.strip() else _jsonl_record(line, field))
+            pending.append((obj, asyncio.ensure_future(convert(text)) if text else None))
+            while len(pending) >= window:
+                obj, task = pending.popleft()
+                yield output(obj, await task if task is not None else None)
+        while pending:
+            obj, task = pending.popleft()
+            yield output(obj, await task if task is not None else None)
+    finally:
+        for _, task in pending:
+            if task is not None:
+                task.cancel()
+
+
+# ---- I/O and progress ----
+class _Progress:
+    def __init__(self, interval: float, stream=sys.stderr):
+        self.interval, self.stream = interval, stream
+        self.lines = 0
+        self.start = self._last = time.perf_counter()
+
+    def tick(self) -> None:
+        self.lines += 1
+        if self.interval > 0 and self.lines % 256 == 0:
+            now = time.perf_counter()
+            if now - self._last >= self.interval:
+                self._last = now
+                self._report(now, end="\r")
+
+    def rate(self, now: float = None) -> float:
+        elapsed = (now or time.perf_counter()) - self.start
+        return self.lines / elapsed if elapsed > 0 else 0.0
+
+    def _report(self, now: float, end: str) -> None:
+        print(f"{self.lines} lines, {self.rate(now):,.0f} lines/s", end=end, file=self.stream, flush=True)
+
+    def done(self) -> None:
+        if self.interval >= 0:
+            self._report(time.perf_counter(), end="\n")
+
+
+def _read_lines(f):
+    for line in f:
+        yield line.rstrip("\r\n")
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt != "auto":
+        return fmt
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "text"
+
+
+def _llm_client():
+    from openai import AsyncOpenAI
+    from demojify_resilience import BreakerClient, CircuitBreaker
+
+    api_key = os.getenv("DEMOJIFY_LLM_API_KEY")
+    if not api_key:
+        raise SystemExit("--llm needs DEMOJIFY_LLM_API_KEY (and optionally DEMOJIFY_LLM_BASE_URL)")
+    client = AsyncOpenAI(base_url=os.getenv("DEMOJIFY_LLM_BASE_URL", DEFAULT_BASE_URL), api_key=api_key)
+    return BreakerClient(client, CircuitBreaker())
+
+
+def run(src, dst, *, fmt: str = "jsonl", field: str = "text", output_field: str = "output",
+        keep_case: bool = False, workers: int = 0, chunk_size: int = 1000, llm_client=None,
+        model: str = lib.MODEL, llm_concurrency: int = 8, deadline: float = None,
+        progress_interval: float = 2.0) -> int:
+    """Streams `src` (text file object) to `dst`; returns the number of lines written."""
+    progress = _Progress(progress_interval)
+    lines = _read_lines(src)
+    if llm_client is None:
+        for out in iter_standard(lines, fmt=fmt, field=field, output_field=output_field, keep_case=keep_case,
+                                 workers=workers, chunk_size=chunk_size):
+            dst.write(out + "\n")
+            progress.tick()
+    else:
+        async def drain():
+            async for out in aiter_llm(lines, llm_client, model=model, fmt=fmt, field=field,
+                                       output_field=output_field, concurrency=llm_concurrency,
+                                       chunk_size=chunk_size, deadline=deadline):
+                dst.write(out + "\n")
+                progress.tick()
+        asyncio.run(drain())
+    dst.flush()
+    progress.done()
+    return progress.lines
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m demojify_lib",
+                                 description="Demojify a JSONL or plain-text file line by line.")
+    ap.add_argument("input", help="input file, or - for stdin")
+    ap.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    ap.add_argument("--format", default="auto", choices=("auto", "jsonl", "text"),
+                    help="auto: .jsonl/.ndjson is JSONL, anything else plain text")
+    ap.add_argument("--field", default="text", help="JSONL field holding the text")
+    ap.add_argument("--output-field", default="output", help="JSONL field the result is written to")
+    ap.add_argument("--keep-case", action="store_true", help="do not lowercase the STANDARD output")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="process pool size for the STANDARD path (0 = in-process)")
+    ap.add_argument("--chunk-size", type=int, default=1000,
+                    help="lines per dispatched chunk (--llm: lines converted ahead of the output)")
+    ap.add_argument("--llm", action="store_true", help="run the LLM pipeline (needs DEMOJIFY_LLM_API_KEY)")
+    ap.add_argument("--llm-concurrency", type=int, default=8, help="LLM pipelines in flight")
+    ap.add_argument("--model", default=os.getenv("DEMOJIFY_LLM_MODEL", lib.MODEL))
+    ap.add_argument("--deadline-ms", type=int, default=0, help="per-line LLM budget (0 = unbounded)")
+    ap.add_argument("--progress-interval", type=float, default=2.0,
+                    help="seconds between progress reports on stderr (negative = silent)")
+    args = ap.parse_args(argv)
+
+    fmt = _detect_format(args.input, args.format)
+    src = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", errors="replace")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", buffering=1 << 20)
+    try:
+        run(src, dst, fmt=fmt, field=args.field, output_field=args.output_field, keep_case=args.keep_case,
+            workers=args.workers, chunk_size=max(1, args.chunk_size),
+            llm_client=_llm_client() if args.llm else None, model=args.model,
+            llm_concurrency=args.llm_concurrency,
+            deadline=args.deadline_ms / 1000.0 if args.deadline_ms > 0 else None,
+            progress_interval=args.progress_interval)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
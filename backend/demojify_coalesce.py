@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Single-flight coalescing for identical in-flight conversions.
+
+Concurrent callers asking for the same key (e.g. `cache_key(text, model, mode)`)
+share one execution of the pipeline and all receive its result (or its exception).
+Nothing is remembered once the call finishes; that is the result cache's job.
+
+- SingleFlight: for sync servers / thread pools.
+- AsyncSingleFlight: for asyncio servers. The shared work runs in its own task,
+  so one caller disconnecting does not cancel it for the others.
+
+Usage example:
+    flight = AsyncSingleFlight()
+    res = await flight.do(key, lambda: ademojify(text, client, model=model))
+"""
+
+import asyncio
+import threading
+
+
+class _Counters:
+    def __init__(self):
+        self.calls = 0        # every do()
+        self.executions = 0   # calls that actually ran the pipeline
+        self.coalesced = 0    # calls that joined an in-flight execution
+
+    def stats(self, in_flight: int) -> dict:
+        return {"calls": self.calls, "executions": self.executions,
+                "coalesced": self.coalesced, "in_flight": in_flight}
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(_Counters):
+    """Thread-safe: the first caller for a key runs `fn()`, later callers block on its result."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return super().stats(len(self._inflight))
+
+
+class AsyncSingleFlight(_Counters):
+    """asyncio flavour; `fn` is a zero-argument callable returning an awaitable."""
+
+    def __init__(self):
+        super().__init__()
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark as retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        return super().stats(len(self._inflight))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Precomputed emoji lookup table for the rules engine.
+
+The `emoji` package is large to import and builds its search tree on first use.
+demojify needs only a small part of it, so `build_table` extracts that part once:
+
+- the codepoint trie of every emoji sequence (the tree `emoji.tokenize` walks).
+  Each terminal node's "data" is the emoji's English name, with the skin tone
+  removed and lowercased. That name is the key into ALIAS_FALLBACK /
+  EMOJI_NAME_FALLBACKS, so edits to those tables take effect without a rebuild.
+- the component emojis (skin tones, hair), which the ZWJ rules of `emoji.tokenize` need.
+
+The table is stored as compact JSON next to this module. `load_table` reads it in
+about a millisecond, because the C JSON decoder builds the nested trie directly.
+If the file is missing, the table is built in memory from the `emoji` package.
+Loading the shipped table never imports `emoji` (or probes its version: that costs
+as much as the import). The table records the `emoji` version it was built from;
+`--check`, run offline or in CI, catches a drift from the installed one.
+
+Rebuild after upgrading `emoji`:
+    python backend/demojify_emoji_table.py
+    python backend/demojify_emoji_table.py --check   # exit 1 if the file is stale
+"""
+
+import json
+import os
+import sys
+
+FORMAT = 1
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "demojify_emoji_table.json")
+
+
+def emoji_name(alias: str) -> str:
+    """':thumbs_up_medium_skin_tone:' -> 'thumbs up' (the key the fallback tables use)."""
+    from demojify_lib import _SKIN_TONE_RE
+    name = alias.strip(":").replace("_", " ")
+    return _SKIN_TONE_RE.sub("", name).strip().lower()
+
+
+def build_table() -> dict:
+    import emoji
+    from emoji import unicode_codes
+
+    tree, components = {}, []
+    for seq, data in emoji.EMOJI_DATA.items():
+        node = tree
+        for ch in seq:
+            node = node.setdefault(ch, {})
+        node["data"] = emoji_name(emoji.demojize(seq, language="en"))
+        if data["status"] == unicode_codes.STATUS["component"]:
+            components.append(seq)
+    return {"format": FORMAT, "emoji": emoji.__version__, "components": components, "tree": tree}
+
+
+def write_table(table: dict, path: str = TABLE_PATH) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        f.write("\n")
+
+
+def load_table(path: str = TABLE_PATH) -> dict:
+    """The shipped table, or one built from the `emoji` package if the file is missing or of another format."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("format") == FORMAT:
+            return table
+    except FileNotFoundError:
+        pass
+    return build_table()
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build the precomputed emoji table from the emoji package.")
+    ap.add_argument("-o", "--output", default=TABLE_PATH)
+    ap.add_argument("--check", action="store_true", help="only compare; exit 1 if the file is stale")
+    args = ap.parse_args(argv)
+
+    table = build_table()
+    if args.check:
+        try:
+            with open(args.output, encoding="utf-8") as f:
+                current = json.load(f)
+        except FileNotFoundError:
+            current = None
+        if current != table:
+            print(f"{args.output} is stale; rebuild with: python {sys.argv[0]}", file=sys.stderr)
+            return 1
+        return 0
+    write_table(table, args.output)
+    print(f"wrote {args.output}: {len(table['tree'])} roots, emoji {table['emoji']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
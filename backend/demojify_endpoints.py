@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+Several OpenAI-compatible endpoints behind one client, with hedged requests.
+
+- Endpoint: one provider client plus the model to ask it for. It keeps a rolling
+  window of its recent latencies (for percentiles) and an EWMA used for routing.
+  Failures count as `error_penalty_s`, and a loser cancelled after t seconds counts
+  as at least t.
+- EndpointPool: proxy exposing `.chat.completions.create` like a single client, so
+  `_create_chat_completion` and the other wrappers work unchanged. Each call goes
+  to the endpoint with the lowest expected latency: EWMA x (1 + calls in flight).
+  Endpoints not measured yet are tried first, and every `probe_every`-th request
+  goes to the least recently used one, so a recovered endpoint is noticed.
+  If the endpoint has not answered once its `hedge_percentile` latency has passed,
+  the same request is sent to the next endpoint. The first valid response wins and
+  the other call is cancelled. A call that fails, or returns no choices, fails over
+  to the next endpoint at once. At most `max_attempts` calls are made per request.
+
+Async clients get an async `create` whose losers are cancelled. Sync clients get a
+sync one on a thread pool, where a losing call cannot be interrupted and its
+result is dropped.
+
+Usage example:
+    pool = EndpointPool([Endpoint(AsyncOpenAI(base_url=url_a, api_key=key_a), "DeepSeek-V3.1"),
+                         Endpoint(AsyncOpenAI(base_url=url_b, api_key=key_b), "Meta-Llama-3.3-70B-Instruct")],
+                        hedge_percentile=0.95)
+    res = await ademojify(text, pool, model="DeepSeek-V3.1")   # `model` is replaced per endpoint
+    pool.stats()
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Optional
+
+from demojify_lib import _chat_create, _is_async_callable
+
+
+class Endpoint:
+    def __init__(self, client, model: Optional[str] = None, *, name: Optional[str] = None, window: int = 200,
+                 alpha: float = 0.2, error_penalty_s: float = 5.0):
+        self.client = client
+        self.model = model
+        self.name = name or str(getattr(client, "base_url", None) or model or "endpoint")
+        self.create = _chat_create(client)
+        self.is_async = _is_async_callable(self.create)
+        self.alpha = alpha
+        self.error_penalty_s = error_penalty_s
+        self._latencies = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self.ewma_s = None
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.wins = 0
+        self.cancelled = 0
+        self.last_used = 0.0
+
+    def kwargs(self, kwargs: dict) -> dict:
+        return kwargs if self.model is None else {**kwargs, "model": self.model}
+
+    def _update(self, seconds: float) -> None:
+        self.ewma_s = seconds if self.ewma_s is None else self.ewma_s + self.alpha * (seconds - self.ewma_s)
+
+    def started(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.last_used = time.monotonic()
+
+    def succeeded(self, seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.wins += 1
+            self._latencies.append(seconds)
+            self._update(seconds)
+
+    def failed(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += 1
+            self._update(self.error_penalty_s)
+
+    def lost(self, seconds: float) -> None:
+        """Cancelled after `seconds` because another endpoint answered first."""
+        with self._lock:
+            self.in_flight -= 1
+            self.cancelled += 1
+            if self.ewma_s is None or seconds > self.ewma_s:
+                self._update(seconds)
+
+    def score(self) -> float:
+        # expected wait; 0 for an endpoint never measured, so every endpoint gets sampled
+        return 0.0 if self.ewma_s is None else self.ewma_s * (1 + self.in_flight)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank `q` (0..1) quantile of the recent successful latencies, in seconds."""
+        with self._lock:
+            values = sorted(self._latencies)
+        if not values:
+            return None
+        return values[min(len(values) - 1, max(0, int(q * len(values) + 0.5) - 1))]
+
+    def stats(self) -> dict:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        ms = lambda s: None if s is None else round(s * 1000.0, 3)  # noqa: E731
+        return {"name": self.name, "model": self.model, "calls": self.calls, "errors": self.errors,
+                "wins": self.wins, "cancelled": self.cancelled, "in_flight": self.in_flight,
+                "ewma_ms": ms(self.ewma_s), "p50_ms": ms(p50), "p95_ms": ms(p95), "samples": len(self._latencies)}
+
+
+def _valid(resp) -> bool:
+    return bool(getattr(resp, "choices", None))
+
+
+class EndpointPool:
+    def __init__(self, endpoints, *, hedge_percentile: Optional[float] = 0.95, hedge_min_s: float = 0.05,
+                 hedge_initial_s: Optional[float] = 1.0, min_samples: int = 20, max_attempts: int = 2,
+                 probe_every: int = 50):
+        self.endpoints = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        kinds = {ep.is_async for ep in self.endpoints}
+        if len(kinds) != 1:
+            raise ValueError("EndpointPool endpoints must be all async or all sync clients")
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_s = hedge_min_s
+        self.hedge_initial_s = hedge_initial_s
+        self.min_samples = min_samples
+        self.max_attempts = max(1, max_attempts)
+        self.probe_every = probe_every
+        self._executor = None
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failovers = 0
+        create = self._async_create if kinds.pop() else self._sync_create
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+    # ---- routing ----
+    def _route(self) -> list:
+        """Endpoints for the attempts of one request, best first (ties keep the configured order)."""
+        ranked = sorted(self.endpoints, key=Endpoint.score)
+        if self.probe_every and len(ranked) > 1 and self.requests % self.probe_every == 0:
+            # re-measure the endpoint we have heard from least recently; the hedge bounds what this costs
+            stale = min(ranked, key=lambda ep: ep.last_used)
+            ranked.remove(stale)
+            ranked.insert(0, stale)
+        return [ranked[i % len(ranked)] for i in range(self.max_attempts)]
+
+    def hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        """Seconds to wait on `endpoint` before hedging; None = never hedge."""
+        if self.hedge_percentile is None:
+            return None
+        if len(endpoint._latencies) < self.min_samples:
+            delay = self.hedge_initial_s
+        else:
+            delay = endpoint.percentile(self.hedge_percentile)
+        return None if delay is None else max(self.hedge_min_s, delay)
+
+    def _next_timeout(self, pending: dict, more: bool) -> Optional[float]:
+        # the hedge timer runs from the latest call sent, at that endpoint's percentile
+        if not more:
+            return None
+        ep, _, started_at, _ = next(reversed(pending.values()))
+        delay = self.hedge_delay(ep)
+        return None if delay is None else max(0.0, delay - (time.perf_counter() - started_at))
+
+    # ---- async ----
+    async def _async_create(self, **kwargs):
+        self.requests += 1
+        order = self._route()
+        pending = {}  # task -> (endpoint, attempt, started_at, hedge)
+        finished = 0
+        last_error = None
+
+        def launch(hedge: bool) -> None:
+            attempt = finished + len(pending)
+            ep = order[attempt]
+            ep.started()
+            if hedge:
+                self.hedges += 1
+            elif attempt > 0:
+                self.failovers += 1
+            task = asyncio.ensure_future(ep.create(**ep.kwargs(kwargs)))
+            pending[task] = (ep, attempt, time.perf_counter(), hedge)
+
+        launch(False)
+        try:
+            while pending:
+                timeout = self._next_timeout(pending, finished + len(pending) < len(order))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch(True)
+                    continue
+                for task in done:
+                    ep, _, started_at, hedge = pending.pop(task)
+                    finished += 1
+                    try:
+                        resp = task.result()
+                        if not _valid(resp):
+                            raise ValueError(f"{ep.name}: response without choices")
+                    except Exception as e:
+                        ep.failed()
+                        last_error = e
+                        continue
+                    ep.succeeded(time.perf_counter() - started_at)
+                    self.hedge_wins += hedge
+                    return resp
+                if not pending and finished < len(order):
+                    launch(False)
+            raise last_error
+        finally:
+            for task, (ep, _, started_at, _) in pending.items():
+                task.cancel()
+                ep.lost(time.perf_counter() - started_at)
+
+    # ---- sync ----
+    def _pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=4 * len(self.endpoints) + 4, thread_name_prefix="demojify-endpoint")
+        return self._executor
+
+    def _sync_create(self, **kwargs):
+        self.requests += 1
+        order = self._route()
+        pending = {}  # future -> (endpoint, attempt, started_at, hedge)
+        finished = 0
+        last_error = None
+
+        def launch(hedge: bool) -> None:
+            attempt = finished + len(pending)
+            ep = order[attempt]
+            ep.started()
+            if hedge:
+                self.hedges += 1
+            elif attempt > 0:
+                self.failovers += 1
+            fut = self._pool().submit(ep.create, **ep.kwargs(kwargs))
+            pending[fut] = (ep, attempt, time.perf_counter(), hedge)
+
+        launch(False)
+        try:
+            while pending:
+                timeout = self._next_timeout(pending, finished + len(pending) < len(order))
+                done, _ = concurrent.futures.wait(pending, timeout=timeout,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not done:
+                    launch(True)
+                    continue
+                for fut in done:
+                    ep, _, started_at, hedge = pending.pop(fut)
+                    finished += 1
+                    try:
+                        resp = fut.result()
+                        if not _valid(resp):
+                            raise ValueError(f"{ep.name}: response without choices")
+                    except Exception as e:
+                        ep.failed()
+                        last_error = e
+                        continue
+                    ep.succeeded(time.perf_counter() - started_at)
+                    self.hedge_wins += hedge
+                    return resp
+                if not pending and finished < len(order):
+                    launch(False)
+            raise last_error
+        finally:
+            for fut, (ep, _, started_at, _) in pending.items():
+                fut.cancel()  # a call already running finishes on its thread; its result is dropped
+                ep.lost(time.perf_counter() - started_at)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "hedges": self.hedges, "hedge_wins": self.hedge_wins,
+                "failovers": self.failovers, "hedge_percentile": self.hedge_percentile,
+                "endpoints": [ep.stats() for ep in self.endpoints]}
+
+    def __getattr__(self, name):
+        return getattr(self.endpoints[0].client, name)
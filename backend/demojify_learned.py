@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Learned phrase table: validated LLM rewrites promoted into the deterministic path.
+
+Every result with reason "llm_valid" is a paid-for rewrite that the validator accepted.
+LearnedPhrases records it under the input's context pattern (`phrase_key`). The
+pattern keeps the text's tokens as written, symbols included ("50%", "$5", "-5",
+"2+2", "can't"), lowercased and with letter elongations squeezed. Only sentence
+punctuation around a token is dropped ("funny!!" -> "funny"), except a question
+mark, which stays a token of its own so a question never shares a rule with the
+statement. Each emoji run is replaced with the emoji's name (skin tone removed).
+Once the same
+rewrite has been seen `min_count` times for a pattern, and makes up at least
+`min_agreement` of the rewrites seen there, it is promoted to a rule. From then on
+`ademojify(..., learned=...)` answers matching inputs locally with reason
+"learned_rule" and makes no LLM call.
+
+The store is bounded (`max_entries` patterns, least recently used evicted first).
+`export()` / `load()` round-trip it as JSON, so a table warmed on one replica can
+ship to all of them.
+
+Usage example:
+    learned = LearnedPhrases(min_count=3)
+    learned.load_file("learned.json")          # optional: start from a warmed table
+    res = await ademojify(text, client, learned=learned)
+    learned.save_file("learned.json")
+"""
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import demojify_lib as lib
+
+FORMAT = 3  # 2: "?" is part of the key; 3: symbols and digits are kept as written
+
+# letters only: "soooo" -> "soo", but "1000" is not "100"
+_LETTER_ELONG_RE = re.compile(r"([^\W\d_])\1{2,}")
+# dropped around a token: emphasis and sentence punctuation, brackets and quotes
+_SOFT_PUNCT = "!.,;:…\"“”«»()[]{}"
+
+
+def phrase_key(analysis: lib.EmojiAnalysis) -> str:
+    """
+    'LOL soooo funny 😂😂!!' and 'lol sooo funny 😂' -> 'lol soo funny :face with tears of joy:';
+    'you ok?? 😢' -> 'you ok ? :crying face:'.
+    """
+    parts, prev = [], None
+    for kind, chunk in analysis.items:
+        if kind == "emoji":
+            name = ":" + (lib._emoji_name(chunk) or chunk) + ":"
+            if name != prev:
+                parts.append(name)
+            prev = name
+            continue
+        prev = None
+        for token in _LETTER_ELONG_RE.sub(r"\1\1", chunk.lower().replace("’", "'")).split():
+            core = token.strip(_SOFT_PUNCT + "?")
+            if core:
+                parts.append(core)
+            if "?" in token[len(token.rstrip(_SOFT_PUNCT + "?")):]:
+                parts.append("?")
+    return " ".join(parts)
+
+
+class LearnedPhrases:
+    """Thread-safe bounded store of pattern -> {rewrite: count}, with promoted rules."""
+
+    def __init__(self, *, min_count: int = 3, min_agreement: float = 0.8, max_entries: int = 10_000,
+                 max_variants: int = 4):
+        self.min_count = max(1, min_count)
+        self.min_agreement = min_agreement
+        self.max_entries = max_entries
+        self.max_variants = max(1, max_variants)
+        self._data = OrderedDict()  # key -> {"counts": {phrase: n}, "rule": phrase or None}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.observed = 0
+        self.promotions = 0
+        self.evictions = 0
+
+    # ---- pipeline hooks ----
+    def lookup(self, analysis: lib.EmojiAnalysis) -> Optional[str]:
+        """The promoted rewrite for this input's pattern, if any."""
+        key = phrase_key(analysis)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry["rule"] is None:
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry["rule"]
+
+    def has_rule(self, analysis: lib.EmojiAnalysis) -> bool:
+        """Whether `lookup` would answer this input (not counted as a hit)."""
+        with self._lock:
+            entry = self._data.get(phrase_key(analysis))
+            return entry is not None and entry["rule"] is not None
+
+    def observe(self, analysis: lib.EmojiAnalysis, phrase: str) -> None:
+        """Records one validated rewrite; promotes it when it recurs often and consistently enough."""
+        phrase = phrase.strip()
+        if self.max_entries <= 0 or not phrase:
+            return
+        key = phrase_key(analysis)
+        with self._lock:
+            self.observed += 1
+            entry = self._data.get(key)
+            if entry is None:
+                entry = self._data[key] = {"counts": {}, "rule": None}
+            self._data.move_to_end(key)
+            counts = entry["counts"]
+            counts[phrase] = counts.get(phrase, 0) + 1
+            if len(counts) > self.max_variants:
+                del counts[min(counts, key=counts.get)]
+            self._promote(entry)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _promote(self, entry: dict) -> None:
+        counts = entry["counts"]
+        best = max(counts, key=counts.get)
+        if counts[best] >= self.min_count and counts[best] >= self.min_agreement * sum(counts.values()):
+            if entry["rule"] != best:
+                self.promotions += 1
+            entry["rule"] = best
+        else:
+            entry["rule"] = None
+
+    # ---- export / import ----
+    def rules(self) -> dict:
+        with self._lock:
+            return {k: e["rule"] for k, e in self._data.items() if e["rule"] is not None}
+
+    def export(self) -> dict:
+        with self._lock:
+            return {"format": FORMAT,
+                    "entries": {k: {"counts": dict(e["counts"]), "rule": e["rule"]} for k, e in self._data.items()}}
+
+    def load(self, data: dict) -> int:
+        """Merges an `export()` (counts are added); returns the number of patterns read."""
+        if data.get("format") != FORMAT:
+            raise ValueError(f"unsupported learned table format: {data.get('format')!r}")
+        entries = data.get("entries") or {}
+        with self._lock:
+            for key, item in entries.items():
+                entry = self._data.setdefault(key, {"counts": {}, "rule": None})
+                for phrase, n in (item.get("counts") or {}).items():
+                    entry["counts"][phrase] = entry["counts"].get(phrase, 0) + int(n)
+                while len(entry["counts"]) > self.max_variants:
+                    del entry["counts"][min(entry["counts"], key=entry["counts"].get)]
+                if entry["counts"]:
+                    self._promote(entry)
+                self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return len(entries)
+
+    def save_file(self, path: str) -> None:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.export(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load_file(self, path: str) -> int:
+        """Loads `path` if it exists; returns the number of patterns read (0 if there is no file)."""
+        try:
+            with open(path, encoding="utf-8") as f:
+                return self.load(json.load(f))
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rules = sum(1 for e in self._data.values() if e["rule"] is not None)
+            return {"patterns": len(self._data), "rules": rules, "max_entries": self.max_entries,
+                    "min_count": self.min_count, "observed": self.observed, "hits": self.hits,
+                    "promotions": self.promotions, "evictions": self.evictions}
@@ -12,6 +12,9 @@ Usage example (pseudo):
     client = Client(api_key="...")
     res = demojify("so what's up man 😚", client, model="DeepSeek-V3.1")
     print(res.final_text, res.source, res.reason)
+
+Bulk files from the command line (see demojify_cli.py):
+    python -m demojify_lib messages.jsonl -o clean.jsonl --workers 8
 """
 
 # ------------ Config ------------
@@ -20,239 +23,535 @@ MODEL = "DeepSeek-V3.1"
 
 import re
 import json
-from dataclasses import dataclass
+import time
+import unicodedata
+import logging
+# asyncio, inspect and concurrent.futures are imported where they are used: the rules
+# path (a cold CLI run, a pool worker) never needs them and they cost more than it does
+from dataclasses import dataclass, field
 from typing import Optional
 
+log = logging.getLogger("demojify")
+
 
 # ========== Utility: unified way to call chat completions ==========
-def _create_chat_completion(client, **kwargs):
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while a circuit breaker is open."""
+
+
+def _chat_create(client):
     """
-    Calls the REAL chat completions endpoint on your SDK.
+    Finds the REAL chat completions endpoint on your SDK.
     Tries `client.chat.completions.create` first, then `client.chat_completions.create`.
     """
     # Prefer OpenAI-style
     if hasattr(client, "chat") and hasattr(client.chat, "completions"):
-        return client.chat.completions.create(**kwargs)
+        return client.chat.completions.create
     # Some SDKs expose this alias
     if hasattr(client, "chat_completions"):
-        return client.chat_completions.create(**kwargs)
+        return client.chat_completions.create
     raise RuntimeError("No supported chat completions method found on the client.")
 
 
+def _is_async_callable(fn) -> bool:
+    import inspect
+    return inspect.iscoroutinefunction(inspect.unwrap(fn))
+
+
+def _create_chat_completion(client, **kwargs):
+    """Calls the REAL chat completions endpoint on your SDK."""
+    return _chat_create(client)(**kwargs)
+
+
+def _timeout_kw(timeout: Optional[float]) -> dict:
+    # Only sent when a deadline is in force, so SDKs without a `timeout` kwarg keep working.
+    return {} if timeout is None else {"timeout": timeout}
+
+
+async def _acreate_chat_completion(client, **kwargs):
+    """
+    Async twin of `_create_chat_completion` for AsyncOpenAI-style clients.
+    A sync client still works: its blocking call is moved to a worker thread.
+    """
+    import asyncio
+    import inspect
+    create = _chat_create(client)
+    if _is_async_callable(create):
+        return await create(**kwargs)
+    resp = await asyncio.to_thread(create, **kwargs)
+    return await resp if inspect.isawaitable(resp) else resp
+
+
 # ========== Emoji detection ==========
 def _has_emoji(text: str) -> bool:
     try:
-        import emoji
-        if hasattr(emoji, "emoji_list"):
-            return bool(emoji.emoji_list(text))
-        # fallback for older versions
-        return emoji.demojize(text) != text
+        return any(kind == "emoji" for kind, _, _ in _replace_emoji_tokens(text))
     except Exception:
-        # last-ditch heuristic
+        # no emoji table and no `emoji` package: last-ditch heuristic
         return any("\U0001F300" <= ch <= "\U0001FAFF" for ch in text)
 
 
 # ========== STANDARD path: rule-based demojifier (parentheses) ==========
-def emoji_semantic_clean(text: str, *, keep_case: bool = False) -> str:
-    import unicodedata
-    import emoji
-    from collections import deque
-
-    EMOJI_MAP = {
-        "❤️": "love","♥️":"love","💙":"love","💜":"love","🖤":"love",
-        "👍":"okay","👎":"no","😂":"laughing","🤣":"laughing hard","😅":"embarrassed",
-        "😊":"smiling","😃":"smiling","😁":"smiling","🙂":"smiling","😢":"crying","😭":"crying",
-        "😡":"angry","😠":"angry","😮":"surprised","😲":"surprised","😎":"cool","😍":"in love",
-        "🤔":"thinking","🙄":"eyeroll","😒":"unamused","🔥":"awesome","✨":"sparkles","🎉":"congrats",
-        "👏":"applause","🙏":"please","🤝":"handshake","👍🏻":"okay","🍕":"pizza","🍺":"beer",
-        "🍿":"popcorn","🏆":"trophy","🚀":"taking off","💀":"dead (figuratively)","😤":"frustrated",
-        "😴":"sleepy","😜":"playful","😉":"wink","🤷":"shrug","🤷‍♂️":"shrug","🤷‍♀️":"shrug",
-        "🇺🇸":"USA","🇯🇵":"Japan","🇬🇧":"UK",
-    }
-    EMOJI_COMBOS = {"🍕🍺":"pizza and beer","😂😂":"hilarious","🔥🔥":"absolutely awesome","💀😂":"dead from laughter","🎉🎉":"congratulations"}
-    ALIAS_FALLBACK = {
-        "thumbs up":"okay","thumbs down":"no","red heart":"love","smiling face with sunglasses":"cool","fire":"awesome",
-        "united states":"USA","united kingdom":"UK","japan":"Japan","woman technologist":"technologist","man technologist":"technologist","technologist":"technologist",
-    }
-
-    _SKIN_TONE_RE = re.compile(r"(?: light| medium| medium-light| medium-dark| dark)? skin tone", re.I)
-    _VS_ZW_RE     = re.compile(r"[\uFE0F\u200D]")
-    MULTISPACE_RE = re.compile(r"\s+")
-    ELONG_RE      = re.compile(r"(.)\1{2,}")
-    ONLY_EMOJI_OR_PUNCT_RE = re.compile(r"^[\W_]+$")
-    WORD_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
-
-    def _wrap(w: str) -> str: return f"({w})"
-    def _strip_parens(t: str) -> str: return t[1:-1] if len(t)>=2 and t[0]=="(" and t[-1]==")" else t
-    def _normalize(s: str) -> str: return _VS_ZW_RE.sub("", unicodedata.normalize("NFKC", s))
-    def _apply_combos(s: str) -> str:
-        for combo, phrase in EMOJI_COMBOS.items():
-            if combo in s: s = s.replace(combo, " "+_wrap(phrase)+" ")
-        return s
-    def _alias_words(alias: str) -> str:
-        name = alias.strip(":").replace("_"," ")
-        name = _SKIN_TONE_RE.sub("", name).strip().lower()
-        return ALIAS_FALLBACK.get(name, name)
-    def _emoji_to_word(e: str) -> str:
-        if e in EMOJI_MAP: return EMOJI_MAP[e]
-        alias = emoji.demojize(e, language="en")
-        words = _alias_words(alias)
-        return ALIAS_FALLBACK.get(words, words)
-    def _merge_punct(t: str) -> str:
-        t = re.sub(r"[!?.]{3,}", "!!", t)
-        t = re.sub(r"\s+([!?,.;:])", r"\1", t)
-        t = re.sub(r"([!?,.;:]){2,}", r"\1\1", t)
-        return t.strip()
-    def _emoji_only_or_lowinfo(raw: str) -> bool:
-        raw = raw.strip()
-        return bool(ONLY_EMOJI_OR_PUNCT_RE.fullmatch(re.sub(r"\s+","",raw)))
-    def _collapse_repeats(s: str):
-        if not hasattr(emoji, "emoji_list"): return s, False
-        items = emoji.emoji_list(s)
-        if not items: return s, False
-        out=[]; pos=0; i=0; n=len(items); had=False
-        while i<n:
-            st=items[i]["match_start"]; e=items[i]["emoji"]
-            if pos<st: out.append(s[pos:st])
-            j=i+1
-            while j<n and items[j]["match_start"]==items[j-1]["match_end"] and items[j]["emoji"]==e: j+=1
-            if j-i>=2: had=True
-            out.append(e); pos=items[j-1]["match_end"]; i=j
-        if pos<len(s): out.append(s[pos:])
-        return "".join(out), had
-
-    # pipeline
-    s = _normalize(text)
-    s, had_repeat = _collapse_repeats(s)
-
-    import emoji as _emoji_lib
-    def _replace(s: str) -> str:
-        def cb(e, data=None): return " "+f"({_emoji_to_word(e)})"+" "
-        s = _apply_combos(s)
-        s = _emoji_lib.replace_emoji(s, replace=cb)
-        return MULTISPACE_RE.sub(" ", s).strip()
-
-    s = _replace(s)
-    s = ELONG_RE.sub(r"\1\1", s)
-    s = MULTISPACE_RE.sub(" ", s).strip()
-    if not keep_case: s = s.lower()
-
-    if _emoji_only_or_lowinfo(text):
-        words = s.split()
-        core = [_strip_parens(w) for w in words]
-        if len(core)==1 and core[0] in {"awesome","sparkles","applause","congrats","hilarious","love","laughing","laughing hard"}:
-            return f"({core[0]})"
-        return ""
+EMOJI_MAP = {
+    "❤️": "love","♥️":"love","💙":"love","💜":"love","🖤":"love",
+    "👍":"okay","👎":"no","😂":"laughing","🤣":"laughing hard","😅":"embarrassed",
+    "😊":"smiling","😃":"smiling","😁":"smiling","🙂":"smiling","😢":"crying","😭":"crying",
+    "😡":"angry","😠":"angry","😮":"surprised","😲":"surprised","😎":"cool","😍":"in love",
+    "🤔":"thinking","🙄":"eyeroll","😒":"unamused","🔥":"awesome","✨":"sparkles","🎉":"congrats",
+    "👏":"applause","🙏":"please","🤝":"handshake","👍🏻":"okay","🍕":"pizza","🍺":"beer",
+    "🍿":"popcorn","🏆":"trophy","🚀":"taking off","💀":"dead (figuratively)","😤":"frustrated",
+    "😴":"sleepy","😜":"playful","😉":"wink","🤷":"shrug","🤷‍♂️":"shrug","🤷‍♀️":"shrug",
+    "🇺🇸":"USA","🇯🇵":"Japan","🇬🇧":"UK",
+}
+EMOJI_COMBOS = {"🍕🍺":"pizza and beer","😂😂":"hilarious","🔥🔥":"absolutely awesome","💀😂":"dead from laughter","🎉🎉":"congratulations"}
+ALIAS_FALLBACK = {
+    "thumbs up":"okay","thumbs down":"no","red heart":"love","smiling face with sunglasses":"cool","fire":"awesome",
+    "united states":"USA","united kingdom":"UK","japan":"Japan","woman technologist":"technologist","man technologist":"technologist","technologist":"technologist",
+}
+# Words a neighbouring token may use to already express an emoji's meaning.
+SYNONYMS = {
+    "awesome":{"awesome","amazing","great","fantastic","lit","fire"},
+    "love":{"love","loved","loving","adore","heart"},
+    "laughing":{"lol","lmao","rofl","haha","hahaha","funny"},
+    "laughing hard":{"lmao","rofl","hysterical"},
+    "hilarious":{"hilarious","hysterical"},
+    "crying":{"crying","tears","sad","sobbing"},
+    "angry":{"angry","mad","furious"},
+    "surprised":{"surprised","shocked","wow"},
+    "cool":{"cool","chill"},
+    "please":{"please","pls","plz"},
+    "okay":{"ok","okay","k","kk","ack"},
+    "congrats":{"congrats","congratulations","gg"},
+    "applause":{"applause","clap","clapping"},
+    "wink":{"wink","winking"},
+    "thinking":{"thinking","think"},
+    "in love":{"in","love"},
+}
+_EMOJI_ONLY_KEEP = frozenset({"awesome","sparkles","applause","congrats","hilarious","love","laughing","laughing hard"})
+_INTENSIFIABLE = frozenset({"laughing","laughing hard","hilarious","awesome","sparkles","applause","congrats","love"})
+_LAUGHTER = frozenset({"laughing","laughing hard","hilarious"})
+
+_SKIN_TONE_RE = re.compile(r"(?: light| medium| medium-light| medium-dark| dark)? skin tone", re.I)
+_VS_ZW_RE     = re.compile(r"[\uFE0F\u200D]")
+_VS_RE        = re.compile(r"[\uFE0E\uFE0F]")
+_MULTISPACE_RE = re.compile(r"\s+")
+_ELONG_RE      = re.compile(r"(.)\1{2,}")
+_ONLY_EMOJI_OR_PUNCT_RE = re.compile(r"^[\W_]+$")
+_WORD_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
+_PUNCT_RUN_RE = re.compile(r"[!?.]{3,}")
+_SPACE_BEFORE_PUNCT_RE = re.compile(r"\s+([!?,.;:])")
+_REPEATED_PUNCT_RE = re.compile(r"([!?,.;:]){2,}")
+
+
+def _base(tok: str) -> str:
+    return tok[1:-1] if tok.startswith("(") and tok.endswith(")") else tok
+
+
+_EMOJI_TREE = None
+_EMOJI_ROOT_RE = None
+_EMOJI_COMPONENTS = frozenset()
+_EMOJI_VERSION = None
+
+def _codepoint_class(codepoints, gap: int = 64):
+    """Character class covering `codepoints`; nearby ones are merged into ranges (a cheap superset)."""
+    ranges = []
+    for cp in sorted(set(codepoints)):
+        if ranges and cp - ranges[-1][1] <= gap:
+            ranges[-1][1] = cp
+        else:
+            ranges.append([cp, cp])
+    return re.compile("[" + "".join(
+        re.escape(chr(a)) if a == b else f"{re.escape(chr(a))}-{re.escape(chr(b))}" for a, b in ranges
+    ) + "]")
+
+def _emoji_search_tree():
+    """
+    Codepoint trie of every known emoji (the same tree the `emoji` package walks,
+    loaded from the precomputed table in demojify_emoji_table.json; terminal nodes
+    hold the emoji's name), plus a regex matching (a superset of) the characters an
+    emoji can start with, so plain text runs are skipped inside the regex engine.
+    """
+    global _EMOJI_TREE, _EMOJI_ROOT_RE, _EMOJI_COMPONENTS, _EMOJI_VERSION
+    if _EMOJI_TREE is None:
+        from demojify_emoji_table import load_table
+        table = load_table()
+        tree = table["tree"]
+        _EMOJI_ROOT_RE = _codepoint_class(ord(ch) for ch in tree)
+        _EMOJI_COMPONENTS = frozenset(table["components"])
+        _EMOJI_VERSION = table["emoji"]
+        _EMOJI_TREE = tree
+    return _EMOJI_TREE, _EMOJI_ROOT_RE
+
+def _emoji_name(e: str) -> Optional[str]:
+    """Skin-tone-free lowercase name of the emoji sequence `e` (None if it is not one)."""
+    node = _emoji_search_tree()[0]
+    for ch in e:
+        node = node.get(ch)
+        if node is None:
+            return None
+    return node.get("data")
+
+
+def _scan_emoji(s: str):
+    """
+    Single left-to-right pass over `s` (already NFKC-normalized, no VS16/ZWJ).
+    Yields ("text", chunk) and ("emoji", sequence) items in order, matching emojis
+    exactly like `emoji.tokenize` does: greedy longest walk, no backtracking, and
+    stray variation selectors dropped from the text.
+    """
+    tree, root_re = _emoji_search_tree()
+    n = len(s); pos = 0; i = 0
+    while True:
+        m = root_re.search(s, i)
+        if m is None:
+            break
+        i = m.start()
+        sub = tree.get(s[i])
+        if sub is None:
+            i += 1
+            continue
+        j = i + 1
+        while j < n and s[j] in sub:
+            sub = sub[s[j]]; j += 1
+        if "data" not in sub:
+            i += 1
+            continue
+        if pos < i:
+            yield "text", s[pos:i]
+        yield "emoji", s[i:j]
+        pos = i = j
+    if pos < n:
+        yield "text", s[pos:]
+
+
+class SemanticCleaner:
+    """
+    Rule-based demojifier with its rule tables compiled once.
+    Build one per rule set and reuse it; `clean` keeps no per-call state beyond
+    a memo of emoji -> word lookups. Combo keys must be sequences of emojis.
+
+        cleaner = SemanticCleaner(emoji_map={**EMOJI_MAP, "🦄": "unicorn"})
+        cleaner.clean("so rare 🦄")  # -> "so rare (unicorn)"
+    """
 
-    # drop emoji tokens if neighbors already express the meaning
-    _SYN = {
-        "awesome":{"awesome","amazing","great","fantastic","lit","fire"},
-        "love":{"love","loved","loving","adore","heart"},
-        "laughing":{"lol","lmao","rofl","haha","hahaha","funny"},
-        "laughing hard":{"lmao","rofl","hysterical"},
-        "hilarious":{"hilarious","hysterical"},
-        "crying":{"crying","tears","sad","sobbing"},
-        "angry":{"angry","mad","furious"},
-        "surprised":{"surprised","shocked","wow"},
-        "cool":{"cool","chill"},
-        "please":{"please","pls","plz"},
-        "okay":{"ok","okay","k","kk","ack"},
-        "congrats":{"congrats","congratulations","gg"},
-        "applause":{"applause","clap","clapping"},
-        "wink":{"wink","winking"},
-        "thinking":{"thinking","think"},
-        "in love":{"in","love"},
-    }
-    WORD_STRIP_RE = re.compile(r"^[^\w]+|[^\w]+$")
-    def _norm(w: str) -> str: return WORD_STRIP_RE.sub("", w or "").lower()
-    def _similar(a: str, meaning: str) -> bool:
-        a=_norm(a); b=_norm(meaning)
+    def __init__(self, *, emoji_map=None, combos=None, alias_fallback=None, synonyms=None):
+        self.emoji_map = dict(EMOJI_MAP if emoji_map is None else emoji_map)
+        self.combos = dict(EMOJI_COMBOS if combos is None else combos)
+        self.alias_fallback = dict(ALIAS_FALLBACK if alias_fallback is None else alias_fallback)
+        self.synonyms = {k: frozenset(v) for k, v in (SYNONYMS if synonyms is None else synonyms).items()}
+        self._words = {}  # emoji -> meaning word(s), filled lazily
+        self._emoji_toks = {}  # (emoji, keep_case) -> rendered tokens
+        # combos as a trie over emoji sequences: {emoji: {emoji: {..., None: phrase}}}
+        self._combo_trie = {}
+        for combo, phrase in self.combos.items():
+            items = list(_scan_emoji(_VS_ZW_RE.sub("", unicodedata.normalize("NFKC", combo))))
+            if not items or any(kind != "emoji" for kind, _ in items):
+                raise ValueError(f"combo {combo!r} must be a sequence of emojis")
+            node = self._combo_trie
+            for _, e in items:
+                node = node.setdefault(e, {})
+            node[None] = phrase
+
+    # ---- helpers ----
+    def _emoji_to_word(self, e: str) -> str:
+        word = self._words.get(e)
+        if word is None:
+            if e in self.emoji_map:
+                word = self.emoji_map[e]
+            else:
+                name = _emoji_name(e)
+                words = self.alias_fallback.get(name, name)
+                word = self.alias_fallback.get(words, words)
+            self._words[e] = word
+        return word
+
+    def _similar(self, a: str, meaning: str) -> bool:
+        a = _WORD_STRIP_RE.sub("", a or "").lower()
+        b = _WORD_STRIP_RE.sub("", meaning or "").lower()
         if not a or not b: return False
         if a==b or a in b or b in a: return True
-        return a in _SYN.get(b, set())
-
-    toks = s.split()
-    def _drop(idx) -> bool:
-        tok = toks[idx]
-        if not (tok.startswith("(") and tok.endswith(")")): return False
-        meaning = tok[1:-1]
-        prev = toks[idx-1][1:-1] if idx-1>=0 and toks[idx-1].startswith("(") and toks[idx-1].endswith(")") else toks[idx-1] if idx-1>=0 else ""
-        next_ = toks[idx+1][1:-1] if idx+1<len(toks) and toks[idx+1].startswith("(") and toks[idx+1].endswith(")") else toks[idx+1] if idx+1<len(toks) else ""
-        if (prev and prev.isalpha() and _similar(prev, meaning)) or (next_ and next_.isalpha() and _similar(next_, meaning)):
-            return True
-        return False
-    toks = [t for i,t in enumerate(toks) if not _drop(i)]
-
-    # collapse duplicates
-    out=[]
-    def _base(x): return x[1:-1] if x.startswith("(") and x.endswith(")") else x
-    for i,t in enumerate(toks):
-        prev_same = (i>0 and _base(toks[i-1])==_base(t))
-        next_same = (i<len(toks)-1 and _base(toks[i+1])==_base(t))
-        if prev_same or next_same:
-            if not prev_same: out.append(t)
-        else:
+        return a in self.synonyms.get(b, ())
+
+    @staticmethod
+    def _merge_punct(t: str) -> str:
+        t = _PUNCT_RUN_RE.sub("!!", t)
+        t = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", t)
+        t = _REPEATED_PUNCT_RE.sub(r"\1\1", t)
+        return t.strip()
+
+    def _render(self, word: str, keep_case: bool):
+        toks = []
+        for w in word.split():
+            w = _ELONG_RE.sub(r"\1\1", w)
+            toks.append(w if keep_case else w.lower())
+        return toks
+
+    def _render_emoji(self, e: str, keep_case: bool):
+        key = (e, keep_case)
+        toks = self._emoji_toks.get(key)
+        if toks is None:
+            toks = self._emoji_toks[key] = tuple(self._render("(" + self._emoji_to_word(e) + ")", keep_case))
+        return toks
+
+    def _emit_run(self, run, out, keep_case: bool) -> None:
+        """Render a run of adjacent emojis, longest EMOJI_COMBOS match first."""
+        i = 0; n = len(run)
+        while i < n:
+            node = self._combo_trie; j = i; hit = None
+            while j < n and run[j] in node:
+                node = node[run[j]]; j += 1
+                if None in node: hit = (j, node[None])
+            if hit:
+                out.extend(self._render("(" + hit[1] + ")", keep_case))
+                i = hit[0]
+            else:
+                out.extend(self._render_emoji(run[i], keep_case))
+                i += 1
+
+    def tokenize(self, text: str, *, keep_case: bool = False, analysis: Optional["EmojiAnalysis"] = None):
+        """
+        Normalize `text` and turn it into the token stream the later stages read,
+        in one pass: emojis (and EMOJI_COMBOS) become "(meaning)" tokens, runs of the
+        same emoji collapse to one, elongated letters are squeezed to two.
+        Reuses the scan in `analysis` (see `analyze_emoji`) when given.
+        Returns (tokens, had_repeat).
+        """
+        items = _normalized_items(text)[1] if analysis is None else analysis.items
+        toks = []; run = []; had_repeat = False
+        for kind, chunk in items:
+            if kind == "emoji":
+                if run and run[-1] == chunk:
+                    had_repeat = True
+                else:
+                    run.append(chunk)
+                continue
+            if run:
+                self._emit_run(run, toks, keep_case); run = []
+            # a lone variation selector still separates two emojis, but is not text
+            chunk = chunk.replace("\ufe0e", "")
+            if chunk:
+                toks.extend(self._render(chunk, keep_case))
+        if run:
+            self._emit_run(run, toks, keep_case)
+        return toks, had_repeat
+
+    # ---- pipeline ----
+    def clean(self, text: str, *, keep_case: bool = False, analysis: Optional["EmojiAnalysis"] = None) -> str:
+        toks, had_repeat = self.tokenize(text, keep_case=keep_case, analysis=analysis)
+
+        if _ONLY_EMOJI_OR_PUNCT_RE.fullmatch(_MULTISPACE_RE.sub("", text.strip())):
+            core = [_base(w) for w in toks]
+            if len(core)==1 and core[0] in _EMOJI_ONLY_KEEP:
+                return f"({core[0]})"
+            return ""
+
+        return self._finish(toks, had_repeat)
+
+    def _finish(self, toks, had_repeat: bool) -> str:
+        # drop emoji tokens if neighbors already express the meaning
+        def _drop(idx) -> bool:
+            tok = toks[idx]
+            if not (tok.startswith("(") and tok.endswith(")")): return False
+            meaning = tok[1:-1]
+            prev = _base(toks[idx-1]) if idx-1>=0 else ""
+            next_ = _base(toks[idx+1]) if idx+1<len(toks) else ""
+            if (prev and prev.isalpha() and self._similar(prev, meaning)) or (next_ and next_.isalpha() and self._similar(next_, meaning)):
+                return True
+            return False
+        toks = [t for i,t in enumerate(toks) if not _drop(i)]
+
+        # collapse duplicates
+        bases = [_base(t) for t in toks]
+        toks = [t for i,t in enumerate(toks) if not (i>0 and bases[i-1]==bases[i])]
+
+        # mild intensifier handling
+        out=[]; run=0
+        for i,t in enumerate(toks):
+            run += 1
+            if i+1<len(toks) and _base(toks[i+1])==_base(t): continue
             out.append(t)
-    toks = out
-
-    # mild intensifier handling
-    from collections import deque
-    buf, out = deque(), []
-    def flush():
-        if not buf: return
-        last = buf[-1]; b=_base(last)
-        if len(buf)>1 and b in {"laughing","laughing hard","hilarious","awesome","sparkles","applause","congrats","love"}:
-            out.append(last); out.append("!!")
-        else:
-            out.append(last)
-        buf.clear()
-    for t in toks:
-        if not buf or _base(buf[-1])==_base(t): buf.append(t)
-        else: flush(); buf.append(t)
-    flush(); toks=out
-
-    # remove decorative sparkles if we already have words
-    if any(_base(t).isalpha() and _base(t)!="sparkles" for t in toks):
-        toks = [t for t in toks if _base(t)!="sparkles"]
-
-    s = " ".join(toks)
-    s = _merge_punct(s)
-    if any(_base(t) in {"laughing","laughing hard","hilarious"} for t in toks) and "!" not in s:
-        s += "!"
-    if had_repeat and "!" not in s:
-        s += "!"
-    return s
+            if run>1 and _base(t) in _INTENSIFIABLE: out.append("!!")
+            run=0
+        toks = out
+
+        # remove decorative sparkles if we already have words
+        if any(_base(t).isalpha() and _base(t)!="sparkles" for t in toks):
+            toks = [t for t in toks if _base(t)!="sparkles"]
+
+        s = " ".join(toks)
+        s = self._merge_punct(s)
+        if any(_base(t) in _LAUGHTER for t in toks) and "!" not in s:
+            s += "!"
+        if had_repeat and "!" not in s:
+            s += "!"
+        return s
+
+    __call__ = clean
+
+
+_DEFAULT_CLEANER = None
+
+def _default_cleaner() -> SemanticCleaner:
+    global _DEFAULT_CLEANER
+    if _DEFAULT_CLEANER is None:
+        _DEFAULT_CLEANER = SemanticCleaner()
+    return _DEFAULT_CLEANER
+
+def emoji_semantic_clean(text: str, *, keep_case: bool = False, analysis: Optional["EmojiAnalysis"] = None) -> str:
+    return _default_cleaner().clean(text, keep_case=keep_case, analysis=analysis)
+
+def emoji_semantic_clean_batch(texts, *, keep_case: bool = False) -> list:
+    """STANDARD path over many texts in one pass; results are in input order."""
+    clean = _default_cleaner().clean
+    return [clean(t, keep_case=keep_case) for t in texts]
 
 
 # ========== Helper: replace leftover emojis with words (NO parentheses) ==========
+EMOJI_NAME_FALLBACKS = {
+    "thumbs up":"okay","thumbs down":"no","red heart":"love","smiling face with sunglasses":"cool","fire":"awesome",
+    "united states":"USA","united kingdom":"UK","japan":"Japan",
+}
+
+_ZWJ = "\u200d"
+
+def _replace_emoji_tokens(text: str):
+    """
+    (kind, chunk, start) items of raw `text`, kind "text" or "emoji", exactly as
+    `emoji.replace_emoji` splits it: stray variation selectors are dropped, and a
+    ZWJ joining emojis that form no known sequence is dropped and splits them.
+    Texts without a ZWJ take the `_scan_emoji` fast path; the rest follow
+    `emoji.tokenize(keep_zwj=False)` step by step.
+    """
+    if _ZWJ not in text:
+        pos = 0
+        for kind, chunk in _scan_emoji(text):
+            start, pos = pos, pos + len(chunk)
+            if kind == "text":
+                chunk = _VS_RE.sub("", chunk)
+            if chunk:
+                yield kind, chunk, start
+        return
+    tree = _emoji_search_tree()[0]
+    result = []; ignore = set()
+    n = len(text); i = 0
+    while i < n:
+        ch = text[i]
+        consumed = False
+        if i in ignore:
+            i += 1
+            continue
+        elif ch in tree:
+            j = i + 1; sub = tree[ch]
+            while j < n and text[j] in sub and j not in ignore:
+                sub = sub[text[j]]; j += 1
+            if "data" in sub:
+                result.append(("emoji", text[i:j], i))
+                i = j - 1; consumed = True
+        elif ch == _ZWJ and result and _emoji_name(result[-1][1]) is not None and i > 0 and text[i-1] in tree:
+            # ZWJ after an emoji outside a known sequence: drop it and re-scan the emoji before it
+            ignore.add(i)
+            if result[-1][1] in _EMOJI_COMPONENTS:
+                i -= sum(len(chunk) for _, chunk, _ in result[-2:])
+                if text[i] == _ZWJ:
+                    i += 1
+                    del result[-1]
+                else:
+                    del result[-2:]
+            else:
+                i -= len(result[-1][1])
+                del result[-1]
+            continue
+        elif result:
+            yield from result
+            result = []
+        if not consumed and ch != "\ufe0e" and ch != "\ufe0f":
+            result.append(("text", ch, i))
+        i += 1
+    yield from result
+
+def _words_from_tokens(tokens) -> str:
+    parts = []
+    for kind, chunk, _ in tokens:
+        if kind == "emoji":
+            # just the neutral words, no parens; skin tones are already stripped from the name
+            name = _emoji_name(chunk)
+            chunk = " " + EMOJI_NAME_FALLBACKS.get(name, name) + " "
+        parts.append(chunk)
+    return _MULTISPACE_RE.sub(" ", "".join(parts)).strip()
+
 def _to_words_no_parens(text: str) -> str:
     """
     If the LLM accidentally returns emojis, convert them to neutral words (no parentheses),
     preserving other text and spacing as much as possible.
     """
     try:
-        import emoji
-    except Exception:
+        return _words_from_tokens(_replace_emoji_tokens(text))
+    except ImportError:  # no emoji table and no `emoji` package to build it from
         return text
 
-    EMOJI_NAME_FALLBACKS = {
-        "thumbs up":"okay","thumbs down":"no","red heart":"love","smiling face with sunglasses":"cool","fire":"awesome",
-        "united states":"USA","united kingdom":"UK","japan":"Japan",
-    }
+def _without_emojis(text: str) -> str:
+    """`text` unchanged if it has no emoji, else `_to_words_no_parens(text)`; one scan either way."""
+    try:
+        tokens = list(_replace_emoji_tokens(text))
+    except ImportError:
+        return text
+    if not any(kind == "emoji" for kind, _, _ in tokens):
+        return text
+    return _words_from_tokens(tokens)
 
-    def alias_to_word(alias: str) -> str:
-        name = alias.strip(":").replace("_"," ").lower()
-        # strip skin tone words
-        name = re.sub(r"(?: light| medium| medium-light| medium-dark| dark)? skin tone", "", name).strip()
-        return EMOJI_NAME_FALLBACKS.get(name, name)
+def warm_up() -> None:
+    """Builds the shared rule tables and emoji tries now (e.g. in a new worker process) instead of on first use."""
+    emoji_semantic_clean("warm up 🙂👍🏽")
+    _to_words_no_parens("warm up 🙂")
 
-    def cb(e, data=None):
-        # return just the neutral words, no parens
-        alias = emoji.demojize(e, language="en")
-        return " " + alias_to_word(alias) + " "
 
-    out = emoji.replace_emoji(text, replace=cb)
-    return re.sub(r"\s+", " ", out).strip()
+# ========== Emoji analysis: one scan per input, shared by every stage ==========
+@dataclass
+class EmojiAnalysis:
+    """
+    What the pipeline needs to know about an input's emojis, computed once by
+    `analyze_emoji` and passed to the cleaner, the rewrite call and the validator
+    instead of each of them scanning the text again.
+    """
+    text: str
+    normalized: str  # NFKC, VS16/ZWJ removed: what the rules engine reads
+    items: tuple     # ("text", chunk) / ("emoji", sequence) items of `normalized`
+    spans: tuple     # (start, end, sequence) of every emoji in `text`, as `_has_emoji` finds them
+    repeats: tuple   # (sequence, count) for every run of the same emoji in `normalized`
+
+    @property
+    def has_emoji(self) -> bool:
+        return bool(self.spans)
+
+def _normalized_items(text: str):
+    normalized = _VS_ZW_RE.sub("", unicodedata.normalize("NFKC", text))
+    return normalized, tuple(_scan_emoji(normalized))
+
+def _repeat_runs(items) -> tuple:
+    runs = []; prev = None; count = 0
+    for kind, chunk in items:
+        if kind == "emoji" and chunk == prev:
+            count += 1
+            continue
+        if count > 1:
+            runs.append((prev, count))
+        prev, count = (chunk, 1) if kind == "emoji" else (None, 0)
+    if count > 1:
+        runs.append((prev, count))
+    return tuple(runs)
+
+def analyze_emoji(text: str) -> EmojiAnalysis:
+    """
+    Usage example:
+        a = analyze_emoji("LOL 😂😂")
+        a.has_emoji, a.spans, a.repeats  # -> True, ((4, 5, "😂"), (5, 6, "😂")), (("😂", 2),)
+        emoji_semantic_clean(a.text, analysis=a)
+    """
+    spans = tuple((start, start + len(chunk), chunk)
+                  for kind, chunk, start in _replace_emoji_tokens(text) if kind == "emoji")
+    normalized, items = _normalized_items(text)
+    return EmojiAnalysis(text=text, normalized=normalized, items=items, spans=spans,
+                         repeats=_repeat_runs(items))
 
 
 # ========== LLM path: JSON-only, no emojis in output ==========
@@ -280,19 +579,8 @@ Input:
 {text}
 """.strip()
 
-def emoji_to_meaning(client, text, model=MODEL) -> str:
-    """
-    Calls the LLM to produce JSON: {"response": "<no-emoji text>"}.
-    If there are no emojis, returns that JSON with the original text (LLM not called).
-    Guards against validator contamination (single '0'/'1' output).
-    Also post-sanitizes any accidental emojis the LLM might return.
-    """
-    # No-emoji short-circuit: skip the model entirely.
-    if not _has_emoji(text):
-        return json.dumps({"response": text})
-
-    resp = _create_chat_completion(
-        client,
+def _meaning_request(text: str, model: str) -> dict:
+    return dict(
         model=model,
         messages=[
             {"role": "system", "content": JSON_ONLY_SYSTEM},
@@ -303,6 +591,8 @@ def emoji_to_meaning(client, text, model=MODEL) -> str:
         # If your SDK supports JSON mode, uncomment:
         # response_format={"type": "json_object"},
     )
+
+def _meaning_from_response(resp, text: str) -> str:
     raw = resp.choices[0].message.content.strip()
 
     # Guard: if we somehow got a single '0'/'1' (wrong endpoint contamination), fallback to STANDARD-rendered words.
@@ -319,26 +609,72 @@ def emoji_to_meaning(client, text, model=MODEL) -> str:
         cand = _to_words_no_parens(raw if raw else text)
 
     # Ensure no emojis remain
-    if _has_emoji(cand):
-        cand = _to_words_no_parens(cand)
+    cand = _without_emojis(cand)
 
     return json.dumps({"response": cand})
 
+def _input_has_emoji(text: str, analysis: Optional[EmojiAnalysis]) -> bool:
+    return analysis.has_emoji if analysis is not None else _has_emoji(text)
+
+def emoji_to_meaning(client, text, model=MODEL, *, timeout: Optional[float] = None,
+                     analysis: Optional[EmojiAnalysis] = None) -> str:
+    """
+    Calls the LLM to produce JSON: {"response": "<no-emoji text>"}.
+    If there are no emojis, returns that JSON with the original text (LLM not called).
+    Guards against validator contamination (single '0'/'1' output).
+    Also post-sanitizes any accidental emojis the LLM might return.
+    """
+    # No-emoji short-circuit: skip the model entirely.
+    if not _input_has_emoji(text, analysis):
+        return json.dumps({"response": text})
+
+    resp = _create_chat_completion(client, **_meaning_request(text, model), **_timeout_kw(timeout))
+    return _meaning_from_response(resp, text)
+
+async def aemoji_to_meaning(client, text, model=MODEL, *, analysis: Optional[EmojiAnalysis] = None) -> str:
+    """Async twin of `emoji_to_meaning`."""
+    if not _input_has_emoji(text, analysis):
+        return json.dumps({"response": text})
+
+    resp = await _acreate_chat_completion(client, **_meaning_request(text, model))
+    return _meaning_from_response(resp, text)
+
 
 # ========== Parse LLM JSON safely ==========
 _RESPONSE_FIELD_RE = re.compile(r"^response:\s*(.*)$", re.IGNORECASE | re.MULTILINE)
+_CODE_FENCE_RE = re.compile(r"^\s*```[\w-]*\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+
+def _load_json_object(content: str):
+    """
+    Best-effort JSON decode of an LLM reply: strict first, then without code fences,
+    then the outermost {...} span (models like to add a sentence around the JSON).
+    Returns the decoded value, or raises ValueError if nothing decodes.
+    """
+    candidates = [content]
+    m = _CODE_FENCE_RE.match(content)
+    if m:
+        candidates.append(m.group(1))
+    start, end = content.find("{"), content.rfind("}")
+    if 0 <= start < end:
+        candidates.append(content[start:end + 1])
+    for cand in candidates:
+        try:
+            return json.loads(cand)
+        except (ValueError, TypeError):
+            continue
+    raise ValueError("no JSON object found")
 
 def parse_llm_demojify_output(content: str) -> str:
     if not content:
         return ""
-    # 1) strict JSON
+    # 1) JSON (strict, fenced, or embedded in chatter)
     try:
-        data = json.loads(content)
-        if isinstance(data, dict) and "response" in data:
+        data = _load_json_object(content)
+        if isinstance(data, dict) and data.get("response") is not None:
             out = str(data["response"])
         else:
             out = ""
-    except Exception:
+    except ValueError:
         # 2) Fallbacks if needed
         m = _RESPONSE_FIELD_RE.search(content)
         if m:
@@ -348,18 +684,18 @@ def parse_llm_demojify_output(content: str) -> str:
             out = lines[-1] if lines else ""
 
     # final safety: remove any emojis that slipped through
-    if _has_emoji(out):
-        out = _to_words_no_parens(out)
-    return out.strip()
+    return _without_emojis(out).strip()
 
 
 # ========== Validator (robust 0/1 extractor; synonym tolerant) ==========
+VALIDATOR_SYSTEM = (
+    "You are an evaluator that outputs EXACTLY one character: '1' or '0'. "
+    "Return '1' if the two texts below convey the same intended meaning; "
+    "return '0' if they do not or if you are uncertain. Do NOT add any other text."
+)
+
 def _build_validator_messages(standard_text: str, llm_text: str):
-    system = (
-        "You are an evaluator that outputs EXACTLY one character: '1' or '0'. "
-        "Return '1' if the two texts below convey the same intended meaning; "
-        "return '0' if they do not or if you are uncertain. Do NOT add any other text."
-    )
+    system = VALIDATOR_SYSTEM
     user = f"""
 Compare two demojified texts describing the same original message.
 
@@ -379,24 +715,32 @@ Return ONLY 1 or 0. No quotes, no spaces, no punctuation.
 """
     return system, user
 
-def _extract_verdict_char(s: str) -> Optional[int]:
+_VERDICT_WORDS = {"true": 1, "yes": 1, "false": 0, "no": 0}
+
+def _extract_verdict_char(s) -> Optional[int]:
     if s is None:
         return None
-    s = s.strip()
+    # JSON values (fused mode): true/false, 0/1
+    if isinstance(s, bool):
+        return int(s)
+    if isinstance(s, (int, float)):
+        return int(s) if s in (0, 1) else None
+    s = str(s).strip()
     if s in ("0", "1"):
         return int(s)
-    s = s.strip("`'\" \n\t\r")
+    s = s.strip("`'\" \n\t\r.!")
     if s in ("0", "1"):
         return int(s)
+    if s.lower() in _VERDICT_WORDS:
+        return _VERDICT_WORDS[s.lower()]
     m = re.search(r"(?:^|\D)([01])(?:\D|$)", s)
     if m:
         return int(m.group(1))
     return None
 
-def evaluate_consistency_zero_one(client, standard_text: str, llm_text: str, model: str = MODEL) -> Optional[int]:
+def _validator_request(standard_text: str, llm_text: str, model: str) -> dict:
     system, user = _build_validator_messages(standard_text, llm_text)
-    resp = _create_chat_completion(
-        client,
+    return dict(
         model=model,
         messages=[{"role": "system", "content": system},
                   {"role": "user", "content": user}],
@@ -404,10 +748,343 @@ def evaluate_consistency_zero_one(client, standard_text: str, llm_text: str, mod
         presence_penalty=0.0, frequency_penalty=0.0,
         # max_tokens=2,  # uncomment if supported
     )
+
+def evaluate_consistency_zero_one(client, standard_text: str, llm_text: str, model: str = MODEL,
+                                  *, timeout: Optional[float] = None,
+                                  analysis: Optional[EmojiAnalysis] = None) -> Optional[int]:
+    """
+    1 if the LLM text keeps the meaning of the standard text, 0 if not, None if the
+    reply is unreadable. With the input's `analysis` and no emoji in it, there is
+    nothing to interpret (the rewrite is the input itself): 1 without a model call.
+    """
+    if analysis is not None and not analysis.has_emoji:
+        return 1
+    resp = _create_chat_completion(client, **_validator_request(standard_text, llm_text, model), **_timeout_kw(timeout))
+    raw = resp.choices[0].message.content if resp and resp.choices else ""
+    return _extract_verdict_char(raw)
+
+async def aevaluate_consistency_zero_one(client, standard_text: str, llm_text: str, model: str = MODEL,
+                                         *, analysis: Optional[EmojiAnalysis] = None) -> Optional[int]:
+    """Async twin of `evaluate_consistency_zero_one`."""
+    if analysis is not None and not analysis.has_emoji:
+        return 1
+    resp = await _acreate_chat_completion(client, **_validator_request(standard_text, llm_text, model))
     raw = resp.choices[0].message.content if resp and resp.choices else ""
     return _extract_verdict_char(raw)
 
 
+# ========== Fused mode: rewrite + self-validate in one call ==========
+FUSED_SYSTEM = (
+    "Convert emoji-filled text into clear, plain English for someone who doesn’t understand emojis. Interpret emojis by context and rephrase naturally so the same meaning is conveyed. Keep important details like names and facts, use a neutral tone, and skip decorative or repeated emojis. "
+    "Then check your rewrite against the rule-based rendering you are given. "
+    "Output MUST be a single-line JSON object with exactly two keys: response and consistent. "
+    "Never include code fences or any extra text."
+)
+
+def _llm_user_prompt_fused(text: str, standard_text: str) -> str:
+  return f"""
+Rewrite the text so it means the same thing for someone who doesn’t understand emojis.
+Interpret emojis by context and express the full message naturally in plain English.
+- Don’t describe or name emojis.
+- Keep the tone and intent, but make it sound natural.
+- Skip redundant or decorative emojis.
+
+Then compare your rewrite with the STANDARD rendering below (emojis shown as "(meaning)").
+Set "consistent" to 1 if both convey the same intended meaning (minor rewordings and
+near-synonyms count as the same), or 0 if they differ, omit key intent, or you are unsure.
+
+Return strictly:
+{{"response":"<plain-language version with no emojis>","consistent":<1 or 0>}}
+
+[INPUT]
+{text}
+
+[STANDARD]
+{standard_text}
+""".strip()
+
+def _fused_request(text: str, standard_text: str, model: str) -> dict:
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": FUSED_SYSTEM},
+            {"role": "user", "content": _llm_user_prompt_fused(text, standard_text)},
+        ],
+        temperature=0.0, top_p=1.0,
+        presence_penalty=0.0, frequency_penalty=0.0,
+    )
+
+def parse_fused_output(content: str):
+    """(plain text, verdict) from a fused reply; verdict is None when the flag is missing or unreadable."""
+    text = parse_llm_demojify_output(content)
+    try:
+        data = _load_json_object(content or "")
+    except ValueError:
+        return text, None
+    if not isinstance(data, dict):
+        return text, None
+    return text, _extract_verdict_char(data.get("consistent"))
+
+def emoji_to_meaning_validated(client, text: str, standard_text: str, model: str = MODEL,
+                               *, timeout: Optional[float] = None) -> str:
+    """One LLM call returning the raw JSON {"response": ..., "consistent": 0|1}."""
+    resp = _create_chat_completion(client, **_fused_request(text, standard_text, model), **_timeout_kw(timeout))
+    return (resp.choices[0].message.content or "").strip()
+
+async def aemoji_to_meaning_validated(client, text: str, standard_text: str, model: str = MODEL) -> str:
+    """Async twin of `emoji_to_meaning_validated`."""
+    resp = await _acreate_chat_completion(client, **_fused_request(text, standard_text, model))
+    return (resp.choices[0].message.content or "").strip()
+
+
+# ========== Micro-batched prompts: several texts in one call ==========
+JSON_BATCH_SYSTEM = (
+    "Convert each emoji-filled text into clear, plain English for someone who doesn’t understand emojis. Interpret emojis by context and rephrase naturally so the same meaning is conveyed. Keep important details like names and facts, use a neutral tone, and skip decorative or repeated emojis. "
+    "Output MUST be a single-line JSON object with exactly one key: responses, an array holding one string per input, in input order. "
+    "Never include code fences or any extra text."
+)
+
+def _llm_user_prompt_batch(texts) -> str:
+  return f"""
+Rewrite each input so it means the same thing for someone who doesn’t understand emojis.
+Interpret emojis by context and express each message naturally in plain English.
+- Don’t describe or name emojis.
+- Keep the tone and intent, but make it sound natural.
+- Skip redundant or decorative emojis.
+- The inputs are unrelated; rewrite each one on its own.
+
+Return strictly (exactly {len(texts)} strings, same order as the inputs):
+{{"responses":["<plain-language version of input 1>", ...]}}
+
+Inputs (JSON array):
+{json.dumps(list(texts), ensure_ascii=False)}
+""".strip()
+
+def _meaning_batch_request(texts, model: str) -> dict:
+    return dict(
+        model=model,
+        messages=[
+            {"role": "system", "content": JSON_BATCH_SYSTEM},
+            {"role": "user", "content": _llm_user_prompt_batch(texts)},
+        ],
+        temperature=0.0, top_p=1.0,
+        presence_penalty=0.0, frequency_penalty=0.0,
+    )
+
+def _load_json_list(content: str, key: str, n: int) -> list:
+    """A JSON array of length `n`, bare or under `key`; ValueError otherwise."""
+    content = (content or "").strip()
+    try:
+        data = json.loads(content)
+    except ValueError:
+        data = _load_json_object(content)
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list) or len(data) != n:
+        raise ValueError(f"expected a JSON array of {n} items")
+    return data
+
+def parse_llm_batch_output(content: str, n: int, texts: Optional[list] = None) -> list:
+    """
+    Per-item JSON strings {"response": ...} (the `emoji_to_meaning` contract) from a
+    batched reply. Raises ValueError if the array is malformed or has the wrong length.
+    A bare '0'/'1' item (validator contamination) gets the same fallback as in
+    `emoji_to_meaning`: the input `texts[i]` rendered as words, or ValueError without `texts`.
+    """
+    out = []
+    for i, item in enumerate(_load_json_list(content, "responses", n)):
+        if isinstance(item, dict):
+            item = item.get("response")
+        if not isinstance(item, str):
+            raise ValueError("batch item is not a string")
+        if item.strip() in {"0", "1"}:
+            if texts is None:
+                raise ValueError("batch item is a bare verdict")
+            item = _to_words_no_parens(texts[i])
+        out.append(json.dumps({"response": _without_emojis(item)}))
+    return out
+
+def emoji_to_meaning_many(client, texts, model: str = MODEL, *, timeout: Optional[float] = None) -> list:
+    """One LLM call for several texts; same per-item output as `emoji_to_meaning`."""
+    resp = _create_chat_completion(client, **_meaning_batch_request(texts, model), **_timeout_kw(timeout))
+    return parse_llm_batch_output(resp.choices[0].message.content, len(texts), texts)
+
+async def aemoji_to_meaning_many(client, texts, model: str = MODEL) -> list:
+    """Async twin of `emoji_to_meaning_many`."""
+    resp = await _acreate_chat_completion(client, **_meaning_batch_request(texts, model))
+    return parse_llm_batch_output(resp.choices[0].message.content, len(texts), texts)
+
+VALIDATOR_BATCH_SYSTEM = (
+    "You are an evaluator. For each numbered pair, decide '1' if the two texts convey the same "
+    "intended meaning, or '0' if they do not or if you are uncertain. "
+    "Output MUST be a single-line JSON object with exactly one key: verdicts, an array of 1/0 "
+    "numbers, one per pair, in order. Never include code fences or any extra text."
+)
+
+def _validator_batch_request(pairs, model: str) -> dict:
+    system = VALIDATOR_BATCH_SYSTEM
+    blocks = "\n\n".join(
+        f"[PAIR {i}]\n[STANDARD TEXT]\n{standard_text}\n[LLM TEXT]\n{llm_text}"
+        for i, (standard_text, llm_text) in enumerate(pairs, 1)
+    )
+    user = f"""
+Compare each pair of demojified texts (each pair describes the same original message).
+
+Decision rule:
+- 1 if the LLM text and the standard text are semantically consistent.
+  Treat minor rewordings and near-synonyms as the SAME meaning
+  (e.g., "(kissing face with closed eyes)" ≈ "blowing a kiss").
+- 0 only if they differ in meaning, omit key intent, or you are unsure.
+
+Return strictly (exactly {len(pairs)} verdicts):
+{{"verdicts":[1,0,...]}}
+
+{blocks}
+""".strip()
+    return dict(
+        model=model,
+        messages=[{"role": "system", "content": system},
+                  {"role": "user", "content": user}],
+        temperature=0.0, top_p=1.0,
+        presence_penalty=0.0, frequency_penalty=0.0,
+    )
+
+def parse_validator_batch_output(content: str, n: int) -> list:
+    """Per-pair verdicts (1/0/None); ValueError if the array is malformed or has the wrong length."""
+    return [_extract_verdict_char(v) for v in _load_json_list(content, "verdicts", n)]
+
+def evaluate_consistency_many(client, pairs, model: str = MODEL, *, timeout: Optional[float] = None) -> list:
+    """One validator call for several (standard_text, llm_text) pairs."""
+    resp = _create_chat_completion(client, **_validator_batch_request(pairs, model), **_timeout_kw(timeout))
+    return parse_validator_batch_output(resp.choices[0].message.content, len(pairs))
+
+async def aevaluate_consistency_many(client, pairs, model: str = MODEL) -> list:
+    """Async twin of `evaluate_consistency_many`."""
+    resp = await _acreate_chat_completion(client, **_validator_batch_request(pairs, model))
+    return parse_validator_batch_output(resp.choices[0].message.content, len(pairs))
+
+
+# ========== Local pre-validator (skips the LLM validator when the answer is obvious) ==========
+_GATE_STOPWORDS = frozenset("""
+a an the and or but so to of in on at for with from by as is are was were be been am i im you your
+he she it its we they them this that thats these those my me our us his her their what whats just
+really very too also yes up out about like get got do does did have has had will would can
+""".split())
+# Negators are content: a rewrite that adds or drops one flips the meaning (apostrophes are
+# stripped before matching, so "don't" is "dont")
+_GATE_NEGATORS = frozenset("""
+not no never nothing nobody none nor neither without cant cannot dont doesnt didnt isnt arent wasnt
+werent wont wouldnt shouldnt couldnt havent hasnt hadnt aint
+""".split())
+_GATE_WORD_RE = re.compile(r"[^\W_]+")
+_GATE_REPEAT_RE = re.compile(r"(.)\1+")
+_GATE_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _gate_words(text: str) -> list:
+    """Content words, lowercased, letter runs squeezed ("soooo" -> "so") and crudely stemmed."""
+    out = []
+    for w in _GATE_WORD_RE.findall((text or "").replace("’", "").replace("'", "")):
+        w = _GATE_REPEAT_RE.sub(r"\1", w.lower())
+        if w in _GATE_STOPWORDS:
+            continue
+        for suf in _GATE_SUFFIXES:
+            if len(w) > len(suf) + 2 and w.endswith(suf):
+                w = w[: -len(suf)]
+                break
+        out.append(w)
+    return out
+
+
+_MEANING_FAMILIES = None
+
+def _meaning_families() -> dict:
+    """
+    normalized word -> family id, built only from the emoji meanings and their SYNONYMS
+    (e.g. lol / funny / hilarious / laughing end up in one family). Each meaning joins by its
+    head word ("laughing hard" -> "laugh"), so modifiers and the words of CLDR names
+    ("red heart", "united states") never link unrelated meanings.
+    """
+    global _MEANING_FAMILIES
+    if _MEANING_FAMILIES is None:
+        parent = {}
+        def find(w):
+            parent.setdefault(w, w)
+            while parent[w] != w:
+                parent[w] = parent[parent[w]]
+                w = parent[w]
+            return w
+        def union(words):
+            words = [w for w in words if w]
+            for w in words[1:]:
+                parent[find(w)] = find(words[0])
+        for meaning, syns in SYNONYMS.items():
+            union(_gate_words(meaning)[:1] + [w for s in syns for w in _gate_words(s)[:1]])
+        for meaning in EMOJI_MAP.values():
+            union(_gate_words(meaning)[:1])
+        _MEANING_FAMILIES = {w: find(w) for w in parent}
+    return _MEANING_FAMILIES
+
+
+@dataclass(frozen=True)
+class LocalGate:
+    """
+    Thresholds for `local_consistency`. Recall = share of the standard text's content words
+    the LLM text covers; precision = share of the LLM text's words the standard text explains.
+    An accept also needs every "(meaning)" of the standard text covered by the LLM text, so a
+    long sentence cannot drown out the emoji it was asked to interpret.
+    """
+    accept_recall: float = 0.8
+    accept_precision: float = 0.5
+    reject_overlap: float = 0.1     # reject when both recall and precision are at or below this
+    min_words_to_reject: int = 3    # short texts are too thin to reject locally
+
+
+_GATE_MEANING_RE = re.compile(r"\(([^()]*)\)")
+
+def _meanings_covered(standard_text: str, llm_text: str) -> bool:
+    """Whether the head word of every "(meaning)" in the standard text, or its family, is in the LLM text."""
+    fam = _meaning_families()
+    llm = set(_gate_words(llm_text))
+    llm_fams = {fam[w] for w in llm if w in fam}
+    for meaning in _GATE_MEANING_RE.findall(standard_text or ""):
+        head = _gate_words(meaning)[:1]
+        if head and head[0] not in llm and fam.get(head[0], head[0]) not in llm_fams:
+            return False
+    return True
+
+def _negations(text: str) -> int:
+    return sum(1 for w in _gate_words(text) if w in _GATE_NEGATORS)
+
+def consistency_scores(standard_text: str, llm_text: str):
+    """(recall, precision, standard word count) using word overlap plus meaning families."""
+    fam = _meaning_families()
+    std = _gate_words(standard_text)
+    llm = _gate_words(llm_text)
+    if not std or not llm:
+        return 0.0, 0.0, len(std)
+    def covered(words, other):
+        other_set = set(other)
+        other_fams = {fam[w] for w in other if w in fam}
+        return sum(1 for w in words if w in other_set or (w in fam and fam[w] in other_fams))
+    return covered(std, llm) / len(std), covered(llm, std) / len(llm), len(std)
+
+
+def local_consistency(standard_text: str, llm_text: str, gate: LocalGate = LocalGate()) -> Optional[int]:
+    """
+    1 = clearly the same meaning, 0 = clearly different, None = ambiguous (ask the LLM validator).
+    A rewrite with a different number of negators than the standard text is never accepted locally.
+    """
+    recall, precision, n_std = consistency_scores(standard_text, llm_text)
+    if (recall >= gate.accept_recall and precision >= gate.accept_precision
+            and _meanings_covered(standard_text, llm_text)
+            and _negations(standard_text) == _negations(llm_text)):
+        return 1
+    if n_std >= gate.min_words_to_reject and recall <= gate.reject_overlap and precision <= gate.reject_overlap:
+        return 0
+    return None
+
+
 # ========== Result dataclass ==========
 @dataclass
 class DemojifyResult:
@@ -415,54 +1092,139 @@ class DemojifyResult:
     source: str                 # "llm" or "standard"
     standard_text: str
     llm_text: Optional[str]
-    reason: str                 # e.g., "llm_valid", "validator_rejected", "validator_error", etc.
+    reason: str                 # e.g., "llm_valid", "validator_rejected", "validator_error", "local_accept", "chunked", etc.
+    timings: Optional[dict] = field(default=None, compare=False)  # stage -> ms, when requested
 
 
-# ========== Orchestrator ==========
-def demojify(text: str, client, *, model: str = MODEL) -> DemojifyResult:
-    print(f"\n=== DEMOJIFY START ===\nInput text: {text}\n")
+# ========== Deadlines ==========
+class DeadlineExceeded(TimeoutError):
+    """An LLM stage ran past its share of the request's latency budget."""
 
-    # STANDARD (parentheses)
-    standard_out = emoji_semantic_clean(text)
-    print(f"[STANDARD OUTPUT]\n{standard_out}\n")
 
-    # LLM (plain words or unchanged if no emojis)
-    try:
-        llm_raw = emoji_to_meaning(client, text, model=model)
-        print("[LLM RAW OUTPUT]")
-        print(llm_raw, "\n")
-        llm_out = parse_llm_demojify_output(llm_raw)
-        print(f"[LLM PARSED OUTPUT]\n{llm_out}\n")
-        if not llm_out.strip():
-            print("[ERROR] LLM output is empty or could not be parsed.")
-            return DemojifyResult(
-                final_text=standard_out, source="standard",
-                standard_text=standard_out, llm_text=None,
-                reason="llm_empty_output",
-            )
-    except Exception as e:
-        print("[ERROR] LLM call failed:", repr(e))
-        return DemojifyResult(
-            final_text=standard_out, source="standard",
-            standard_text=standard_out, llm_text=None,
-            reason=f"llm_error: {e}",
-        )
+class _Budget:
+    """
+    Total latency budget for one request. The rewrite may use at most `rewrite_share`
+    of it (the rest is reserved for the validator); the validator gets whatever is left.
+    """
 
-    # Validator (1 = same meaning, accept LLM)
+    def __init__(self, total: Optional[float], rewrite_share: float = 0.6):
+        self.total = total
+        self.rewrite_share = rewrite_share
+        self.end = None if total is None else time.monotonic() + total
+
+    def remaining(self) -> Optional[float]:
+        return None if self.end is None else max(0.0, self.end - time.monotonic())
+
+    def for_rewrite(self) -> Optional[float]:
+        left = self.remaining()
+        return None if left is None else min(left, self.total * self.rewrite_share)
+
+
+_DEADLINE_POOL = None
+
+def _call_with_timeout(fn, timeout: Optional[float], *args, **kwargs):
+    """
+    Sync calls cannot be interrupted, so they run on a helper thread that we stop waiting
+    for at the deadline; the SDK-level `timeout` we forward makes that thread finish soon after.
+    """
+    import concurrent.futures
+    global _DEADLINE_POOL
+    if timeout is None:
+        return fn(*args, **kwargs)
+    if timeout <= 0:
+        raise DeadlineExceeded("no budget left")
+    if _DEADLINE_POOL is None:
+        _DEADLINE_POOL = concurrent.futures.ThreadPoolExecutor(thread_name_prefix="demojify-deadline")
+    fut = _DEADLINE_POOL.submit(fn, *args, timeout=timeout, **kwargs)
     try:
-        verdict = evaluate_consistency_zero_one(client, standard_out, llm_out, model=model)
-        print(f"[VALIDATOR VERDICT] -> {verdict}\n")
-    except Exception as e:
-        print("[ERROR] Validator call failed:", repr(e))
-        verdict = None
+        return fut.result(timeout=timeout)
+    except concurrent.futures.TimeoutError:
+        fut.cancel()
+        raise DeadlineExceeded(f"exceeded {timeout:.3f}s") from None
+
+async def _await_with_timeout(aw, timeout: Optional[float]):
+    """Async counterpart: the awaited LLM call is cancelled at the deadline."""
+    import asyncio
+    if timeout is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, timeout=max(timeout, 0.0))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"exceeded {timeout:.3f}s") from None
 
-    print("[STANDARD]", standard_out)
-    print("[LLM RAW]", llm_raw)
-    print("[LLM PARSED]", llm_out)
-    print("[EVAL VERDICT]", verdict)
+
+# ========== Orchestrator ==========
+class _Stages:
+    """
+    Per-stage wall-clock timings in ms ("analyze", "standard", "llm", "parse", "validator"/"local_gate",
+    "total"; a chunked document has "analyze", "split", "chunks" and "total").
+    """
+    __slots__ = ("ms",)
+
+    def __init__(self):
+        self.ms = {}
+
+    def mark(self, stage: str, start: float) -> None:
+        self.ms[stage] = round((time.perf_counter() - start) * 1000.0, 3)
+
+
+class _NoStages:
+    __slots__ = ()
+
+    def mark(self, stage: str, start: float) -> None:
+        pass
+
+
+_NO_STAGES = _NoStages()
+
+def _finish(result: DemojifyResult, stages, start: float) -> DemojifyResult:
+    if stages is not _NO_STAGES:
+        stages.mark("total", start)
+        result.timings = stages.ms
+    log.debug("demojify done: source=%s reason=%s timings=%s", result.source, result.reason, result.timings)
+    return result
+
+def _parse_llm_stage(llm_raw: str, stages=_NO_STAGES) -> str:
+    t = time.perf_counter()
+    llm_out = parse_llm_demojify_output(llm_raw)
+    stages.mark("parse", t)
+    log.debug("LLM raw output: %r parsed: %r", llm_raw, llm_out)
+    return llm_out
+
+def _llm_failed(standard_out: str, e: Optional[Exception] = None) -> DemojifyResult:
+    if e is None:
+        log.warning("LLM output is empty or could not be parsed; using STANDARD output")
+        reason = "llm_empty_output"
+    else:
+        log.warning("LLM call failed; using STANDARD output: %r", e)
+        reason = f"llm_error: {e}"
+    return DemojifyResult(
+        final_text=standard_out, source="standard",
+        standard_text=standard_out, llm_text=None,
+        reason=reason,
+    )
+
+def _circuit_open(standard_out: str, llm_out: Optional[str] = None) -> DemojifyResult:
+    log.debug("LLM circuit breaker is open; using STANDARD output")
+    return DemojifyResult(
+        final_text=standard_out, source="standard",
+        standard_text=standard_out, llm_text=llm_out,
+        reason="circuit_open",
+    )
+
+def _deadline_exceeded(standard_out: str, llm_out: Optional[str] = None) -> DemojifyResult:
+    log.debug("deadline exceeded; using STANDARD output")
+    return DemojifyResult(
+        final_text=standard_out, source="standard",
+        standard_text=standard_out, llm_text=llm_out,
+        reason="deadline_exceeded",
+    )
+
+def _decide(standard_out: str, llm_out: str, verdict: Optional[int], *, local: bool = False) -> DemojifyResult:
+    log.debug("verdict=%s local=%s standard=%r llm=%r", verdict, local, standard_out, llm_out)
 
     if verdict is None:
-        print("[INFO] Validator failed or returned invalid response. Using STANDARD output.")
+        log.warning("validator failed or returned an invalid response; using STANDARD output")
         return DemojifyResult(
             final_text=standard_out, source="standard",
             standard_text=standard_out, llm_text=llm_out,
@@ -470,25 +1232,432 @@ def demojify(text: str, client, *, model: str = MODEL) -> DemojifyResult:
         )
 
     if verdict == 1:
-        print("[SUCCESS] LLM output validated successfully.")
-        print(f"→ Final Output: {llm_out}\n")
         return DemojifyResult(
             final_text=llm_out, source="llm",
             standard_text=standard_out, llm_text=llm_out,
-            reason="llm_valid",
+            reason="local_accept" if local else "llm_valid",
         )
 
-    print("[INFO] Validator rejected LLM output as semantically inconsistent.")
-    print("[DIAGNOSTIC] Standard vs LLM difference:")
-    print("→ Standard:", standard_out)
-    print("→ LLM:", llm_out)
     return DemojifyResult(
         final_text=standard_out, source="standard",
         standard_text=standard_out, llm_text=llm_out,
-        reason="validator_rejected",
+        reason="local_reject" if local else "validator_rejected",
     )
 
+def _fused_result(standard_out: str, llm_raw: str, stages=_NO_STAGES) -> DemojifyResult:
+    t = time.perf_counter()
+    llm_out, verdict = parse_fused_output(llm_raw)
+    stages.mark("parse", t)
+    log.debug("LLM raw output: %r parsed: %r", llm_raw, llm_out)
+    if not llm_out.strip():
+        return _llm_failed(standard_out)
+    return _decide(standard_out, llm_out, verdict)
+
+def _no_emoji(text: str) -> DemojifyResult:
+    # nothing to interpret: the input is its own plain-language version
+    out = text.strip()
+    log.debug("no emoji in input; skipping the rules engine and the LLM")
+    return DemojifyResult(final_text=out, source="standard", standard_text=out, llm_text=None, reason="no_emoji")
+
+def _learned_rule(text: str, phrase: str, analysis: EmojiAnalysis, stages) -> DemojifyResult:
+    t = time.perf_counter()
+    standard_out = emoji_semantic_clean(text, analysis=analysis)
+    stages.mark("standard", t)
+    log.debug("learned rule matched: %r", phrase)
+    return DemojifyResult(final_text=phrase, source="llm", standard_text=standard_out, llm_text=phrase,
+                          reason="learned_rule")
+
+def _learn(learned, analysis: EmojiAnalysis, result: DemojifyResult) -> DemojifyResult:
+    if learned is not None and result.reason == "llm_valid":
+        learned.observe(analysis, result.final_text)
+    return result
+
+def _gate(standard_out: str, llm_out: str, prevalidate: LocalGate, stages) -> Optional[int]:
+    t = time.perf_counter()
+    verdict = local_consistency(standard_out, llm_out, prevalidate)
+    stages.mark("local_gate", t)
+    return verdict
+
+def demojify(text: str, client, *, model: str = MODEL, prevalidate: Optional[LocalGate] = None,
+             fused: bool = False, deadline: Optional[float] = None, rewrite_share: float = 0.6,
+             timings: bool = False, analysis: Optional[EmojiAnalysis] = None, learned=None,
+             chunk_chars: Optional[int] = None, chunk_concurrency: int = 8) -> DemojifyResult:
+    """
+    STANDARD + LLM + validator. With `prevalidate`, `local_consistency` decides clear
+    matches/mismatches and the LLM validator only sees ambiguous cases. With `fused`,
+    one LLM call returns both the rewrite and its consistency flag.
+    `deadline` (seconds) bounds the whole call: past it, the STANDARD output is
+    returned with reason "deadline_exceeded". With `timings`, per-stage wall-clock
+    times (ms) are attached as `result.timings`.
+    The input is scanned once (`analyze_emoji`, or the `analysis` passed in) and the
+    stages share that scan; a text without emojis is returned as is, with reason
+    "no_emoji", without running any stage.
+    With `learned` (see demojify_learned.LearnedPhrases), validated rewrites are
+    recorded, and inputs matching a promoted one are answered without the LLM
+    (reason "learned_rule").
+    With `chunk_chars`, a longer input is cut into paragraph/sentence chunks
+    (`split_chunks`). Chunks with emojis go through the pipeline concurrently (at most
+    `chunk_concurrency` at a time, each with its own fallback), the others are kept as
+    they are, and the outputs are put back in the original layout (reason "chunked").
+    """
+    start = time.perf_counter()
+    stages = _Stages() if timings else _NO_STAGES
+    analysis = _analyze_stage(text, analysis, stages)
+    budget = _Budget(deadline, rewrite_share)
+    chunks = _split_stage(text, analysis, chunk_chars, stages)
+    if chunks is not None:
+        result = _demojify_chunks(text, chunks, client, model, prevalidate, fused, budget, stages, analysis,
+                                  learned, chunk_concurrency)
+    else:
+        result = _demojify(text, client, model, prevalidate, fused, budget, stages, analysis, learned)
+    return _finish(_learn(learned, analysis, result), stages, start)
+
+def _analyze_stage(text: str, analysis: Optional[EmojiAnalysis], stages) -> EmojiAnalysis:
+    if analysis is None:
+        t = time.perf_counter()
+        analysis = analyze_emoji(text)
+        stages.mark("analyze", t)
+    return analysis
+
+def _demojify(text, client, model, prevalidate, fused, budget, stages, analysis, learned=None) -> DemojifyResult:
+    log.debug("demojify start: %r", text)
+    if not analysis.has_emoji:
+        return _no_emoji(text)
+    phrase = learned.lookup(analysis) if learned is not None else None
+    if phrase is not None:
+        return _learned_rule(text, phrase, analysis, stages)
 
+    # STANDARD (parentheses)
+    t = time.perf_counter()
+    standard_out = emoji_semantic_clean(text, analysis=analysis)
+    stages.mark("standard", t)
+
+    if fused:
+        t = time.perf_counter()
+        try:
+            llm_raw = _call_with_timeout(emoji_to_meaning_validated, budget.remaining(),
+                                         client, text, standard_out, model=model)
+        except CircuitOpenError:
+            return _circuit_open(standard_out)
+        except DeadlineExceeded:
+            return _deadline_exceeded(standard_out)
+        except Exception as e:
+            return _llm_failed(standard_out, e)
+        finally:
+            stages.mark("llm", t)
+        return _fused_result(standard_out, llm_raw, stages)
 
+    # LLM (plain words or unchanged if no emojis)
+    t = time.perf_counter()
+    try:
+        llm_raw = _call_with_timeout(emoji_to_meaning, budget.for_rewrite(), client, text, model=model,
+                                     analysis=analysis)
+        stages.mark("llm", t)
+        llm_out = _parse_llm_stage(llm_raw, stages)
+        if not llm_out.strip():
+            return _llm_failed(standard_out)
+    except CircuitOpenError:
+        return _circuit_open(standard_out)
+    except DeadlineExceeded:
+        stages.mark("llm", t)
+        return _deadline_exceeded(standard_out)
+    except Exception as e:
+        return _llm_failed(standard_out, e)
 
+    # Local gate first: only ambiguous cases pay for the LLM validator
+    if prevalidate is not None:
+        verdict = _gate(standard_out, llm_out, prevalidate, stages)
+        if verdict is not None:
+            return _decide(standard_out, llm_out, verdict, local=True)
 
+    # Validator (1 = same meaning, accept LLM)
+    t = time.perf_counter()
+    try:
+        verdict = _call_with_timeout(evaluate_consistency_zero_one, budget.remaining(),
+                                     client, standard_out, llm_out, model=model, analysis=analysis)
+    except CircuitOpenError:
+        return _circuit_open(standard_out, llm_out)
+    except DeadlineExceeded:
+        return _deadline_exceeded(standard_out, llm_out)
+    except Exception as e:
+        log.warning("validator call failed: %r", e)
+        verdict = None
+    finally:
+        stages.mark("validator", t)
+
+    return _decide(standard_out, llm_out, verdict)
+
+async def ademojify(text: str, client, *, model: str = MODEL, prevalidate: Optional[LocalGate] = None,
+                    fused: bool = False, deadline: Optional[float] = None, rewrite_share: float = 0.6,
+                    batcher=None, timings: bool = False, analysis: Optional[EmojiAnalysis] = None,
+                    learned=None, chunk_chars: Optional[int] = None, chunk_concurrency: int = 8) -> DemojifyResult:
+    """
+    Async twin of `demojify`. The LLM request is started first and the STANDARD
+    cleaner runs while it is in flight, so the rules path adds no latency.
+    LLM calls still running at the deadline are cancelled.
+    With a `batcher` (see demojify_batcher.LLMBatcher), the rewrite and validator
+    calls are micro-batched with other requests in flight (fused calls are not).
+    With `chunk_chars` (see `demojify`), the chunks of a long input are converted as
+    concurrent tasks, so its latency follows the slowest chunk, not the document size.
+    """
+    start = time.perf_counter()
+    stages = _Stages() if timings else _NO_STAGES
+    analysis = _analyze_stage(text, analysis, stages)
+    budget = _Budget(deadline, rewrite_share)
+    chunks = _split_stage(text, analysis, chunk_chars, stages)
+    if chunks is not None:
+        result = await _ademojify_chunks(text, chunks, client, model, prevalidate, fused, budget, batcher,
+                                         stages, analysis, learned, chunk_concurrency)
+    else:
+        result = await _ademojify(text, client, model, prevalidate, fused, budget, batcher, stages, analysis,
+                                  learned)
+    return _finish(_learn(learned, analysis, result), stages, start)
+
+async def _ademojify(text, client, model, prevalidate, fused, budget, batcher, stages, analysis,
+                     learned=None) -> DemojifyResult:
+    import asyncio
+    log.debug("demojify start: %r", text)
+    if not analysis.has_emoji:
+        return _no_emoji(text)
+    phrase = learned.lookup(analysis) if learned is not None else None
+    if phrase is not None:
+        return _learned_rule(text, phrase, analysis, stages)
+
+    if fused:
+        # the fused prompt embeds the standard rendering, so it cannot start earlier
+        t = time.perf_counter()
+        standard_out = emoji_semantic_clean(text, analysis=analysis)
+        stages.mark("standard", t)
+        t = time.perf_counter()
+        try:
+            llm_raw = await _await_with_timeout(
+                aemoji_to_meaning_validated(client, text, standard_out, model=model), budget.remaining())
+        except CircuitOpenError:
+            return _circuit_open(standard_out)
+        except DeadlineExceeded:
+            return _deadline_exceeded(standard_out)
+        except Exception as e:
+            return _llm_failed(standard_out, e)
+        finally:
+            stages.mark("llm", t)
+        return _fused_result(standard_out, llm_raw, stages)
+
+    # "llm" is measured from the request going out, so it overlaps "standard"
+    t_llm = time.perf_counter()
+    if batcher is not None:
+        llm_task = asyncio.ensure_future(batcher.meaning(text, analysis=analysis))
+    else:
+        llm_task = asyncio.ensure_future(aemoji_to_meaning(client, text, model=model, analysis=analysis))
+    await asyncio.sleep(0)  # let the request go out before doing CPU work
+
+    # STANDARD (parentheses)
+    t = time.perf_counter()
+    try:
+        standard_out = emoji_semantic_clean(text, analysis=analysis)
+    except BaseException:
+        llm_task.cancel()
+        raise
+    stages.mark("standard", t)
+
+    # LLM (plain words or unchanged if no emojis)
+    try:
+        llm_raw = await _await_with_timeout(llm_task, budget.for_rewrite())
+        stages.mark("llm", t_llm)
+        llm_out = _parse_llm_stage(llm_raw, stages)
+        if not llm_out.strip():
+            return _llm_failed(standard_out)
+    except CircuitOpenError:
+        return _circuit_open(standard_out)
+    except DeadlineExceeded:
+        stages.mark("llm", t_llm)
+        return _deadline_exceeded(standard_out)
+    except Exception as e:
+        return _llm_failed(standard_out, e)
+
+    # Local gate first: only ambiguous cases pay for the LLM validator
+    if prevalidate is not None:
+        verdict = _gate(standard_out, llm_out, prevalidate, stages)
+        if verdict is not None:
+            return _decide(standard_out, llm_out, verdict, local=True)
+
+    # Validator (1 = same meaning, accept LLM)
+    t = time.perf_counter()
+    try:
+        if batcher is not None:
+            check = batcher.validate(standard_out, llm_out)
+        else:
+            check = aevaluate_consistency_zero_one(client, standard_out, llm_out, model=model, analysis=analysis)
+        verdict = await _await_with_timeout(check, budget.remaining())
+    except CircuitOpenError:
+        return _circuit_open(standard_out, llm_out)
+    except DeadlineExceeded:
+        return _deadline_exceeded(standard_out, llm_out)
+    except Exception as e:
+        log.warning("validator call failed: %r", e)
+        verdict = None
+    finally:
+        stages.mark("validator", t)
+
+    return _decide(standard_out, llm_out, verdict)
+
+
+# ========== Long documents: split into chunks, converted concurrently ==========
+_PARAGRAPH_BREAK_RE = re.compile(r"[ \t]*\n(?:[ \t]*\n)+\s*")
+_SENTENCE_BREAK_RE = re.compile(r"(?<=[.!?\u2026])[\"')\]\u201d\u2019]*(\s+)")
+_SETTLED_REASONS = frozenset({"llm_valid", "validator_rejected", "local_accept", "local_reject",
+                              "no_emoji", "learned_rule"})
+
+def _skip_space(text: str, j: int, hi: int) -> int:
+    while j < hi and text[j].isspace():
+        j += 1
+    return j
+
+def _sentence_breaks(text: str, lo: int, hi: int, emoji_ends: dict) -> list:
+    """(start, end) of the whitespace after each sentence in text[lo:hi]; emojis closing a sentence stay with it."""
+    breaks = []
+    for m in _SENTENCE_BREAK_RE.finditer(text, lo, hi):
+        s, e = m.span(1)
+        if e in emoji_ends:
+            # "Great job! 🎉 🎉 See you": cut after the emoji run, not before it
+            j = e
+            while j in emoji_ends or _skip_space(text, j, hi) in emoji_ends:
+                j = emoji_ends.get(j) or _skip_space(text, j, hi)
+            s, e = j, _skip_space(text, j, hi)
+        if s < e < hi and (not breaks or s > breaks[-1][1]):
+            breaks.append((s, e))
+    return breaks
+
+def split_chunks(text: str, max_chars: int, analysis: Optional[EmojiAnalysis] = None) -> list:
+    """
+    (start, end) spans of the chunks of `text`; what lies between them is layout, kept as is.
+    Paragraphs (blank-line separated) are always separate chunks. A paragraph longer than
+    `max_chars` is cut at sentence ends into chunks of at most `max_chars` where it can be
+    (a longer sentence stays whole). Cuts never fall inside or before a sentence's emojis.
+
+    Usage example:
+        split_chunks("Hi 👋. Bye!\n\nSee you 🙂", 8)  # -> [(0, 5), (6, 10), (12, 21)]
+    """
+    emoji_ends = {start: end for start, end, _ in (analysis or analyze_emoji(text)).spans}
+    paragraphs, pos = [], 0
+    for m in _PARAGRAPH_BREAK_RE.finditer(text):
+        paragraphs.append((pos, m.start()))
+        pos = m.end()
+    paragraphs.append((pos, len(text)))
+
+    chunks = []
+    for lo, hi in paragraphs:
+        lo = _skip_space(text, lo, hi)
+        while hi > lo and text[hi - 1].isspace():
+            hi -= 1
+        if lo == hi:
+            continue
+        start, last = lo, None
+        if hi - lo > max_chars:
+            for brk in _sentence_breaks(text, lo, hi, emoji_ends):
+                if brk[0] - start > max_chars and last is not None:
+                    chunks.append((start, last[0]))
+                    start = last[1]
+                last = brk
+            if hi - start > max_chars and last is not None:
+                chunks.append((start, last[0]))
+                start = last[1]
+        chunks.append((start, hi))
+    return chunks
+
+def _chunk_has_emoji(spans, start: int, end: int) -> bool:
+    return any(start <= s < end for s, _, _ in spans)
+
+def _stitch(text: str, chunks, results) -> DemojifyResult:
+    """Chunk results put back in the document's layout; one DemojifyResult for the whole text."""
+    def join(pick):
+        out, pos = [], 0
+        for (start, end), res in zip(chunks, results):
+            out.append(text[pos:start])
+            out.append(pick(res))
+            pos = end
+        out.append(text[pos:])
+        return "".join(out).strip()
+
+    unsettled = [r.reason for r in results if r.reason not in _SETTLED_REASONS]
+    has_llm = any(r.llm_text is not None for r in results)
+    log.debug("chunked: %d chunks, reasons=%s", len(results), [r.reason for r in results])
+    return DemojifyResult(
+        final_text=join(lambda r: r.final_text),
+        source="llm" if any(r.source == "llm" for r in results) else "standard",
+        standard_text=join(lambda r: r.standard_text),
+        llm_text=join(lambda r: r.llm_text if r.llm_text is not None else r.final_text) if has_llm else None,
+        # a chunk that fell back for a transient reason (error, deadline, ...) makes the whole result transient
+        reason="chunked" if not unsettled else f"chunked: {unsettled[0]}",
+    )
+
+def _split_stage(text: str, analysis: EmojiAnalysis, chunk_chars: Optional[int], stages) -> Optional[list]:
+    """The chunks of a long input, or None when it is converted as one unit."""
+    if not chunk_chars or len(text) <= chunk_chars or not analysis.has_emoji:
+        return None
+    t = time.perf_counter()
+    chunks = split_chunks(text, chunk_chars, analysis)
+    stages.mark("split", t)
+    return chunks if len(chunks) > 1 else None
+
+def chunk_chains(text: str, chunk_chars: Optional[int], concurrency: int = 8,
+                 analysis: Optional[EmojiAnalysis] = None) -> int:
+    """
+    LLM chains `ademojify(text, ..., chunk_chars=, chunk_concurrency=concurrency)` runs at
+    once: 1 unless the input is chunked, else its chunks with emojis, up to `concurrency`.
+    """
+    analysis = analysis or analyze_emoji(text)
+    chunks = _split_stage(text, analysis, chunk_chars, _NO_STAGES)
+    if chunks is None:
+        return 1
+    with_emoji = sum(_chunk_has_emoji(analysis.spans, s, e) for s, e in chunks)
+    return max(1, min(with_emoji, max(1, concurrency)))
+
+def _plain_chunk(piece: str) -> DemojifyResult:
+    return DemojifyResult(final_text=piece, source="standard", standard_text=piece, llm_text=None,
+                          reason="no_emoji")
+
+def _demojify_chunks(text, chunks, client, model, prevalidate, fused, budget, stages, analysis, learned,
+                     concurrency: int) -> DemojifyResult:
+    def one(span):
+        piece = text[span[0]:span[1]]
+        a = analyze_emoji(piece)
+        return _learn(learned, a, _demojify(piece, client, model, prevalidate, fused, budget, _NO_STAGES, a,
+                                            learned))
+
+    import concurrent.futures
+    results = [None if _chunk_has_emoji(analysis.spans, s, e) else _plain_chunk(text[s:e]) for s, e in chunks]
+    todo = [i for i, r in enumerate(results) if r is None]
+    t = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(todo) or 1)),
+                                               thread_name_prefix="demojify-chunk") as pool:
+        for i, res in zip(todo, pool.map(one, [chunks[i] for i in todo])):
+            results[i] = res
+    stages.mark("chunks", t)
+    return _stitch(text, chunks, results)
+
+async def _ademojify_chunks(text, chunks, client, model, prevalidate, fused, budget, batcher, stages, analysis,
+                            learned, concurrency: int) -> DemojifyResult:
+    import asyncio
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(span):
+        piece = text[span[0]:span[1]]
+        async with limit:
+            a = analyze_emoji(piece)
+            res = await _ademojify(piece, client, model, prevalidate, fused, budget, batcher, _NO_STAGES, a,
+                                   learned)
+        return _learn(learned, a, res)
+
+    results = [None if _chunk_has_emoji(analysis.spans, s, e) else _plain_chunk(text[s:e]) for s, e in chunks]
+    todo = [i for i, r in enumerate(results) if r is None]
+    t = time.perf_counter()
+    for i, res in zip(todo, await asyncio.gather(*(one(chunks[i]) for i in todo))):
+        results[i] = res
+    stages.mark("chunks", t)
+    return _stitch(text, chunks, results)
+
+
+if __name__ == "__main__":
+    import sys
+    from demojify_cli import main as _cli_main
+    sys.exit(_cli_main())
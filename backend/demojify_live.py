@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental conversion for as-you-type frontends.
+
+A live client sends the whole text on every pause, but usually only one sentence
+has changed. LiveSessions splits the text into sentence segments
+(`split_chunks(text, 0)`: every sentence end is a cut, and paragraphs stay apart).
+It keeps, per session, the results of the segments already converted, keyed by a
+hash of (mode, segment text). Only segments not seen before run through the
+pipeline, concurrently, so the cost of a reconversion follows the size of the edit,
+not the size of the document. The outputs are stitched back into the text's layout.
+Each segment is reported with its offsets in the output and `changed`, which is
+True when the segment was not part of the session's earlier texts. In "standard"
+mode every segment goes through `run` (the STANDARD cleaner rewrites more than
+emojis); in the LLM modes, segments without emojis are passed through as they are.
+
+Results with a transient outcome (LLM error, deadline, ...) are not kept, so those
+segments are tried again on the next call. Each session holds at most
+`max_segments` results (least recently used evicted first). At most `max_sessions`
+sessions are kept, and a session idle for `ttl_s` seconds is dropped.
+
+Usage example:
+    live = LiveSessions(max_sessions=1000, ttl_s=1800)
+    session = live.get(session_id)            # None or unknown -> a new session with a fresh id
+    res = await live.convert(session, text, lambda seg: ademojify(seg, client), mode="auto")
+    res.output, res.segments, res.converted
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import demojify_lib as lib
+
+# Outcomes that are a property of the segment's text, kept in the session
+KEEP_REASONS = lib._SETTLED_REASONS | {"rules_only"}
+
+
+def segment_key(segment: str, mode: str) -> str:
+    return hashlib.blake2b(f"{mode}\0{segment}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class LiveSegment:
+    start: int      # offsets into LiveResult.output, in code points
+    end: int
+    changed: bool   # not in any earlier text of the session
+    source: str
+    reason: str
+
+
+@dataclass
+class LiveResult:
+    session_id: str
+    output: str
+    source: str     # "llm" if any segment's output came from the LLM
+    segments: list  # LiveSegment per segment, in order
+    converted: int  # segments that ran through the pipeline on this call
+    reused: int     # segments answered from the session
+
+
+class LiveSession:
+    def __init__(self, session_id: str, max_segments: int):
+        self.session_id = session_id
+        self.max_segments = max_segments
+        self.results = OrderedDict()  # segment_key -> DemojifyResult
+        self.last_used = 0.0
+
+    def get(self, key: str) -> Optional[lib.DemojifyResult]:
+        res = self.results.get(key)
+        if res is not None:
+            self.results.move_to_end(key)
+        return res
+
+    def put(self, key: str, result: lib.DemojifyResult) -> None:
+        if result.reason not in KEEP_REASONS or self.max_segments <= 0:
+            return
+        self.results[key] = result
+        self.results.move_to_end(key)
+        while len(self.results) > self.max_segments:
+            self.results.popitem(last=False)
+
+
+class LiveSessions:
+    def __init__(self, max_sessions: int = 1000, ttl_s: float = 1800.0, max_segments: int = 256, *,
+                 clock=time.monotonic):
+        self.max_sessions = max(1, max_sessions)
+        self.ttl_s = ttl_s
+        self.max_segments = max_segments
+        self._clock = clock
+        self._sessions = OrderedDict()  # session_id -> LiveSession
+        self._lock = threading.Lock()
+        self.conversions = 0
+        self.segments_converted = 0
+        self.segments_reused = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, session_id: Optional[str] = None) -> LiveSession:
+        """
+        The session `session_id`, or a new one if it is unknown or expired. A new session
+        always gets a fresh server-minted id, so a client cannot pick (or guess) another's.
+        """
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is None:
+                session = LiveSession(uuid.uuid4().hex, self.max_segments)
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evicted += 1
+            self._sessions.move_to_end(session.session_id)
+            session.last_used = now
+            return session
+
+    def _expire(self, now: float) -> None:
+        if self.ttl_s is None:
+            return
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_used <= self.ttl_s:
+                break
+            self._sessions.popitem(last=False)
+            self.expired += 1
+
+    async def convert(self, session: LiveSession, text: str, run, *, mode: str = "auto",
+                      concurrency: int = 8) -> LiveResult:
+        """
+        `run(segment)` -> awaitable DemojifyResult, called for the segments not seen before
+        (only those with emojis, unless `mode` is "standard").
+        """
+        text = text.strip()
+        analysis = lib.analyze_emoji(text)
+        spans = lib.split_chunks(text, 0, analysis)
+        keys = [segment_key(text[s:e], mode) for s, e in spans]
+        results = [session.get(k) for k in keys]
+        changed = [r is None for r in results]
+        todo = {}  # segment_key -> index of its first occurrence; repeated sentences run once
+        for i, (s, e) in enumerate(spans):
+            if results[i] is not None or keys[i] in todo:
+                continue
+            if mode == "standard" or lib._chunk_has_emoji(analysis.spans, s, e):
+                todo[keys[i]] = i
+            else:
+                results[i] = lib._plain_chunk(text[s:e])
+                session.put(keys[i], results[i])
+
+        limit = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(i):
+            async with limit:
+                res = await run(text[spans[i][0]:spans[i][1]])
+            session.put(keys[i], res)
+            return res
+
+        done = dict(zip(todo, await asyncio.gather(*(one(i) for i in todo.values()))))
+        results = [res if res is not None else done[k] for res, k in zip(results, keys)]
+
+        out, segments, pos, length = [], [], 0, 0
+        for (s, e), res, new in zip(spans, results, changed):
+            start = length + (s - pos)
+            out += (text[pos:s], res.final_text)
+            length = start + len(res.final_text)
+            segments.append(LiveSegment(start=start, end=length, changed=new, source=res.source,
+                                        reason=res.reason))
+            pos = e
+        out.append(text[pos:])
+        self.conversions += 1
+        self.segments_converted += len(todo)
+        self.segments_reused += len(spans) - sum(changed)
+        return LiveResult(session_id=session.session_id, output="".join(out),
+                          source="llm" if any(r.source == "llm" for r in results) else "standard",
+                          segments=segments, converted=len(todo), reused=len(spans) - sum(changed))
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._expire(self._clock())
+            return {"sessions": len(self._sessions), "max_sessions": self.max_sessions,
+                    "conversions": self.conversions, "segments_converted": self.segments_converted,
+                    "segments_reused": self.segments_reused, "expired": self.expired, "evicted": self.evicted}
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus-style metrics for the demojify service (text exposition format, no
+client library needed).
+
+- Requests by `source`/`reason` (reason without the error detail, so labels stay bounded).
+- Latency histograms for the pipeline stages: emoji_semantic_clean, emoji_to_meaning,
+  evaluate_consistency_zero_one (fed from `DemojifyResult.timings`).
+- Per LLM call: latency, outcome, and prompt/completion tokens from the response `usage`.
+- Validator accept rate (LLM and local-gate verdicts), counted once per pipeline
+  execution (`observe_verdict`), not per response: cache hits and coalesced
+  callers reuse a verdict, they do not make one.
+- Extra gauges (cache, breaker, admission queue) registered as callbacks.
+
+Usage example:
+    metrics = PipelineMetrics()
+    client = MeteredClient(AsyncOpenAI(...), metrics)
+    res = await ademojify(text, client, timings=True)
+    metrics.observe_verdict(res)              # where the pipeline ran
+    metrics.observe_result(res)               # for every response served
+    metrics.observe_stages(res.timings)
+    body = metrics.render()
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import demojify_lib as lib
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# `DemojifyResult.timings` keys -> the function each stage stands for
+STAGE_NAMES = {
+    "analyze": "analyze_emoji",
+    "split": "split_chunks",
+    "chunks": "demojify_chunks",
+    "standard": "emoji_semantic_clean",
+    "llm": "emoji_to_meaning",
+    "parse": "parse_llm_demojify_output",
+    "local_gate": "local_consistency",
+    "validator": "evaluate_consistency_zero_one",
+    "total": "demojify",
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _num(v) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(v)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels[n] for n in self.labelnames))
+        return series[-1] if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, series):
+                    cumulative += n
+                    le = 'le="%s"' % _num(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_num(series[-2])}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from `fn()`: a number, or a {label value tuple: number} dict."""
+
+    def __init__(self, name: str, help: str, fn, labelnames=()):
+        self.name, self.help, self.fn, self.labelnames = name, help, fn, tuple(labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        value = self.fn()
+        if isinstance(value, dict):
+            for key, v in sorted(value.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_num(v)}")
+        elif value is not None:
+            lines.append(f"{self.name} {_num(value)}")
+        return lines
+
+
+class PipelineMetrics:
+    """All service metrics; `render()` returns the Prometheus text format."""
+
+    def __init__(self, namespace: str = "demojify"):
+        ns = namespace
+        self.requests = Counter(f"{ns}_requests_total", "Conversions by outcome.", ("source", "reason"))
+        self.stage_seconds = Histogram(f"{ns}_stage_seconds", "Pipeline stage latency.", ("stage",))
+        self.llm_calls = Counter(f"{ns}_llm_calls_total", "LLM calls by prompt kind and outcome.", ("call", "outcome"))
+        self.llm_seconds = Histogram(f"{ns}_llm_call_seconds", "LLM call latency.", ("call",))
+        self.tokens = Counter(f"{ns}_llm_tokens_total", "LLM tokens from the response usage.", ("call", "type"))
+        self.verdicts = Counter(f"{ns}_validator_verdicts_total", "Validator verdicts.", ("validator", "verdict"))
+        self._metrics = [self.requests, self.stage_seconds, self.llm_calls, self.llm_seconds, self.tokens,
+                         self.verdicts,
+                         Gauge(f"{ns}_validator_accept_ratio", "Accepted / (accepted + rejected) verdicts.",
+                               self.validator_accept_rate)]
+
+    def add_gauge(self, name: str, help: str, fn, labelnames=()) -> None:
+        self._metrics.append(Gauge(name, help, fn, labelnames))
+
+    # ---- pipeline outcomes ----
+    _VERDICT_REASONS = {
+        "llm_valid": ("llm", "accept"), "validator_rejected": ("llm", "reject"),
+        "local_accept": ("local", "accept"), "local_reject": ("local", "reject"),
+    }
+
+    def observe_result(self, result) -> None:
+        """One response served (whether computed, cached or shared)."""
+        self.requests.inc(source=result.source, reason=result.reason.split(":", 1)[0])
+
+    def observe_verdict(self, result) -> None:
+        """The verdict of one pipeline execution that produced `result`, if it made one."""
+        verdict = self._VERDICT_REASONS.get(result.reason.split(":", 1)[0])
+        if verdict is not None:
+            self.verdicts.inc(validator=verdict[0], verdict=verdict[1])
+
+    def observe_stages(self, timings) -> None:
+        for stage, ms in (timings or {}).items():
+            self.stage_seconds.observe(ms / 1000.0, stage=STAGE_NAMES.get(stage, stage))
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.observe(seconds, stage=stage)
+
+    def observe_llm_call(self, call: str, seconds: float, outcome: str, usage=None) -> None:
+        self.llm_calls.inc(call=call, outcome=outcome)
+        self.llm_seconds.observe(seconds, call=call)
+        if usage is None:
+            return
+        for kind in ("prompt_tokens", "completion_tokens"):
+            n = getattr(usage, kind, None)
+            if n is None and isinstance(usage, dict):
+                n = usage.get(kind)
+            if n:
+                self.tokens.inc(n, call=call, type=kind[:-len("_tokens")])
+
+    def validator_accept_rate(self):
+        accepted = sum(self.verdicts.value(validator=v, verdict="accept") for v in ("llm", "local"))
+        rejected = sum(self.verdicts.value(validator=v, verdict="reject") for v in ("llm", "local"))
+        return round(accepted / (accepted + rejected), 4) if accepted + rejected else None
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ---- LLM client instrumentation ----
+_CALL_KINDS = {
+    lib.JSON_ONLY_SYSTEM: "rewrite",
+    lib.JSON_BATCH_SYSTEM: "rewrite_batch",
+    lib.FUSED_SYSTEM: "fused",
+    lib.VALIDATOR_SYSTEM: "validator",
+    lib.VALIDATOR_BATCH_SYSTEM: "validator_batch",
+}
+
+
+def call_kind(messages) -> str:
+    try:
+        return _CALL_KINDS.get(messages[0]["content"], "other")
+    except (LookupError, TypeError):
+        return "other"
+
+
+class MeteredClient:
+    """
+    Proxy exposing `.chat.completions.create` like the wrapped client; records latency,
+    outcome and token usage of every call. Wrap it inside BreakerClient so calls the
+    breaker rejects are not counted as provider calls.
+    """
+
+    def __init__(self, client, metrics: PipelineMetrics):
+        self.client = client
+        self.metrics = metrics
+        create = lib._chat_create(client)
+        metered = self._async_create(create) if lib._is_async_callable(create) else self._sync_create(create)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=metered))
+
+    def _record(self, kwargs, start: float, outcome: str, resp=None) -> None:
+        self.metrics.observe_llm_call(call_kind(kwargs.get("messages")), time.perf_counter() - start,
+                                      outcome, getattr(resp, "usage", None))
+
+    def _sync_create(self, create):
+        def metered(**kwargs):
+            start = time.perf_counter()
+            try:
+                resp = create(**kwargs)
+            except Exception:
+                self._record(kwargs, start, "error")
+                raise
+            self._record(kwargs, start, "ok", resp)
+            return resp
+        return metered
+
+    def _async_create(self, create):
+        async def metered(**kwargs):
+            start = time.perf_counter()
+            try:
+                resp = await create(**kwargs)
+            except asyncio.CancelledError:
+                self._record(kwargs, start, "cancelled")
+                raise
+            except Exception:
+                self._record(kwargs, start, "error")
+                raise
+            self._record(kwargs, start, "ok", resp)
+            return resp
+        return metered
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+Process pool for the STANDARD path inside the server.
+
+emoji_semantic_clean is pure CPU and holds the GIL, so a large input run inline
+in the event loop delays every other request in the process. CleanPool sends
+large inputs to warm worker processes (rule tables and emoji tries are built by
+`warm_up` when each worker starts). Inputs shorter than `min_chars` stay inline,
+because for them pickling costs more than the work. Batches are split into
+chunks so they spread across cores. Workers are spawned, not forked: a fork of the
+server would copy its event loop, threads and held locks into every worker.
+
+Usage example:
+    pool = CleanPool(workers=4, min_chars=2000)
+    pool.start()                       # optional: spawn and warm the workers now
+    out = await pool.clean(text)
+    outs = await pool.clean_batch(texts)
+    pool.shutdown()
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import demojify_lib as lib
+
+
+class CleanPool:
+    def __init__(self, workers: int = 2, min_chars: int = 2000, chunk_size: int = 64, *, keep_case: bool = False):
+        self.workers = max(1, workers)
+        self.min_chars = min_chars
+        self.chunk_size = max(1, chunk_size)
+        self.keep_case = keep_case
+        self._executor = None
+        self._lock = threading.Lock()
+        self.inline = 0
+        self.offloaded = 0
+        self.chunks = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=lib.warm_up,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def start(self) -> None:
+        """Spawns and warms every worker now, so the first large request does not pay for it."""
+        pool = self._pool()
+        for f in [pool.submit(lib.warm_up) for _ in range(self.workers)]:
+            f.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+    async def clean(self, text: str) -> str:
+        if len(text) < self.min_chars:
+            self.inline += 1
+            return lib.emoji_semantic_clean(text, keep_case=self.keep_case)
+        self.offloaded += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), partial(lib.emoji_semantic_clean, text,
+                                                                keep_case=self.keep_case))
+
+    async def clean_batch(self, texts) -> list:
+        """Results in input order; small batches run inline, large ones in chunks across workers."""
+        texts = list(texts)
+        if sum(len(t) for t in texts) < self.min_chars:
+            self.inline += len(texts)
+            return lib.emoji_semantic_clean_batch(texts, keep_case=self.keep_case)
+        self.offloaded += len(texts)
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        fn = partial(lib.emoji_semantic_clean_batch, keep_case=self.keep_case)
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        self.chunks += len(chunks)
+        results = await asyncio.gather(*(loop.run_in_executor(pool, fn, chunk) for chunk in chunks))
+        return [out for chunk in results for out in chunk]
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "min_chars": self.min_chars, "chunk_size": self.chunk_size,
+                "started": self._executor is not None, "inline": self.inline,
+                "offloaded": self.offloaded, "chunks": self.chunks}
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Resilience wrappers for the LLM provider.
+
+- CircuitBreaker: closed -> open when the recent failure rate (errors and slow
+  calls) crosses a threshold; after a cooldown it goes half-open and lets a few
+  probe calls through; their outcome closes or re-opens it.
+- BreakerClient: wraps an OpenAI-style client so every chat completion goes
+  through the breaker. While open, calls fail fast with CircuitOpenError and the
+  demojify pipeline answers with the STANDARD output (reason "circuit_open")
+  instead of waiting on a degraded provider.
+- AdmissionController: caps concurrent LLM pipelines (a chunked document takes one
+  slot per chain it runs at once) and the number waiting for a slot; past that, work is shed (OverloadedError) rather than queued, and the
+  server answers with the STANDARD output (reason "shed_overload").
+
+Usage example:
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=10, open_s=30)
+    client = BreakerClient(AsyncOpenAI(...), breaker)
+    res = await ademojify(text, client, model=model)
+
+    admission = AdmissionController(max_in_flight=16, max_queue=64)
+    res = await admission.run(lambda: ademojify(text, client, model=model))
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+
+from demojify_lib import CircuitOpenError, _chat_create, _is_async_callable
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitBreaker:
+    """
+    Thread-safe breaker over a rolling time window of call outcomes.
+    A call counts as failed if it raised or took longer than `slow_call_s`.
+    """
+
+    def __init__(self, failure_rate: float = 0.5, min_calls: int = 10, window_s: float = 30.0,
+                 open_s: float = 30.0, half_open_probes: int = 3, slow_call_s: float = None,
+                 *, clock=time.monotonic):
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window_s = window_s
+        self.open_s = open_s
+        self.half_open_probes = max(1, half_open_probes)
+        self.slow_call_s = slow_call_s
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._outcomes = deque()  # (finished_at, failed)
+        self._probes_started = 0
+        self._probes_ok = 0
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. Half-open admits `half_open_probes` calls."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_started < self.half_open_probes:
+                self._probes_started += 1
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, ok: bool, latency_s: float = 0.0) -> None:
+        failed = not ok or (self.slow_call_s is not None and latency_s > self.slow_call_s)
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open()
+                else:
+                    self._probes_ok += 1
+                    if self._probes_ok >= self.half_open_probes:
+                        self._close()
+                return
+            if self._state == OPEN:
+                return  # a straggler from before the trip
+            now = self._clock()
+            self._outcomes.append((now, failed))
+            self._trim(now)
+            total = len(self._outcomes)
+            if total >= self.min_calls:
+                failures = sum(1 for _, f in self._outcomes if f)
+                if failures / total >= self.failure_rate:
+                    self._open()
+
+    def abandon(self, latency_s: float = 0.0) -> None:
+        """
+        A call cancelled by its caller (e.g. a request's own deadline): not a provider failure.
+        It only counts, as slow, if it already ran past `slow_call_s`; otherwise a half-open
+        probe slot it held is handed back.
+        """
+        if self.slow_call_s is not None and latency_s >= self.slow_call_s:
+            self.record(True, latency_s)
+            return
+        with self._lock:
+            if self._state == HALF_OPEN and self._probes_started > self._probes_ok:
+                self._probes_started -= 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and now - self._outcomes[0][0] > self.window_s:
+            self._outcomes.popleft()
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_s:
+            self._state = HALF_OPEN
+            self._probes_started = 0
+            self._probes_ok = 0
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._maybe_half_open()
+            now = self._clock()
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, f in self._outcomes if f)
+            return {
+                "state": self._state, "window_calls": total, "window_failures": failures,
+                "failure_rate": round(failures / total, 4) if total else 0.0,
+                "opened": self.opened, "rejected": self.rejected,
+                "retry_in_s": round(max(0.0, self.open_s - (now - self._opened_at)), 3)
+                if self._state == OPEN else 0.0,
+            }
+
+
+def _is_timeout(e: BaseException) -> bool:
+    # TimeoutError, or an SDK's own timeout type (openai.APITimeoutError, httpx.TimeoutException)
+    return isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+
+
+class BreakerClient:
+    """
+    Proxy exposing `.chat.completions.create` like the wrapped client, guarded by a
+    CircuitBreaker. Async clients get an async `create`, sync clients a sync one.
+    """
+
+    def __init__(self, client, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+        create = _chat_create(client)
+        guarded = self._async_create(create) if _is_async_callable(create) else self._sync_create(create)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=guarded))
+
+    def _admit(self) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM circuit breaker is open")
+
+    def _sync_create(self, create):
+        def guarded(**kwargs):
+            self._admit()
+            start = time.perf_counter()
+            try:
+                resp = create(**kwargs)
+            except BaseException as e:
+                elapsed = time.perf_counter() - start
+                budget = kwargs.get("timeout")
+                if budget is not None and elapsed >= budget and _is_timeout(e):
+                    # the SDK gave up at the request's own deadline (the caller already has,
+                    # see lib._call_with_timeout): abandoned like a cancelled async call
+                    self.breaker.abandon(elapsed)
+                else:
+                    self.breaker.record(False)
+                raise
+            self.breaker.record(True, time.perf_counter() - start)
+            return resp
+        return guarded
+
+    def _async_create(self, create):
+        async def guarded(**kwargs):
+            self._admit()
+            start = time.perf_counter()
+            try:
+                resp = await create(**kwargs)
+            except asyncio.CancelledError:
+                # cancelled by the caller (a per-request deadline): one client's tight budget
+                # must not open the breaker for everyone
+                self.breaker.abandon(time.perf_counter() - start)
+                raise
+            except Exception:
+                self.breaker.record(False)
+                raise
+            self.breaker.record(True, time.perf_counter() - start)
+            return resp
+        return guarded
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class OverloadedError(RuntimeError):
+    """Raised by AdmissionController when both the slots and the wait queue are full."""
+
+
+class AdmissionController:
+    """
+    asyncio bounded-concurrency scheduler: at most `max_in_flight` slots are held, at most
+    `max_queue` calls wait (FIFO) for theirs, and anything beyond that is shed immediately.
+    A call may take several slots (`permits`), e.g. a chunked document running several
+    LLM chains at once; it is capped at `max_in_flight`, so it can always be admitted.
+    """
+
+    def __init__(self, max_in_flight: int = 16, max_queue: int = 64):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self._free = self.max_in_flight
+        self._waiters = deque()  # (permits, future), FIFO: a wide call is not starved by narrow ones
+        self.in_flight = 0  # slots held
+        self.queued = 0
+        self.peak_queued = 0
+        self.admitted = 0
+        self.shed = 0
+
+    async def run(self, fn, permits: int = 1):
+        """Runs `fn()` (a zero-argument callable returning an awaitable) once `permits` slots are free."""
+        permits = min(max(1, permits), self.max_in_flight)
+        if self._waiters or self._free < permits:
+            if self.queued >= self.max_queue:
+                self.shed += 1
+                raise OverloadedError("LLM admission queue is full")
+            waiter = (permits, asyncio.get_running_loop().create_future())
+            self._waiters.append(waiter)
+            self.queued += 1
+            self.peak_queued = max(self.peak_queued, self.queued)
+            try:
+                await waiter[1]
+            except BaseException:
+                if waiter[1].done() and not waiter[1].cancelled():
+                    self._release(permits)  # granted just as we were cancelled
+                else:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    self._wake()  # a wide waiter leaving may unblock the ones behind it
+                raise
+            finally:
+                self.queued -= 1
+        else:
+            self._free -= permits
+        self.in_flight += permits
+        self.admitted += 1
+        try:
+            return await fn()
+        finally:
+            self.in_flight -= permits
+            self._release(permits)
+
+    def _release(self, permits: int) -> None:
+        self._free += permits
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._waiters[0][0] <= self._free:
+            permits, future = self._waiters.popleft()
+            if future.done():  # cancelled while queued
+                continue
+            self._free -= permits
+            future.set_result(None)
+
+    def stats(self) -> dict:
+        return {"max_in_flight": self.max_in_flight, "max_queue": self.max_queue,
+                "in_flight": self.in_flight, "queue_depth": self.queued, "peak_queue_depth": self.peak_queued,
+                "admitted": self.admitted, "shed": self.shed}
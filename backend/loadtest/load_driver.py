@@ -0,0 +1,140 @@
+"""
+Open-loop load driver for POST /api/convert.
+
+Requests are started on a fixed schedule (or Poisson arrivals) at the target RPS,
+whether or not earlier ones have finished, so server-side queueing shows up as
+latency. The texts come from the benchmark corpus. The report (JSON) has
+p50/p95/p99 latency, achieved throughput, HTTP/transport errors and the
+`source`/`reason` breakdown.
+
+    python backend/loadtest/load_driver.py --url http://127.0.0.1:8000 --rps 50 --duration 30
+    python backend/loadtest/load_driver.py --rps 200 --duration 10 --poisson --distinct 50 --out load.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bench"))
+
+from corpus import CATEGORIES, build_corpus  # noqa: E402
+
+
+def percentile(sorted_values, q: float):
+    """Nearest-rank percentile of an already sorted list (None when empty)."""
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000.0, 2)
+
+
+def load_texts(distinct: int = 0, seed: int = 0) -> list:
+    corpus = build_corpus()
+    texts = [t for cat in CATEGORIES for t in corpus[cat]]
+    random.Random(seed).shuffle(texts)
+    return texts[:distinct] if distinct > 0 else texts
+
+
+async def run_load(url: str, rps: float, duration: float, *, mode: str = "auto", texts=None,
+                   poisson: bool = False, timeout: float = 30.0, max_in_flight: int = 1000,
+                   deadline_ms: int = None, seed: int = 0, transport=None) -> dict:
+    texts = texts or load_texts(seed=seed)
+    rng = random.Random(seed)
+    latencies, outcomes, errors = [], Counter(), Counter()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    dropped = 0
+
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, transport=transport,
+                                 limits=httpx.Limits(max_connections=max_in_flight)) as http:
+
+        async def one(text: str) -> None:
+            payload = {"text": text, "mode": mode}
+            if deadline_ms:
+                payload["deadline_ms"] = deadline_ms
+            start = time.perf_counter()
+            try:
+                r = await http.post("/api/convert", json=payload)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] += 1
+                return
+            finally:
+                in_flight.release()
+            if r.status_code != 200:
+                errors[f"http_{r.status_code}"] += 1
+                return
+            latencies.append(time.perf_counter() - start)
+            body = r.json()
+            outcomes[(body.get("source"), body.get("reason", "").split(":", 1)[0])] += 1
+
+        tasks = []
+        start = time.perf_counter()
+        next_at, i = 0.0, 0
+        while next_at < duration:
+            delay = start + next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight.locked():
+                dropped += 1  # the driver itself is saturated; count instead of queueing
+            else:
+                await in_flight.acquire()
+                tasks.append(asyncio.ensure_future(one(texts[i % len(texts)])))
+            i += 1
+            next_at += rng.expovariate(rps) if poisson else 1.0 / rps
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "config": {"url": url, "target_rps": rps, "duration_s": duration, "mode": mode, "poisson": poisson,
+                   "distinct_texts": len(texts), "max_in_flight": max_in_flight, "deadline_ms": deadline_ms},
+        "sent": len(tasks), "completed": len(latencies), "dropped_by_driver": dropped,
+        "errors": dict(errors), "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {"p50": _ms(percentile(latencies, 50)), "p95": _ms(percentile(latencies, 95)),
+                       "p99": _ms(percentile(latencies, 99)), "max": _ms(latencies[-1] if latencies else None),
+                       "mean": _ms(sum(latencies) / len(latencies)) if latencies else None},
+        "breakdown": [{"source": s, "reason": r, "count": n} for (s, r), n in outcomes.most_common()],
+    }
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("--rps", type=float, default=20.0, help="target requests per second")
+    ap.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    ap.add_argument("--mode", default="auto", choices=("auto", "standard", "fused"))
+    ap.add_argument("--poisson", action="store_true", help="exponential inter-arrival times instead of fixed")
+    ap.add_argument("--distinct", type=int, default=0, help="number of distinct texts (0 = whole corpus)")
+    ap.add_argument("--deadline-ms", type=int, default=None)
+    ap.add_argument("--timeout", type=float, default=30.0, help="client timeout per request (s)")
+    ap.add_argument("--max-in-flight", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write the JSON report here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    report = asyncio.run(run_load(
+        args.url, args.rps, args.duration, mode=args.mode, texts=load_texts(args.distinct, args.seed),
+        poisson=args.poisson, timeout=args.timeout, max_in_flight=args.max_in_flight,
+        deadline_ms=args.deadline_ms, seed=args.seed))
+    payload = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Local OpenAI-compatible chat-completions stub for load tests.
+
+Answers the demojify prompts (rewrite, fused, batched, validator) without a real
+provider, with configurable latency and failure modes:
+
+- latency: "fixed:MS", "uniform:LO:HI", "normal:MEAN:SD", "lognormal:MEDIAN:SIGMA", "exp:MEAN" (ms)
+- --error-rate (HTTP 500), --rate-limit-rate (HTTP 429)
+- --malformed-rate (reply content that is not valid JSON)
+- --bare-digit-rate (rewrite replies that are just "0" or "1", as if they hit the validator)
+- --reject-rate (validator answers "0")
+
+    python backend/loadtest/stub_server.py --port 9000 --latency lognormal:300:0.5 --error-rate 0.02
+    DEMOJIFY_LLM_BASE_URL=http://127.0.0.1:9000/v1 uvicorn main:app --app-dir backend
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import demojify_lib as lib  # noqa: E402
+
+
+def parse_latency(spec: str):
+    """Latency spec (milliseconds) -> zero-argument sampler returning seconds."""
+    kind, *args = spec.split(":")
+    a = [float(x) for x in args]
+    samplers = {
+        "fixed": lambda: a[0],
+        "uniform": lambda: random.uniform(a[0], a[1]),
+        "normal": lambda: random.gauss(a[0], a[1]),
+        "lognormal": lambda: a[0] * random.lognormvariate(0.0, a[1]),
+        "exp": lambda: random.expovariate(1.0 / a[0]) if a[0] > 0 else 0.0,
+    }
+    if kind not in samplers:
+        raise ValueError(f"unknown latency distribution: {spec!r}")
+    sampler = samplers[kind]
+    sampler()  # fail fast on missing parameters
+    return lambda: max(0.0, sampler()) / 1000.0
+
+
+@dataclass
+class StubConfig:
+    latency: str = "fixed:0"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    bare_digit_rate: float = 0.0
+    reject_rate: float = 0.0
+    seed: int = None
+    counts: dict = field(default_factory=dict)
+
+
+def _rewrite(text: str) -> str:
+    # deterministic stand-in for the model: emojis become plain words
+    return lib._to_words_no_parens(text) or text
+
+
+def _after(marker: str, content: str) -> str:
+    i = content.rfind(marker)
+    return content[i + len(marker):].strip() if i >= 0 else content
+
+
+def _answer(messages, cfg: StubConfig, rng: random.Random):
+    """(call kind, reply content) for a demojify prompt."""
+    system, user = messages[0]["content"], messages[-1]["content"]
+    if system == lib.VALIDATOR_SYSTEM:
+        return "validator", "0" if rng.random() < cfg.reject_rate else "1"
+    if system == lib.VALIDATOR_BATCH_SYSTEM:
+        n = user.count("[PAIR ")
+        return "validator_batch", json.dumps({"verdicts": [0 if rng.random() < cfg.reject_rate else 1
+                                                           for _ in range(n)]})
+    if system == lib.JSON_BATCH_SYSTEM:
+        texts = json.loads(_after("Inputs (JSON array):", user))
+        return "rewrite_batch", json.dumps({"responses": [_rewrite(t) for t in texts]}, ensure_ascii=False)
+    if system == lib.FUSED_SYSTEM:
+        text = _after("[INPUT]", user.split("[STANDARD]")[0])
+        consistent = 0 if rng.random() < cfg.reject_rate else 1
+        return "fused", json.dumps({"response": _rewrite(text), "consistent": consistent}, ensure_ascii=False)
+    if rng.random() < cfg.bare_digit_rate:
+        return "rewrite", rng.choice(("0", "1"))
+    return "rewrite", json.dumps({"response": _rewrite(_after("Input:", user))}, ensure_ascii=False)
+
+
+def create_app(cfg: StubConfig = None) -> FastAPI:
+    cfg = cfg or StubConfig()
+    latency = parse_latency(cfg.latency)
+    rng = random.Random(cfg.seed)
+    app = FastAPI(title="Demojify LLM stub")
+
+    def count(key: str) -> None:
+        cfg.counts[key] = cfg.counts.get(key, 0) + 1
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency())
+        roll = rng.random()
+        if roll < cfg.error_rate:
+            count("error")
+            return JSONResponse({"error": {"message": "stub: internal error", "type": "server_error"}},
+                                status_code=500)
+        if roll < cfg.error_rate + cfg.rate_limit_rate:
+            count("rate_limited")
+            return JSONResponse({"error": {"message": "stub: rate limited", "type": "rate_limit_error"}},
+                                status_code=429)
+
+        kind, content = _answer(body.get("messages") or [{"content": ""}], cfg, rng)
+        if rng.random() < cfg.malformed_rate:
+            kind, content = kind + "_malformed", content[: max(1, len(content) // 2)] + " ...oops"
+        count(kind)
+        prompt_chars = sum(len(m.get("content", "")) for m in body.get("messages", []))
+        return {
+            "id": f"stub-{time.monotonic_ns()}", "object": "chat.completion", "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4 + 1,
+                      "total_tokens": prompt_chars // 4 + len(content) // 4 + 1},
+        }
+
+    @app.get("/stats")
+    def stats():
+        return {"config": {k: v for k, v in vars(cfg).items() if k != "counts"}, "counts": cfg.counts}
+
+    return app
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9000)
+    ap.add_argument("--latency", default="fixed:0", help="latency distribution in ms (see module docstring)")
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--rate-limit-rate", type=float, default=0.0)
+    ap.add_argument("--malformed-rate", type=float, default=0.0)
+    ap.add_argument("--bare-digit-rate", type=float, default=0.0)
+    ap.add_argument("--reject-rate", type=float, default=0.0)
+    ap.add_argument("--seed", type=int, default=None)
+    args = ap.parse_args(argv)
+
+    import uvicorn
+
+    cfg = StubConfig(latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                     malformed_rate=args.malformed_rate, bare_digit_rate=args.bare_digit_rate,
+                     reject_rate=args.reject_rate, seed=args.seed)
+    uvicorn.run(create_app(cfg), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
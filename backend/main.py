@@ -1,26 +1,207 @@
+import os
+import json
+import asyncio
+import time
+import logging
+from dataclasses import asdict
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
 # your library
-from demojify_lib import emoji_semantic_clean, demojify
+from demojify_lib import (emoji_semantic_clean, emoji_semantic_clean_batch, ademojify, analyze_emoji,
+                          chunk_chains, DemojifyResult, EmojiAnalysis, LocalGate)
+from demojify_cache import build_cache, cache_key
+from demojify_coalesce import AsyncSingleFlight
+from demojify_batcher import LLMBatcher
+from demojify_resilience import CircuitBreaker, BreakerClient, AdmissionController, OverloadedError
+from demojify_metrics import PipelineMetrics, MeteredClient
+from demojify_pool import CleanPool
+from demojify_learned import LearnedPhrases
+from demojify_endpoints import Endpoint, EndpointPool
+from demojify_live import LiveSessions
+
+# --- Logging Config ---
+# Pipeline tracing goes to the "demojify" logger; DEBUG echoes texts and LLM replies.
+logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+logging.getLogger("demojify").setLevel(os.getenv("DEMOJIFY_LOG_LEVEL", "INFO").upper())
+log = logging.getLogger("demojify.api")
+# DEMOJIFY_TIMINGS=1 returns the per-stage timings (ms) as `timings` in responses.
+TIMINGS = os.getenv("DEMOJIFY_TIMINGS", "0") == "1"
+
+# Prometheus-style counters/histograms served at /metrics
+METRICS = PipelineMetrics()
 
 # --- LLM Config ---
-BASE_URL = "https://fast-api.snova.ai/v1"
-MODEL = "DeepSeek-V3.1"
-sambanova_key = "3f792f08-b267-4123-916a-58d780ca98bd"
+# DEMOJIFY_LLM_BASE_URL can point at a local stub (see backend/loadtest/stub_server.py)
+BASE_URL = os.getenv("DEMOJIFY_LLM_BASE_URL", "https://fast-api.snova.ai/v1")
+MODEL = os.getenv("DEMOJIFY_LLM_MODEL", "DeepSeek-V3.1")
+sambanova_key = os.getenv("DEMOJIFY_LLM_API_KEY", "3f792f08-b267-4123-916a-58d780ca98bd")
+
+# --- LLM Endpoints Config ---
+# DEMOJIFY_LLM_ENDPOINTS='[{"base_url": ..., "model": ..., "api_key": ..., "name": ...}, ...]' spreads
+# LLM calls over several OpenAI-compatible endpoints (missing fields default to the settings above),
+# routed to the one with the lowest recent latency. A call not answered within that endpoint's
+# HEDGE_PERCENTILE latency (default 95; 0 disables hedging) is repeated on the next endpoint and the
+# slower call cancelled. HEDGE_MIN_MS floors the wait; HEDGE_INITIAL_MS is used until an endpoint has
+# answered HEDGE_MIN_SAMPLES calls.
+LLM_ENDPOINTS = json.loads(os.getenv("DEMOJIFY_LLM_ENDPOINTS", "[]"))
+HEDGE_PERCENTILE = float(os.getenv("DEMOJIFY_HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_MS = float(os.getenv("DEMOJIFY_HEDGE_MIN_MS", "50"))
+HEDGE_INITIAL_MS = float(os.getenv("DEMOJIFY_HEDGE_INITIAL_MS", "1000"))
+HEDGE_MIN_SAMPLES = int(os.getenv("DEMOJIFY_HEDGE_MIN_SAMPLES", "20"))
+
+# --- Local pre-validator Config ---
+# DEMOJIFY_PREVALIDATE=1 lets a deterministic similarity gate accept/reject obvious cases
+# so the LLM validator only sees ambiguous ones.
+PREVALIDATE = LocalGate(
+    accept_recall=float(os.getenv("DEMOJIFY_PREVALIDATE_ACCEPT", "0.8")),
+    reject_overlap=float(os.getenv("DEMOJIFY_PREVALIDATE_REJECT", "0.1")),
+) if os.getenv("DEMOJIFY_PREVALIDATE", "0") == "1" else None
+
+# --- Deadline Config ---
+# Total latency budget for the LLM leg of one conversion (0 = unbounded). Requests may
+# ask for a tighter budget with `deadline_ms`, never a looser one.
+DEADLINE_MS = int(os.getenv("DEMOJIFY_DEADLINE_MS", "0"))
+DEADLINE_REWRITE_SHARE = float(os.getenv("DEMOJIFY_DEADLINE_REWRITE_SHARE", "0.6"))
+
+# --- Circuit Breaker Config ---
+# Trips when, over the last WINDOW_S seconds (and at least MIN_CALLS calls), the share of
+# failed or slower-than-SLOW_MS LLM calls reaches FAILURE_RATE. While open, requests get
+# the STANDARD output (reason "circuit_open"); after OPEN_S, PROBES calls test the provider.
+BREAKER_SLOW_MS = int(os.getenv("DEMOJIFY_BREAKER_SLOW_MS", "0"))
+BREAKER = CircuitBreaker(
+    failure_rate=float(os.getenv("DEMOJIFY_BREAKER_FAILURE_RATE", "0.5")),
+    min_calls=int(os.getenv("DEMOJIFY_BREAKER_MIN_CALLS", "10")),
+    window_s=float(os.getenv("DEMOJIFY_BREAKER_WINDOW_S", "30")),
+    open_s=float(os.getenv("DEMOJIFY_BREAKER_OPEN_S", "30")),
+    half_open_probes=int(os.getenv("DEMOJIFY_BREAKER_PROBES", "3")),
+    slow_call_s=BREAKER_SLOW_MS / 1000.0 if BREAKER_SLOW_MS > 0 else None,
+)
+
+# --- Admission Control Config ---
+# At most MAX_INFLIGHT LLM pipelines run at once and MAX_QUEUE wait for a slot; further
+# requests are shed to the STANDARD output (reason "shed_overload"). MAX_INFLIGHT=0 disables.
+MAX_INFLIGHT = int(os.getenv("DEMOJIFY_MAX_INFLIGHT", "32"))
+ADMISSION = AdmissionController(
+    max_in_flight=MAX_INFLIGHT,
+    max_queue=int(os.getenv("DEMOJIFY_MAX_QUEUE", "128")),
+) if MAX_INFLIGHT > 0 else None
+
+# --- Micro-batching Config ---
+# DEMOJIFY_MICROBATCH=1 groups rewrite (and validator) calls arriving within WINDOW_MS,
+# up to MAX_ITEMS texts, into one LLM prompt.
+MICROBATCH = os.getenv("DEMOJIFY_MICROBATCH", "0") == "1"
+MICROBATCH_WINDOW_MS = float(os.getenv("DEMOJIFY_MICROBATCH_WINDOW_MS", "15"))
+MICROBATCH_MAX_ITEMS = int(os.getenv("DEMOJIFY_MICROBATCH_MAX_ITEMS", "16"))
+
+# --- Standard Clean Pool Config ---
+# DEMOJIFY_CLEAN_WORKERS>0 runs STANDARD cleaning of inputs of at least CLEAN_MIN_CHARS
+# characters (or batches totalling that much, in chunks of CLEAN_CHUNK) on warm worker processes.
+CLEAN_WORKERS = int(os.getenv("DEMOJIFY_CLEAN_WORKERS", "0"))
+CLEAN_POOL = CleanPool(
+    workers=CLEAN_WORKERS,
+    min_chars=int(os.getenv("DEMOJIFY_CLEAN_MIN_CHARS", "2000")),
+    chunk_size=int(os.getenv("DEMOJIFY_CLEAN_CHUNK", "64")),
+) if CLEAN_WORKERS > 0 else None
+
+# --- Learned Phrases Config ---
+# DEMOJIFY_LEARNED=1 records validated LLM rewrites by input pattern. A rewrite seen
+# MIN_COUNT times (and at least AGREEMENT of that pattern's rewrites) is promoted to a
+# rule, and later matching inputs are answered locally (reason "learned_rule").
+# DEMOJIFY_LEARNED_PATH is loaded at startup and saved at shutdown; GET /api/learned
+# exports the table so a warmed one can ship to other replicas.
+LEARNED = LearnedPhrases(
+    min_count=int(os.getenv("DEMOJIFY_LEARNED_MIN_COUNT", "3")),
+    min_agreement=float(os.getenv("DEMOJIFY_LEARNED_AGREEMENT", "0.8")),
+    max_entries=int(os.getenv("DEMOJIFY_LEARNED_MAX_ENTRIES", "10000")),
+) if os.getenv("DEMOJIFY_LEARNED", "0") == "1" else None
+LEARNED_PATH = os.getenv("DEMOJIFY_LEARNED_PATH")  # e.g. "learned_phrases.json"
+
+# --- Long Document Config ---
+# Inputs longer than DEMOJIFY_CHUNK_CHARS (0 disables) are cut into paragraph/sentence
+# chunks. Chunks with emojis are converted concurrently, at most CHUNK_CONCURRENCY at a
+# time, each with its own fallback; the others are kept as is (reason "chunked"). Such a
+# document takes one admission slot per chain it runs at once (capped at MAX_INFLIGHT).
+CHUNK_CHARS = int(os.getenv("DEMOJIFY_CHUNK_CHARS", "1200"))
+CHUNK_CONCURRENCY = int(os.getenv("DEMOJIFY_CHUNK_CONCURRENCY", "8"))
+
+# --- Live Conversion Config ---
+# POST /api/convert/live keeps each session's converted sentences (at most MAX_SEGMENTS per
+# session, MAX_SESSIONS sessions, dropped after TTL_S idle seconds), so an edit only
+# reconverts the sentences that changed.
+LIVE = LiveSessions(
+    max_sessions=int(os.getenv("DEMOJIFY_LIVE_MAX_SESSIONS", "1000")),
+    ttl_s=float(os.getenv("DEMOJIFY_LIVE_TTL_S", "1800")),
+    max_segments=int(os.getenv("DEMOJIFY_LIVE_MAX_SEGMENTS", "256")),
+)
+
+# --- Batch Config ---
+BATCH_MAX_ITEMS = int(os.getenv("DEMOJIFY_BATCH_MAX_ITEMS", "1000"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("DEMOJIFY_BATCH_LLM_CONCURRENCY", "8"))
 
-# Initialize the OpenAI-compatible client directly
+# --- Result Cache Config ---
+# DEMOJIFY_CACHE_SIZE=0 disables caching; a TTL <= 0 means entries never expire.
+CACHE_SIZE = int(os.getenv("DEMOJIFY_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("DEMOJIFY_CACHE_TTL", "3600"))
+CACHE_SQLITE_PATH = os.getenv("DEMOJIFY_CACHE_SQLITE")  # e.g. "demojify_cache.db"
+CACHE_SQLITE_TTL = float(os.getenv("DEMOJIFY_CACHE_SQLITE_TTL", str(7 * 24 * 3600)))
+
+RESULT_CACHE = build_cache(
+    max_entries=CACHE_SIZE,
+    ttl=CACHE_TTL if CACHE_TTL > 0 else None,
+    sqlite_path=CACHE_SQLITE_PATH,
+    sqlite_ttl=CACHE_SQLITE_TTL if CACHE_SQLITE_TTL > 0 else None,
+)
+
+# Initialize the OpenAI-compatible client directly (async, so one worker can hold
+# many in-flight LLM requests without tying up threadpool threads)
+def _endpoint_pool(AsyncOpenAI) -> EndpointPool:
+    endpoints = [Endpoint(MeteredClient(AsyncOpenAI(base_url=e.get("base_url", BASE_URL),
+                                                    api_key=e.get("api_key", sambanova_key)), METRICS),
+                          e.get("model", MODEL), name=e.get("name") or e.get("base_url", BASE_URL))
+                 for e in LLM_ENDPOINTS]
+    return EndpointPool(endpoints, hedge_percentile=HEDGE_PERCENTILE / 100.0 if HEDGE_PERCENTILE > 0 else None,
+                        hedge_min_s=HEDGE_MIN_MS / 1000.0, hedge_initial_s=HEDGE_INITIAL_MS / 1000.0,
+                        min_samples=HEDGE_MIN_SAMPLES)
+
+ENDPOINTS = None
 try:
-    from openai import OpenAI
-    OpenAIClient = OpenAI(base_url=BASE_URL, api_key=sambanova_key)
-    print("[INFO] OpenAI client initialized successfully.")
+    from openai import AsyncOpenAI
+    if LLM_ENDPOINTS:
+        ENDPOINTS = _endpoint_pool(AsyncOpenAI)
+        OpenAIClient = BreakerClient(ENDPOINTS, BREAKER)
+    else:
+        OpenAIClient = BreakerClient(MeteredClient(AsyncOpenAI(base_url=BASE_URL, api_key=sambanova_key), METRICS), BREAKER)
+    log.info("OpenAI client initialized successfully.")
 except Exception as e:
     OpenAIClient = None
-    print("[ERROR] Failed to initialize OpenAI client:", repr(e))
+    log.error("Failed to initialize OpenAI client: %r", e)
+
+BATCHER = LLMBatcher(OpenAIClient, MODEL, window_s=MICROBATCH_WINDOW_MS / 1000.0,
+                     max_items=MICROBATCH_MAX_ITEMS) if MICROBATCH and OpenAIClient is not None else None
+
+# Identical conversions already in flight share one pipeline execution
+INFLIGHT = AsyncSingleFlight()
 
 # --- FastAPI app setup ---
-app = FastAPI(title="Demojifier API", version="1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CLEAN_POOL is not None:
+        await asyncio.to_thread(CLEAN_POOL.start)  # warm workers before the first request
+    if LEARNED is not None and LEARNED_PATH:
+        log.info("loaded %d learned patterns from %s", LEARNED.load_file(LEARNED_PATH), LEARNED_PATH)
+    yield
+    if CLEAN_POOL is not None:
+        CLEAN_POOL.shutdown()
+    if LEARNED is not None and LEARNED_PATH:
+        LEARNED.save_file(LEARNED_PATH)
+
+app = FastAPI(title="Demojifier API", version="1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,29 +213,260 @@ app.add_middleware(
 # --- Schemas ---
 class ConvertIn(BaseModel):
     text: str
-    mode: str = "auto"  # "auto" or "standard"
+    mode: str = "auto"  # "auto", "standard", or "fused" (one LLM call that rewrites and self-validates)
+    deadline_ms: Optional[int] = None  # per-request latency budget; capped by DEMOJIFY_DEADLINE_MS
 
 class ConvertOut(BaseModel):
     output: str
     source: str
     reason: str
+    timings: Optional[dict] = None  # per-stage ms, only with DEMOJIFY_TIMINGS=1 (absent on cache hits)
+
+class LiveIn(ConvertIn):
+    session_id: Optional[str] = None  # from the previous response; omitted or unknown -> new session
+
+class LiveSegmentOut(BaseModel):
+    start: int      # offsets into `output`, in code points
+    end: int
+    changed: bool   # not part of the session's earlier texts
+    source: str
+    reason: str
+
+class LiveOut(BaseModel):
+    session_id: str
+    output: str
+    source: str
+    segments: List[LiveSegmentOut]
+    converted: int  # segments run through the pipeline by this call
+    reused: int     # segments answered from the session
+
+class ConvertBatchIn(BaseModel):
+    items: List[ConvertIn]
+
+class ConvertBatchOut(BaseModel):
+    results: List[ConvertOut]
+
+# --- Pipeline ---
+def _deadline_s(payload: ConvertIn) -> Optional[float]:
+    budgets = [ms for ms in (payload.deadline_ms, DEADLINE_MS) if ms and ms > 0]
+    return min(budgets) / 1000.0 if budgets else None
+
+def _standard_result(text: str, reason: str) -> DemojifyResult:
+    standard_out = emoji_semantic_clean(text)
+    return DemojifyResult(final_text=standard_out, source="standard", standard_text=standard_out,
+                          llm_text=None, reason=reason)
+
+async def _execute_pipeline(text: str, mode: str, key: str, deadline: Optional[float],
+                            analysis: EmojiAnalysis) -> DemojifyResult:
+    queued_at = time.monotonic()
+
+    def run():
+        # time spent waiting for an admission slot comes out of the request's budget
+        budget = None if deadline is None else max(0.0, deadline - (time.monotonic() - queued_at))
+        return ademojify(text, client=OpenAIClient, model=MODEL, prevalidate=PREVALIDATE,
+                         fused=(mode == "fused"), deadline=budget, rewrite_share=DEADLINE_REWRITE_SHARE,
+                         batcher=BATCHER, timings=True, analysis=analysis, learned=LEARNED,
+                         chunk_chars=CHUNK_CHARS or None, chunk_concurrency=CHUNK_CONCURRENCY)
+
+    try:
+        if ADMISSION is None:
+            result = await run()
+        else:
+            # a chunked document holds a slot per LLM chain it runs at once
+            permits = chunk_chains(text, CHUNK_CHARS or None, CHUNK_CONCURRENCY, analysis)
+            result = await ADMISSION.run(run, permits)
+    except OverloadedError:
+        return _standard_result(text, "shed_overload")
+    METRICS.observe_stages(result.timings)
+    METRICS.observe_verdict(result)  # once per execution; cache hits and coalesced callers reuse it
+    RESULT_CACHE.put(key, result)  # errors/fallbacks are skipped by the cache itself
+    return result
+
+async def _run_pipeline(text: str, mode: str, deadline: Optional[float] = None) -> DemojifyResult:
+    """Full LLM pipeline behind the result cache and single-flight coalescing."""
+    analysis = analyze_emoji(text)
+    if not analysis.has_emoji or (LEARNED is not None and LEARNED.has_rule(analysis)):
+        # answered locally ("no_emoji" / "learned_rule"): no cache lookup, coalescing or admission slot needed
+        result = await ademojify(text, client=OpenAIClient, model=MODEL, timings=True, analysis=analysis,
+                                 learned=LEARNED)
+        METRICS.observe_stages(result.timings)
+        return result
+    # a chunked result reproduces the input's layout, so long inputs are keyed on it
+    key = cache_key(text, MODEL, mode, keep_layout=bool(CHUNK_CHARS) and len(text) > CHUNK_CHARS)
+    result = RESULT_CACHE.get(key)
+    if result is not None:
+        return result
+    # executions under different budgets are not interchangeable: an unbounded caller must
+    # not inherit a bounded leader's "deadline_exceeded"
+    budget = "unbounded" if deadline is None else f"{deadline * 1000.0:.0f}ms"
+    flight = INFLIGHT.do(f"{key}\0{budget}", lambda: _execute_pipeline(text, mode, key, deadline, analysis))
+    if deadline is None:
+        return await flight
+    # A coalesced caller may have a tighter budget than the execution it joined.
+    try:
+        return await asyncio.wait_for(flight, timeout=deadline)
+    except asyncio.TimeoutError:
+        return _standard_result(text, "deadline_exceeded")
+
+def _respond(output: str, source: str, reason: str, timings: Optional[dict] = None) -> ConvertOut:
+    out = ConvertOut(output=output, source=source, reason=reason, timings=timings if TIMINGS else None)
+    METRICS.observe_result(out)
+    return out
+
+def _out(result: DemojifyResult) -> ConvertOut:
+    return _respond(result.final_text, result.source, result.reason, result.timings)
+
+async def _clean(text: str) -> str:
+    start = time.perf_counter()
+    output = emoji_semantic_clean(text) if CLEAN_POOL is None else await CLEAN_POOL.clean(text)
+    METRICS.observe_stage("emoji_semantic_clean", time.perf_counter() - start)
+    return output
 
 # --- Routes ---
-@app.post("/api/convert", response_model=ConvertOut)
-def convert(payload: ConvertIn):
+@app.post("/api/convert", response_model=ConvertOut, response_model_exclude_none=True)
+async def convert(payload: ConvertIn):
     text = (payload.text or "").strip()
     if not text:
         raise HTTPException(status_code=400, detail="Text is required.")
 
     # If user forces standard, or client failed to init
     if payload.mode == "standard" or OpenAIClient is None:
-        output = emoji_semantic_clean(text)
-        return ConvertOut(output=output, source="standard", reason="rules_only")
+        return _respond(await _clean(text), "standard", "rules_only")
 
     # Otherwise run full pipeline
-    result = demojify(text, client=OpenAIClient, model=MODEL)
-    return ConvertOut(output=result.final_text, source=result.source, reason=result.reason)
+    result = await _run_pipeline(text, payload.mode, _deadline_s(payload))
+    return _out(result)
+
+def _sse(event: str, out: ConvertOut, **extra) -> str:
+    data = json.dumps({**out.model_dump(exclude_none=True), **extra}, ensure_ascii=False)
+    return f"event: {event}\ndata: {data}\n\n"
+
+@app.post("/api/convert/stream")
+async def convert_stream(payload: ConvertIn):
+    """
+    Server-Sent Events: `standard` (rules result, sent immediately), then `final`
+    (validated LLM result, or the standard result with the reason it stands).
+    """
+    text = (payload.text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required.")
+
+    async def events():
+        standard_out = await _clean(text)
+        standard = ConvertOut(output=standard_out, source="standard", reason="rules_only")
+        yield _sse("standard", standard)
+
+        if payload.mode == "standard" or OpenAIClient is None:
+            yield _sse("final", _respond(standard_out, "standard", "rules_only"), upgraded=False)
+            return
+        try:
+            result = await _run_pipeline(text, payload.mode, _deadline_s(payload))
+            final = _out(result)
+        except Exception as e:
+            final = _respond(standard_out, "standard", f"llm_error: {e}")
+        yield _sse("final", final, upgraded=final.source != "standard")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/api/convert/live", response_model=LiveOut)
+async def convert_live(payload: LiveIn):
+    """
+    Incremental conversion for as-you-type clients: only sentences the session has not
+    seen before are converted; the others are reused. An empty text is a valid state here.
+    """
+    session = LIVE.get(payload.session_id)
+    if payload.mode == "standard" or OpenAIClient is None:
+        mode = "standard"
+
+        async def run(segment: str) -> DemojifyResult:
+            return _standard_result(segment, "rules_only")
+    else:
+        mode, deadline = payload.mode, _deadline_s(payload)
+
+        def run(segment: str):
+            return _run_pipeline(segment, mode, deadline)
+
+    result = await LIVE.convert(session, payload.text or "", run, mode=mode, concurrency=CHUNK_CONCURRENCY)
+    return LiveOut(**asdict(result))
+
+async def _convert_llm_item(text: str, item: ConvertIn, limit: asyncio.Semaphore) -> ConvertOut:
+    # One item's failure must not fail the batch.
+    async with limit:
+        try:
+            result = await _run_pipeline(text, item.mode, _deadline_s(item))
+            return _out(result)
+        except Exception as e:
+            return _respond(emoji_semantic_clean(text), "standard", f"llm_error: {e}")
+
+@app.post("/api/convert/batch", response_model=ConvertBatchOut, response_model_exclude_none=True)
+async def convert_batch(payload: ConvertBatchIn):
+    if len(payload.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch.")
+
+    texts = [(item.text or "").strip() for item in payload.items]
+    results: List[ConvertOut] = [None] * len(texts)
+    standard_idx, llm_idx = [], []
+    for i, (item, text) in enumerate(zip(payload.items, texts)):
+        if not text:
+            results[i] = _respond("", "standard", "empty_text")
+        elif item.mode == "standard" or OpenAIClient is None:
+            standard_idx.append(i)
+        else:
+            llm_idx.append(i)
+
+    # STANDARD items: one pass over the shared rule engine (chunked across workers when pooled)
+    standard_texts = [texts[i] for i in standard_idx]
+    if CLEAN_POOL is None:
+        standard_outs = emoji_semantic_clean_batch(standard_texts)
+    else:
+        standard_outs = await CLEAN_POOL.clean_batch(standard_texts)
+    for i, output in zip(standard_idx, standard_outs):
+        results[i] = _respond(output, "standard", "rules_only")
+
+    # LLM items: bounded fan-out, results kept in input order
+    limit = asyncio.Semaphore(max(1, BATCH_LLM_CONCURRENCY))
+    outs = await asyncio.gather(*(_convert_llm_item(texts[i], payload.items[i], limit) for i in llm_idx))
+    for i, out in zip(llm_idx, outs):
+        results[i] = out
+
+    return ConvertBatchOut(results=results)
 
 @app.get("/health")
 def health():
-    return {"ok": True, "llm_client": OpenAIClient is not None, "model": MODEL}
+    return {
+        "ok": True, "llm_client": OpenAIClient is not None, "model": MODEL,
+        "cache": RESULT_CACHE.stats(), "coalescing": INFLIGHT.stats(), "circuit": BREAKER.stats(),
+        "admission": ADMISSION.stats() if ADMISSION is not None else None,
+        "microbatch": BATCHER.stats() if BATCHER is not None else None,
+        "clean_pool": CLEAN_POOL.stats() if CLEAN_POOL is not None else None,
+        "learned": LEARNED.stats() if LEARNED is not None else None,
+        "endpoints": ENDPOINTS.stats() if ENDPOINTS is not None else None,
+        "live": LIVE.stats(),
+    }
+
+@app.get("/api/learned")
+def learned_export():
+    """The learned phrase table (counts and promoted rules) for DEMOJIFY_LEARNED_PATH on other replicas."""
+    if LEARNED is None:
+        raise HTTPException(status_code=404, detail="Learned phrases are disabled (DEMOJIFY_LEARNED=1).")
+    return LEARNED.export()
+
+# Scrape-time gauges for the state already reported in /health
+def _memory_cache_hit_rate():
+    cache = getattr(RESULT_CACHE, "memory", RESULT_CACHE)
+    return cache.stats()["hit_rate"]
+
+METRICS.add_gauge("demojify_cache_hit_ratio", "Result cache (memory tier) hit rate.", _memory_cache_hit_rate)
+METRICS.add_gauge("demojify_circuit_open", "1 while the LLM circuit breaker is open, 0.5 half-open.",
+                  lambda: {"open": 1, "half_open": 0.5}.get(BREAKER.state, 0))
+METRICS.add_gauge("demojify_admission_queue_depth", "LLM pipelines waiting for a slot.",
+                  lambda: ADMISSION.queued if ADMISSION is not None else None)
+METRICS.add_gauge("demojify_admission_in_flight", "LLM pipelines running.",
+                  lambda: ADMISSION.in_flight if ADMISSION is not None else None)
+METRICS.add_gauge("demojify_admission_shed", "Requests shed since start (shed_overload).",
+                  lambda: ADMISSION.shed if ADMISSION is not None else None)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
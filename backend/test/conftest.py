@@ -0,0 +1,13 @@
+import pytest
+
+from fakes import Clock, FakeClient
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def fake_client():
+    return FakeClient()
@@ -0,0 +1,55 @@
+"""
+Fakes shared by the demojify tests: OpenAI-style completions and clients, and a manual clock.
+
+A plain module (backend/test is on the pytest pythonpath): import the classes to build
+or subclass them, or take the `clock` / `fake_client` fixtures from conftest.py.
+"""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+
+def completion(content, prompt_tokens=None, completion_tokens=None):
+    """A chat completion whose first choice says `content` (with `usage` if token counts are given)."""
+    resp = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    if prompt_tokens is not None or completion_tokens is not None:
+        resp.usage = SimpleNamespace(prompt_tokens=prompt_tokens or 0, completion_tokens=completion_tokens or 0)
+    return resp
+
+
+class FakeClient:
+    """Sync OpenAI-style client: first call is the rewrite, anything with 'evaluator' is the validator."""
+
+    def __init__(self, response="That is hilarious!", verdict="1"):
+        self.response, self.verdict, self.calls = response, verdict, 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _answer(self, messages):
+        self.calls += 1
+        if "evaluator" in messages[0]["content"]:
+            return completion(self.verdict)
+        return completion(json.dumps({"response": self.response}))
+
+    def create(self, *, messages, **kwargs):
+        return self._answer(messages)
+
+
+class FakeAsyncClient(FakeClient):
+    def __init__(self, *args, delay=0.0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.delay = delay
+
+    async def create(self, *, messages, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._answer(messages)
+
+
+class Clock:
+    """Manual clock for code taking a `clock=` callable; tests move `now` by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
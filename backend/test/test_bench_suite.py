@@ -0,0 +1,19 @@
+from bench.bench_suite import compare, run_suite
+from bench.corpus import CATEGORIES, build_corpus
+
+
+def test_corpus_is_reproducible():
+    assert build_corpus() == build_corpus()
+    assert set(build_corpus()) == set(CATEGORIES)
+
+
+def test_compare_flags_throughput_regressions():
+    baseline = {"results": {"a": {"ops_per_s": 100.0}, "b": {"ops_per_s": 100.0}, "gone": {"ops_per_s": 1.0}}}
+    current = {"results": {"a": {"ops_per_s": 85.0}, "b": {"ops_per_s": 70.0}}}
+    assert [r["benchmark"] for r in compare(current, baseline, max_regression=0.2)] == ["b"]
+
+
+def test_run_suite_report_shape():
+    report = run_suite(min_time=0.001, repeat=1, only=["parse_llm_demojify_output", "demojify/"])
+    assert set(report["results"]) == {"parse_llm_demojify_output/replies", "demojify/mixed"}
+    assert report["results"]["demojify/mixed"]["ops_per_s"] > 0
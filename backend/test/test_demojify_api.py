@@ -1,12 +1,19 @@
 import json
+import main
 from main import app
 import demojify_lib as lib
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock
+from unittest.mock import AsyncMock
 
 client = TestClient(app)
 
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    main.RESULT_CACHE.clear()
+    yield
+    main.RESULT_CACHE.clear()
+
 def test_convert_400_on_empty_text():
     response = client.post("/api/convert",json={"text":"","mode":"auto"})
     assert response.status_code == 400
@@ -14,10 +21,10 @@ def test_convert_400_on_empty_text():
 
 
 def test_validator_accepts_llm(monkeypatch):
-    fake_llm = Mock(return_value=json.dumps({"response": "hello world!"}))
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "hello world!"}))
 
-    monkeypatch.setattr("demojify_lib.emoji_to_meaning", fake_llm)
-    monkeypatch.setattr("demojify_lib.evaluate_consistency_zero_one", lambda *a, **k: 1)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
 
     r = client.post("/api/convert", json={"text":"LOL soooo funny 😂😂","mode":"auto"})
     assert r.status_code == 200
@@ -26,15 +33,28 @@ def test_validator_accepts_llm(monkeypatch):
     assert out["reason"] == "llm_valid"
     assert out["output"] == "hello world!"
 
-    fake_llm.assert_called_once()
+    fake_llm.assert_awaited_once()
+
+def test_emoji_free_text_returned_without_llm(monkeypatch):
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "should not be used"}))
+    fake_validator = AsyncMock(return_value=1)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", fake_validator)
+
+    misses = main.RESULT_CACHE.stats()["misses"]
+    r = client.post("/api/convert", json={"text": "See you at 5, Sooo excited", "mode": "auto"})
+    assert r.json() == {"output": "See you at 5, Sooo excited", "source": "standard", "reason": "no_emoji"}
+    fake_llm.assert_not_awaited()
+    fake_validator.assert_not_awaited()
+    assert main.RESULT_CACHE.stats()["misses"] == misses
 
 def test_standard_mode_bypasses_llm(monkeypatch):
-    fake_llm = Mock(return_value=json.dumps({"response": "should not be used"}))
-    fake_validator = Mock(return_value=1)
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "should not be used"}))
+    fake_validator = AsyncMock(return_value=1)
 
     # If STANDARD, neither LLM nor validator should run
-    monkeypatch.setattr("demojify_lib.emoji_to_meaning", fake_llm)
-    monkeypatch.setattr("demojify_lib.evaluate_consistency_zero_one", fake_validator)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", fake_validator)
 
     r = client.post("/api/convert", json={"text": "Nice 😂", "mode": "standard"})
     assert r.status_code == 200
@@ -48,9 +68,9 @@ def test_validator_rejects_llm(monkeypatch):
     input_text = "Finally finished 😭😭🔥"
 
     # LLM path returns something different, but validator rejects it (0)
-    fake_llm = Mock(return_value=json.dumps({"response": "I am devastated."}))
-    monkeypatch.setattr("demojify_lib.emoji_to_meaning", fake_llm)
-    monkeypatch.setattr("demojify_lib.evaluate_consistency_zero_one", lambda *a, **k: 0)
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "I am devastated."}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=0))
 
     r = client.post("/api/convert", json={"text": input_text, "mode": "auto"})
     assert r.status_code == 200
@@ -62,16 +82,16 @@ def test_validator_rejects_llm(monkeypatch):
     expected_standard = lib.emoji_semantic_clean(input_text)
     assert body["output"] == expected_standard
 
-    fake_llm.assert_called_once()
+    fake_llm.assert_awaited_once()
 
 def test_validator_error_fallback(monkeypatch):
     input_text = "I can’t believe this 😂🔥"
 
-    fake_llm = Mock(return_value=json.dumps({"response": "That’s awesome!"}))
-    monkeypatch.setattr("demojify_lib.emoji_to_meaning", fake_llm)
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "That’s awesome!"}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
 
     # Validator returns None → simulate invalid / junk response
-    monkeypatch.setattr("demojify_lib.evaluate_consistency_zero_one", lambda *a, **k: None)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=None))
 
     r = client.post("/api/convert", json={"text": input_text, "mode": "auto"})
     assert r.status_code == 200
@@ -81,12 +101,12 @@ def test_validator_error_fallback(monkeypatch):
     expected_standard = lib.emoji_semantic_clean(input_text)
     assert body["output"] == expected_standard
 
-    fake_llm.assert_called_once()
+    fake_llm.assert_awaited_once()
 
 def test_llm_json_with_emoji_gets_sanitized(monkeypatch):
-    monkeypatch.setattr("demojify_lib.emoji_to_meaning",
-        lambda *a, **k: json.dumps({"response":"Great job 🎉"}), raising=False)
-    monkeypatch.setattr("demojify_lib.evaluate_consistency_zero_one", lambda *a, **k: 1, raising=False)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning",
+        AsyncMock(return_value=json.dumps({"response":"Great job 🎉"})), raising=False)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1), raising=False)
 
     r = client.post("/api/convert", json={"text":"Great job 🎉", "mode":"auto"})
     assert r.status_code == 200
@@ -113,3 +133,279 @@ def test_when_llm_client_none_uses_standard(monkeypatch):
     out = r.json()
     assert out["source"] == "standard"
     assert out["reason"] == "rules_only" or out["reason"].startswith("llm_error")
+
+def test_batch_keeps_order_and_per_item_reason(monkeypatch):
+    async def fake_llm(client, text, **k):
+        return json.dumps({"response": f"plain: {text}"})
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    items = [
+        {"text": "Nice 😂", "mode": "standard"},
+        {"text": "", "mode": "auto"},
+        {"text": "party 🎉", "mode": "auto"},
+        {"text": "cool 😎", "mode": "standard"},
+    ]
+    r = client.post("/api/convert/batch", json={"items": items})
+    assert r.status_code == 200
+    results = r.json()["results"]
+    assert [x["reason"] for x in results] == ["rules_only", "empty_text", "llm_valid", "rules_only"]
+    assert results[0]["output"] == lib.emoji_semantic_clean("Nice 😂")
+    assert results[2]["output"] == "plain: party party popper"  # leftover emoji sanitized
+    assert results[3]["output"] == lib.emoji_semantic_clean("cool 😎")
+
+def test_batch_item_failure_is_isolated(monkeypatch):
+    async def flaky(text, client, **kwargs):
+        if "boom" in text:
+            raise RuntimeError("boom")
+        return lib.DemojifyResult(final_text="fine", source="llm", standard_text="",
+                                  llm_text="fine", reason="llm_valid")
+    monkeypatch.setattr("main.ademojify", flaky)
+
+    r = client.post("/api/convert/batch", json={"items": [{"text": "boom 💥"}, {"text": "ok 👍"}]})
+    assert r.status_code == 200
+    first, second = r.json()["results"]
+    assert first["source"] == "standard" and first["reason"].startswith("llm_error")
+    assert first["output"] == lib.emoji_semantic_clean("boom 💥")
+    assert second == {"output": "fine", "source": "llm", "reason": "llm_valid"}
+
+def test_batch_rejects_oversized(monkeypatch):
+    monkeypatch.setattr("main.BATCH_MAX_ITEMS", 2)
+    r = client.post("/api/convert/batch", json={"items": [{"text": "a"}] * 3})
+    assert r.status_code == 413
+
+def test_repeat_text_served_from_cache(monkeypatch):
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "congratulations!"}))
+    fake_validator = AsyncMock(return_value=1)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", fake_validator)
+
+    first = client.post("/api/convert", json={"text": "congrats 🎉", "mode": "auto"}).json()
+    second = client.post("/api/convert", json={"text": "congrats  🎉 ", "mode": "auto"}).json()
+    assert first == second == {"output": "congratulations!", "source": "llm", "reason": "llm_valid"}
+    fake_llm.assert_awaited_once()
+    fake_validator.assert_awaited_once()
+    assert client.get("/health").json()["cache"]["hits"] == 1
+
+def test_validator_error_is_not_cached(monkeypatch):
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "wow"}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=None))
+
+    for _ in range(2):
+        r = client.post("/api/convert", json={"text": "wow 😮", "mode": "auto"})
+        assert r.json()["reason"] == "validator_error"
+    assert fake_llm.await_count == 2
+
+def test_fused_mode_uses_one_call(monkeypatch):
+    fused = AsyncMock(return_value=json.dumps({"response": "Congratulations!", "consistent": 1}))
+    rewrite = AsyncMock()
+    validator = AsyncMock()
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning_validated", fused)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", rewrite)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", validator)
+
+    r = client.post("/api/convert", json={"text": "we won 🎉", "mode": "fused"})
+    assert r.json() == {"output": "Congratulations!", "source": "llm", "reason": "llm_valid"}
+    fused.assert_awaited_once()
+    rewrite.assert_not_awaited()
+    validator.assert_not_awaited()
+
+def _read_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_stream_sends_standard_then_upgrade(monkeypatch):
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning",
+        AsyncMock(return_value=json.dumps({"response": "That is hilarious!"})))
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    r = client.post("/api/convert/stream", json={"text": "LOL 😂😂", "mode": "auto"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/event-stream")
+    (e1, first), (e2, final) = _read_sse(r.text)
+    assert e1 == "standard" and first["output"] == lib.emoji_semantic_clean("LOL 😂😂")
+    assert e2 == "final" and final["output"] == "That is hilarious!"
+    assert final["source"] == "llm" and final["upgraded"] is True
+
+def test_stream_final_keeps_standard_with_reason(monkeypatch):
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning",
+        AsyncMock(return_value=json.dumps({"response": "Something else"})))
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=0))
+
+    r = client.post("/api/convert/stream", json={"text": "so tired 😴", "mode": "auto"})
+    (_, first), (_, final) = _read_sse(r.text)
+    assert final["output"] == first["output"]
+    assert final["reason"] == "validator_rejected" and final["upgraded"] is False
+
+def test_stream_400_on_empty_text():
+    r = client.post("/api/convert/stream", json={"text": "  "})
+    assert r.status_code == 400
+
+def test_request_deadline_falls_back_to_standard(monkeypatch):
+    import asyncio
+
+    async def slow_llm(*a, **k):
+        await asyncio.sleep(1)
+        return json.dumps({"response": "too late"})
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", slow_llm)
+
+    r = client.post("/api/convert", json={"text": "slow day 🐢", "mode": "auto", "deadline_ms": 50})
+    body = r.json()
+    assert body["source"] == "standard" and body["reason"] == "deadline_exceeded"
+    assert body["output"] == lib.emoji_semantic_clean("slow day 🐢")
+
+def test_server_deadline_caps_request_budget(monkeypatch):
+    monkeypatch.setattr("main.DEADLINE_MS", 100)
+    assert main._deadline_s(main.ConvertIn(text="x", deadline_ms=5000)) == 0.1
+    assert main._deadline_s(main.ConvertIn(text="x", deadline_ms=20)) == 0.02
+    monkeypatch.setattr("main.DEADLINE_MS", 0)
+    assert main._deadline_s(main.ConvertIn(text="x")) is None
+
+def test_overload_is_shed_to_standard(monkeypatch):
+    import asyncio
+    from demojify_resilience import AdmissionController
+
+    async def slow_llm(*a, **k):
+        await asyncio.sleep(0.2)
+        return json.dumps({"response": "busy"})
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", slow_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+    monkeypatch.setattr("main.ADMISSION", AdmissionController(max_in_flight=1, max_queue=0))
+
+    items = [{"text": f"item {i} 🐢", "mode": "auto"} for i in range(2)]
+    results = client.post("/api/convert/batch", json={"items": items}).json()["results"]
+    assert sorted(r["reason"] for r in results) == ["llm_valid", "shed_overload"]
+    assert client.get("/health").json()["admission"]["shed"] == 1
+
+def test_metrics_endpoint_reports_outcomes(monkeypatch):
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", AsyncMock(return_value=json.dumps({"response": "ok then"})))
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+    before = main.METRICS.requests.value(source="llm", reason="llm_valid")
+
+    client.post("/api/convert", json={"text": "metrics please 📈", "mode": "auto"})
+    client.post("/api/convert", json={"text": "rules 📈", "mode": "standard"})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    assert main.METRICS.requests.value(source="llm", reason="llm_valid") == before + 1
+    assert 'demojify_stage_seconds_count{stage="emoji_semantic_clean"}' in r.text
+    assert 'demojify_stage_seconds_count{stage="emoji_to_meaning"}' in r.text
+
+def test_standard_cleaning_through_process_pool(monkeypatch):
+    from demojify_pool import CleanPool
+    pool = CleanPool(workers=1, min_chars=10, chunk_size=2)
+    monkeypatch.setattr("main.CLEAN_POOL", pool)
+    try:
+        text = "a long enough message 🎉🎉"
+        r = client.post("/api/convert", json={"text": text, "mode": "standard"})
+        assert r.json()["output"] == lib.emoji_semantic_clean(text)
+
+        items = [{"text": f"item {i} 😂 🍕🍺", "mode": "standard"} for i in range(5)]
+        results = client.post("/api/convert/batch", json={"items": items}).json()["results"]
+        assert [x["output"] for x in results] == [lib.emoji_semantic_clean(i["text"]) for i in items]
+        assert pool.stats()["offloaded"] == 6 and pool.stats()["chunks"] == 3
+    finally:
+        pool.shutdown()
+
+
+def test_learned_rule_answers_without_llm(monkeypatch):
+    from demojify_learned import LearnedPhrases
+
+    assert client.get("/api/learned").status_code == 404
+    monkeypatch.setattr(main, "LEARNED", LearnedPhrases(min_count=1))
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "Pizza and beer tonight!"}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    first = client.post("/api/convert", json={"text": "pizza night 🍕🍺", "mode": "auto"}).json()
+    assert first["reason"] == "llm_valid"
+    again = client.post("/api/convert", json={"text": "PIZZA night!! 🍕🍺", "mode": "auto"}).json()
+    assert again == {"output": "Pizza and beer tonight!", "source": "llm", "reason": "learned_rule"}
+    fake_llm.assert_awaited_once()
+
+    table = client.get("/api/learned").json()
+    assert [e["rule"] for e in table["entries"].values()] == ["Pizza and beer tonight!"]
+    assert client.get("/health").json()["learned"]["hits"] == 1
+
+
+def test_long_document_converted_in_chunks(monkeypatch):
+    monkeypatch.setattr(main, "CHUNK_CHARS", 40)
+    fake_llm = AsyncMock(return_value=json.dumps({"response": "Rewritten."}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    text = "Party tonight at eight 🎉\n\nJust a plain paragraph with no emoji.\n\nSee you there 👋"
+    out = client.post("/api/convert", json={"text": text, "mode": "auto"}).json()
+    assert out == {"output": "Rewritten.\n\nJust a plain paragraph with no emoji.\n\nRewritten.",
+                   "source": "llm", "reason": "chunked"}
+    assert fake_llm.await_count == 2
+    client.post("/api/convert", json={"text": text, "mode": "auto"})
+    assert fake_llm.await_count == 2  # served from the result cache
+    flat = client.post("/api/convert", json={"text": " ".join(text.split()), "mode": "auto"}).json()
+    assert "\n" not in flat["output"]  # another layout of the same words is not served that entry
+
+
+def test_live_conversion_reuses_unchanged_sentences(monkeypatch):
+    fake_llm = AsyncMock(side_effect=lambda client, text, **kw: json.dumps({"response": text.split()[0].upper()}))
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", fake_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    first = client.post("/api/convert/live", json={"text": "Party 🎉. Pizza 🍕.", "mode": "auto"}).json()
+    assert first["output"] == "PARTY PIZZA" and first["converted"] == 2
+    again = client.post("/api/convert/live", json={"text": "Party 🎉. Tacos 🌮.", "mode": "auto",
+                                                   "session_id": first["session_id"]}).json()
+    assert again["session_id"] == first["session_id"]
+    assert again["output"] == "PARTY TACOS"
+    assert [s["changed"] for s in again["segments"]] == [False, True]
+    assert (again["converted"], again["reused"]) == (1, 1)
+    assert fake_llm.await_count == 3
+
+    empty = client.post("/api/convert/live", json={"text": "", "session_id": first["session_id"]}).json()
+    assert empty["output"] == "" and empty["segments"] == []
+
+
+def test_unbounded_caller_does_not_join_a_bounded_execution(monkeypatch):
+    import asyncio
+
+    async def slow_llm(*a, **k):
+        await asyncio.sleep(0.1)
+        return json.dumps({"response": "worth the wait"})
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", slow_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", AsyncMock(return_value=1))
+
+    async def both():
+        bounded = asyncio.ensure_future(main._run_pipeline("slow day 🐢", "auto", 0.01))
+        await asyncio.sleep(0.001)  # the bounded execution is in flight first
+        return await asyncio.gather(bounded, main._run_pipeline("slow day 🐢", "auto", None))
+
+    leader, follower = asyncio.run(both())
+    assert leader.reason == "deadline_exceeded"
+    assert (follower.reason, follower.final_text) == ("llm_valid", "worth the wait")
+
+
+def test_validator_verdicts_counted_once_per_execution(monkeypatch):
+    import asyncio
+
+    async def slow_llm(*a, **k):
+        await asyncio.sleep(0.05)
+        return json.dumps({"response": "counted once"})
+    validator = AsyncMock(return_value=1)
+    monkeypatch.setattr("demojify_lib.aemoji_to_meaning", slow_llm)
+    monkeypatch.setattr("demojify_lib.aevaluate_consistency_zero_one", validator)
+    accepts = lambda: main.METRICS.verdicts.value(validator="llm", verdict="accept")  # noqa: E731
+    served = lambda: main.METRICS.requests.value(source="llm", reason="llm_valid")  # noqa: E731
+    accepts_before, served_before = accepts(), served()
+
+    async def five():
+        payload = main.ConvertIn(text="count me 🧮", mode="auto")
+        return await asyncio.gather(*(main.convert(payload) for _ in range(5)))
+
+    assert {out.reason for out in asyncio.run(five())} == {"llm_valid"}  # 1 execution, 4 coalesced
+    assert client.post("/api/convert", json={"text": "count me 🧮", "mode": "auto"}).json()["reason"] == "llm_valid"
+    assert validator.await_count == 1
+    assert served() - served_before == 6
+    assert accepts() - accepts_before == 1
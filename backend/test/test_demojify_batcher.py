@@ -0,0 +1,134 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import demojify_lib as lib
+from demojify_batcher import LLMBatcher, MicroBatcher
+from fakes import completion
+
+
+class BatchAwareClient:
+    """Async OpenAI-style client answering single and batched rewrite/validator prompts."""
+
+    def __init__(self, short_by=0, fail=False):
+        self.short_by, self.fail = short_by, fail
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, *, messages, **kwargs):
+        system, user = messages[0]["content"], messages[1]["content"]
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("provider down")
+        if system == lib.JSON_BATCH_SYSTEM:
+            self.calls.append("rewrite_batch")
+            texts = json.loads(user[user.index("Inputs (JSON array):") + len("Inputs (JSON array):"):])
+            responses = [f"plain {t.split()[0]}" for t in texts]
+            return completion(json.dumps({"responses": responses[:len(responses) - self.short_by]}))
+        if "verdicts" in system:
+            self.calls.append("validator_batch")
+            return completion(json.dumps({"verdicts": [1] * user.count("[PAIR ")}))
+        if "evaluator" in system:
+            self.calls.append("validator")
+            return completion("1")
+        self.calls.append("rewrite")
+        text = user.rsplit("Input:\n", 1)[1]
+        return completion(json.dumps({"response": f"plain {text.split()[0]}"}))
+
+
+def _run_many(client, texts, **kwargs):
+    batcher = LLMBatcher(client, window_s=0.01, **kwargs)
+
+    async def run():
+        return await asyncio.gather(*(lib.ademojify(t, client, batcher=batcher) for t in texts))
+
+    return asyncio.run(run()), batcher
+
+
+def test_concurrent_requests_share_one_rewrite_and_one_validator_call():
+    client = BatchAwareClient()
+    results, batcher = _run_many(client, ["alpha 😂", "beta 🔥", "gamma 🎉"])
+    assert [r.final_text for r in results] == ["plain alpha", "plain beta", "plain gamma"]
+    assert all(r.reason == "llm_valid" for r in results)
+    assert client.calls == ["rewrite_batch", "validator_batch"]
+    assert batcher.stats()["rewrite"]["avg_batch_size"] == 3
+
+
+def test_wrong_length_batch_is_retried_per_item():
+    client = BatchAwareClient(short_by=1)
+    results, batcher = _run_many(client, ["alpha 😂", "beta 🔥"])
+    assert [r.final_text for r in results] == ["plain alpha", "plain beta"]
+    assert client.calls.count("rewrite") == 2
+    assert batcher.stats()["rewrite"]["retried_items"] == 2
+
+
+def test_provider_error_reaches_every_caller():
+    results, _ = _run_many(BatchAwareClient(fail=True), ["alpha 😂", "beta 🔥"])
+    assert all(r.source == "standard" and r.reason.startswith("llm_error") for r in results)
+
+
+def test_emoji_free_text_skips_batcher():
+    client = BatchAwareClient()
+    results, batcher = _run_many(client, ["nothing to see here"])
+    assert results[0].final_text == "nothing to see here"
+    assert "rewrite" not in client.calls and "rewrite_batch" not in client.calls
+    assert batcher.stats()["rewrite"]["submitted"] == 0
+
+
+def test_micro_batcher_flushes_at_max_items():
+    sizes = []
+
+    async def batch_fn(items):
+        sizes.append(len(items))
+        return [i * 2 for i in items]
+
+    async def single_fn(item):
+        return item * 2
+
+    async def run():
+        mb = MicroBatcher(batch_fn, single_fn, window_s=10, max_items=2)
+        return await asyncio.gather(*(mb.submit(i) for i in range(4)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6]
+    assert sizes == [2, 2]
+
+
+@pytest.mark.parametrize("content", [
+    '{"responses": ["a", "b"]}',
+    '["a", "b"]',
+    '```json\n{"responses": ["a", "b"]}\n```',
+    '{"responses": [{"response": "a"}, "b"]}',
+])
+def test_parse_llm_batch_output(content):
+    assert lib.parse_llm_batch_output(content, 2) == [json.dumps({"response": "a"}), json.dumps({"response": "b"})]
+
+
+@pytest.mark.parametrize("content", ['{"responses": ["a"]}', "1", "not json", '{"responses": ["a", 2]}'])
+def test_parse_llm_batch_output_rejects_bad_replies(content):
+    with pytest.raises(ValueError):
+        lib.parse_llm_batch_output(content, 2)
+
+
+def test_parse_llm_batch_output_guards_bare_verdicts():
+    content = '{"responses": ["a", " 1 "]}'
+    assert lib.parse_llm_batch_output(content, 2, ["x", "ok 👍"]) == [
+        json.dumps({"response": "a"}), json.dumps({"response": lib._to_words_no_parens("ok 👍")})]
+    with pytest.raises(ValueError):
+        lib.parse_llm_batch_output(content, 2)
+
+
+def test_batcher_meaning_reuses_the_callers_analysis(monkeypatch):
+    def rescan(text):
+        raise AssertionError("text scanned again")
+    monkeypatch.setattr(lib, "_has_emoji", rescan)
+    batcher = LLMBatcher(BatchAwareClient())
+    out = asyncio.run(batcher.meaning("no emoji", analysis=lib.analyze_emoji("no emoji")))
+    assert json.loads(out) == {"response": "no emoji"}
+
+
+def test_parse_validator_batch_output():
+    assert lib.parse_validator_batch_output('{"verdicts": [1, "0", true, "maybe"]}', 4) == [1, 0, 1, None]
+    with pytest.raises(ValueError):
+        lib.parse_validator_batch_output('{"verdicts": [1]}', 2)
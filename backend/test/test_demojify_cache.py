@@ -0,0 +1,65 @@
+from demojify_lib import DemojifyResult
+from demojify_cache import LRUCache, SQLiteCache, TieredCache, cache_key
+
+
+def _res(text="hello", reason="llm_valid"):
+    return DemojifyResult(final_text=text, source="llm", standard_text="(hi)", llm_text=text, reason=reason)
+
+
+def test_cache_key_normalizes_whitespace_and_separates_mode():
+    assert cache_key("  lol   😂 ", "m", "auto") == cache_key("lol 😂", "m", "auto")
+    assert cache_key("lol 😂", "m", "auto") != cache_key("lol 😂", "m", "fused")
+    assert cache_key("lol 😂", "m", "auto") != cache_key("lol 😂", "other", "auto")
+    # chunked results keep the input's layout: paragraph breaks must not be normalized away
+    assert cache_key("a 😂\n\nb 🎉", "m", "auto", keep_layout=True) != cache_key("a 😂 b 🎉", "m", "auto",
+                                                                             keep_layout=True)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=None)
+    cache.put("a", _res("a")); cache.put("b", _res("b"))
+    assert cache.get("a").final_text == "a"  # "b" is now the oldest
+    cache.put("c", _res("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_lru_ttl_expiry(clock):
+    cache = LRUCache(max_entries=10, ttl=5, clock=clock)
+    cache.put("a", _res())
+    clock.now = 4
+    assert cache.get("a") is not None
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_error_results_are_not_cached():
+    cache = LRUCache()
+    for reason in ("llm_error: boom", "validator_error", "llm_empty_output"):
+        cache.put(reason, _res(reason=reason))
+        assert cache.get(reason) is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = SQLiteCache(path)
+    first.put("k", _res("persisted"))
+    first.close()
+
+    tiered = TieredCache(LRUCache(), SQLiteCache(path))
+    assert tiered.get("k") == _res("persisted")
+    assert tiered.memory.get("k") == _res("persisted")  # promoted
+    assert tiered.stats()["persistent"]["hits"] == 1
+
+
+def test_timings_are_not_cached(tmp_path):
+    res = _res()
+    res.timings = {"total": 1.0}
+    memory, sqlite = LRUCache(), SQLiteCache(str(tmp_path / "c.db"))
+    for cache in (memory, sqlite):
+        cache.put("k", res)
+        assert cache.get("k").timings is None
+    assert res.timings == {"total": 1.0}
@@ -0,0 +1,100 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+
+import demojify_cli as cli
+import demojify_lib as lib
+from fakes import completion
+
+LINES = [
+    json.dumps({"id": 1, "text": "LOL 😂😂"}, ensure_ascii=False),
+    "",
+    "not json",
+    json.dumps({"id": 2, "body": "no text field"}),
+    json.dumps({"id": 3, "text": "pizza 🍕🍺 night"}, ensure_ascii=False),
+]
+
+
+def _run(lines, **kwargs):
+    dst = io.StringIO()
+    n = cli.run(io.StringIO("\n".join(lines) + "\n"), dst, progress_interval=-1, **kwargs)
+    return n, dst.getvalue().splitlines()
+
+
+def test_jsonl_standard_keeps_order_and_reports_bad_lines():
+    n, out = _run(LINES, chunk_size=2)
+    assert n == len(LINES)
+    first, blank, bad, missing, last = out
+    assert json.loads(first)["output"] == lib.emoji_semantic_clean("LOL 😂😂")
+    assert json.loads(first)["reason"] == "rules_only"
+    assert blank == ""
+    assert json.loads(bad)["error"].startswith("invalid JSON")
+    assert "error" in json.loads(missing)
+    assert json.loads(last)["id"] == 3
+
+
+def test_process_pool_matches_in_process():
+    lines = [json.dumps({"i": i, "text": f"item {i} {'🔥' * (i % 3)}"}, ensure_ascii=False) for i in range(50)]
+    assert _run(lines, workers=2, chunk_size=7) == _run(lines, workers=0)
+
+
+def test_text_format():
+    _, out = _run(["hi 👋", "", "plain"], fmt="text")
+    assert out == [lib.emoji_semantic_clean("hi 👋"), "", lib.emoji_semantic_clean("plain")]
+
+
+def test_llm_mode_with_bounded_concurrency():
+    in_flight, peak = [0], [0]
+
+    async def create(*, messages, **kwargs):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        content = "1" if "evaluator" in messages[0]["content"] else json.dumps({"response": "plain words"})
+        return completion(content)
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    lines = [json.dumps({"text": f"msg {i} 😂"}, ensure_ascii=False) for i in range(12)] + ["not json"]
+    _, out = _run(lines, llm_client=client, llm_concurrency=3, chunk_size=5)
+    assert [json.loads(o).get("reason") for o in out[:12]] == ["llm_valid"] * 12
+    assert "error" in json.loads(out[12])
+    assert peak[0] <= 3
+
+
+def test_main_reads_and_writes_files(tmp_path):
+    src, dst = tmp_path / "in.jsonl", tmp_path / "out.jsonl"
+    src.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+    assert cli.main([str(src), "-o", str(dst), "--workers", "0", "--progress-interval", "-1"]) == 0
+    assert len(dst.read_text(encoding="utf-8").splitlines()) == len(LINES)
+
+
+class SlowLineClient:
+    """Async client whose rewrite of a 🐢 line is slow; records the order rewrites finish in."""
+
+    def __init__(self, answer="plain words"):
+        self.answer, self.finished = answer, []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, *, messages, **kwargs):
+        if "evaluator" in messages[0]["content"]:
+            return completion("1")
+        text = messages[-1]["content"].rsplit("Input:\n", 1)[1]
+        await asyncio.sleep(0.1 if "🐢" in text else 0)
+        self.finished.append(text.split()[0])
+        return completion(json.dumps({"response": self.answer}))
+
+
+def test_llm_mode_slow_line_does_not_stall_the_window():
+    client = SlowLineClient()
+    lines = ["l0 😂", "l1 🐢", "l2 😂", "l3 😂", "l4 😂", "l5 😂"]
+    _, out = _run(lines, fmt="text", llm_client=client, llm_concurrency=2, chunk_size=4)
+    assert out == ["plain words"] * 6
+    # l4 is dispatched as soon as l0 is written, while l1 is still running
+    assert client.finished.index("l1") == 4
+
+
+def test_llm_text_output_stays_one_line_per_input():
+    _, out = _run(["hi 👋", "bye 👋"], fmt="text", llm_client=SlowLineClient(answer="two\nlines"))
+    assert out == ["two lines", "two lines"]
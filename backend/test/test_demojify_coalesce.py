@@ -0,0 +1,77 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from demojify_coalesce import AsyncSingleFlight, SingleFlight
+
+
+def test_sync_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    runs = []
+    release = threading.Event()
+
+    def work():
+        runs.append(1)
+        release.wait(2)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", work))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while flight.calls < 8:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert results == ["done"] * 8
+    assert len(runs) == 1
+    assert flight.stats() == {"calls": 8, "executions": 1, "coalesced": 7, "in_flight": 0}
+
+
+def test_sync_single_flight_propagates_errors_and_forgets_key():
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    assert flight.do("k", lambda: 42) == 42
+
+
+def test_async_single_flight_coalesces_concurrent_calls():
+    flight = AsyncSingleFlight()
+    runs = []
+
+    async def work(x):
+        runs.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        same = [flight.do("a", lambda: work(1)) for _ in range(20)]
+        other = flight.do("b", lambda: work(5))
+        return await asyncio.gather(*same, other)
+
+    out = asyncio.run(main())
+    assert out == [2] * 20 + [10]
+    assert sorted(runs) == [1, 5]
+    assert flight.stats() == {"calls": 21, "executions": 2, "coalesced": 19, "in_flight": 0}
+
+
+def test_async_single_flight_survives_leader_cancellation():
+    flight = AsyncSingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "ok"
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import demojify_lib as lib
+from demojify_emoji_table import build_table, load_table
+
+emoji = pytest.importorskip("emoji")
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TRICKY = [
+    "hi 👋🏽 and 👍🏻👍🏻",
+    "family 👨‍👩‍👧 coder 👩‍💻 mage 🧙🏾‍♂️",
+    "non-RGI 👩🏿‍👧🏻 join and 🧝‍ dangling joiner",
+    "flags 🇺🇸🇯🇵 🏴󠁧󠁢󠁳󠁣󠁴󠁿 and a broken 🏴󠁧󠁢 tag",
+    "keycaps 1️⃣ #⃣ text style ☺︎ stray ︎︀ ️selectors",
+    "no emoji at all, just text!",
+]
+
+
+def _reference_words(text):
+    # the library-based _to_words_no_parens this table replaced
+    def cb(e, data=None):
+        name = lib._SKIN_TONE_RE.sub("", emoji.demojize(e, language="en").strip(":").replace("_", " ").lower()).strip()
+        return " " + lib.EMOJI_NAME_FALLBACKS.get(name, name) + " "
+    return lib._MULTISPACE_RE.sub(" ", emoji.replace_emoji(text, replace=cb)).strip()
+
+
+def test_shipped_table_matches_installed_emoji():
+    # stale? rebuild with: python backend/demojify_emoji_table.py
+    assert load_table() == build_table()
+
+
+def test_missing_file_builds_from_package(tmp_path):
+    assert load_table(str(tmp_path / "missing.json")) == build_table()
+
+
+@pytest.mark.parametrize("text", TRICKY)
+def test_lookups_match_emoji_library(text):
+    assert lib._to_words_no_parens(text) == _reference_words(text)
+    assert lib._has_emoji(text) == bool(emoji.emoji_list(text))
+
+
+def test_names_are_skin_tone_free():
+    assert lib._emoji_name("👍🏽") == "thumbs up"
+    assert lib._emoji_name("🏽") == "medium"
+    assert lib._emoji_name("not an emoji") is None
+    assert lib._to_words_no_parens("ok 👍🏽 ❤️") == "ok okay love"
+
+
+def test_cold_rules_path_imports_neither_emoji_nor_asyncio():
+    # the point of the shipped table: a cold process cleans text without these imports
+    code = ("import sys, demojify_lib as lib; lib.emoji_semantic_clean('hi 😂'); "
+            "print(sorted({'emoji', 'asyncio'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+import demojify_lib as lib
+from demojify_endpoints import Endpoint, EndpointPool
+from fakes import completion
+from loadtest.stub_server import StubConfig, create_app
+
+
+def _stub(name, latency="fixed:0", **cfg):
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(StubConfig(latency=latency, seed=1, **cfg))))
+    client = AsyncOpenAI(base_url="http://stub/v1", api_key="x", http_client=http, max_retries=0)
+    return Endpoint(client, "stub-model", name=name)
+
+
+def test_hedge_to_second_endpoint_and_cancel_loser():
+    pool = EndpointPool([_stub("slow", "fixed:2000"), _stub("fast", "fixed:10")], hedge_initial_s=0.05)
+    start = time.perf_counter()
+    res = asyncio.run(lib.ademojify("great job 👍", pool))
+    assert time.perf_counter() - start < 1.0
+    assert res.reason == "llm_valid"
+    stats = pool.stats()
+    assert stats["hedges"] >= 1 and stats["hedge_wins"] >= 1
+    slow, fast = stats["endpoints"]
+    assert slow["cancelled"] >= 1 and slow["wins"] == 0 and slow["in_flight"] == 0
+    assert fast["wins"] == 2
+
+
+def test_errors_fail_over_immediately():
+    pool = EndpointPool([_stub("broken", error_rate=1.0), _stub("ok")], hedge_percentile=None)
+    res = asyncio.run(lib.ademojify("party 🎉", pool))
+    assert res.reason == "llm_valid"
+    assert pool.stats()["failovers"] >= 1 and pool.stats()["endpoints"][0]["errors"] >= 1
+
+    dead = EndpointPool([_stub("a", error_rate=1.0), _stub("b", error_rate=1.0)])
+    assert asyncio.run(lib.ademojify("party 🎉", dead)).reason.startswith("llm_error")
+
+
+def test_routes_to_the_faster_endpoint():
+    pool = EndpointPool([_stub("slow", "fixed:40"), _stub("fast", "fixed:5")], hedge_percentile=None,
+                        probe_every=0)
+
+    async def run():
+        for _ in range(10):
+            await lib.ademojify("nice 👍", pool)
+
+    asyncio.run(run())
+    slow, fast = pool.stats()["endpoints"]
+    assert slow["calls"] == 1 and fast["calls"] == 19  # one sample each, then the fast one
+    assert fast["p95_ms"] < slow["ewma_ms"]
+
+
+def test_hedge_delay_follows_latency_percentile():
+    ep = _stub("e")
+    pool = EndpointPool([ep], hedge_percentile=0.9, hedge_min_s=0.01, hedge_initial_s=0.5, min_samples=10)
+    assert pool.hedge_delay(ep) == 0.5
+    for ms in range(1, 11):
+        ep.started()
+        ep.succeeded(ms / 100.0)
+    assert pool.hedge_delay(ep) == pytest.approx(0.09)
+    assert EndpointPool([ep], hedge_percentile=None).hedge_delay(ep) is None
+
+
+class SleepyClient:
+    def __init__(self, delay, content=json.dumps({"response": "ok then"})):
+        self.delay, self.content, self.calls = delay, content, 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.content is None:
+            return SimpleNamespace(choices=[])
+        return completion(self.content)
+
+
+def test_sync_pool_hedges_and_skips_invalid_replies():
+    slow, fast = SleepyClient(1.0), SleepyClient(0.0)
+    pool = EndpointPool([Endpoint(slow, "m"), Endpoint(fast, "m")], hedge_initial_s=0.05)
+    start = time.perf_counter()
+    assert lib._create_chat_completion(pool, model="x", messages=[]).choices[0].message.content
+    assert time.perf_counter() - start < 0.5
+    assert pool.stats()["hedge_wins"] == 1
+
+    empty = EndpointPool([Endpoint(SleepyClient(0.0, content=None)), Endpoint(SleepyClient(0.0))])
+    assert lib._create_chat_completion(empty, model="x", messages=[]).choices
+    assert empty.stats()["failovers"] == 1
+    pool.shutdown(), empty.shutdown()
+
+
+def test_mixed_client_kinds_rejected():
+    with pytest.raises(ValueError):
+        EndpointPool([_stub("async"), Endpoint(SleepyClient(0.0))])
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+import demojify_lib as lib
+from demojify_learned import LearnedPhrases, phrase_key
+from fakes import FakeClient
+
+
+def _key(text):
+    return phrase_key(lib.analyze_emoji(text))
+
+
+def test_phrase_key_ignores_case_elongation_punctuation_and_repeats():
+    assert _key("LOL soooo funny 😂😂!!") == _key("lol  sooo funny 😂") == "lol soo funny :face with tears of joy:"
+    assert _key("ok 👍🏽") == _key("ok 👍") != _key("ok 👎")
+
+
+@pytest.mark.parametrize("a, b", [
+    ("50% off 🔥", "50 off 🔥"),
+    ("$5 🔥", "5 🔥"),
+    ("-5 degrees 🥶", "5 degrees 🥶"),
+    ("2+2 🤔", "2 2 🤔"),
+    ("can't wait 🎉", "can t wait 🎉"),
+    ("1000 likes 🔥", "100 likes 🔥"),
+])
+def test_phrase_key_keeps_meaningful_symbols(a, b):
+    assert _key(a) != _key(b)
+
+
+def test_phrase_key_normalizes_case_spacing_and_apostrophes():
+    assert _key("Can’t   WAIT!! 🎉") == _key("can't wait 🎉") == "can't wait :party popper:"
+
+
+def test_phrase_key_separates_questions_from_statements():
+    assert _key("you ok?? 😢") == _key("You ok ? 😢") == "you ok ? :crying face:"
+    assert _key("you ok? 😢") != _key("you ok 😢") == _key("you ok! 😢")
+
+
+def test_promoted_after_min_count_then_answered_locally(fake_client):
+    learned = LearnedPhrases(min_count=3)
+    client = fake_client
+    for text in ("LOL soooo funny 😂😂", "lol sooo funny 😂", "Lol soo funny 😂!"):
+        assert lib.demojify(text, client, learned=learned).reason == "llm_valid"
+    assert client.calls == 6 and learned.stats()["rules"] == 1
+
+    res = lib.demojify("LOL SOOOOO FUNNY 😂😂😂", client, learned=learned)
+    assert (res.final_text, res.source, res.reason) == ("That is hilarious!", "llm", "learned_rule")
+    assert res.standard_text == lib.emoji_semantic_clean("LOL SOOOOO FUNNY 😂😂😂")
+    assert client.calls == 6
+
+    ares = asyncio.run(lib.ademojify("lol soo funny 😂", client, learned=learned))
+    assert ares.reason == "learned_rule" and client.calls == 6
+    assert learned.stats()["hits"] == 2
+
+
+def test_disagreeing_rewrites_are_not_promoted():
+    learned = LearnedPhrases(min_count=2, min_agreement=0.8)
+    a = lib.analyze_emoji("see you 👋")
+    for phrase in ("See you, bye!", "See you, bye!", "Goodbye then."):
+        learned.observe(a, phrase)
+    assert learned.lookup(a) is None
+    for _ in range(6):
+        learned.observe(a, "See you, bye!")
+    assert learned.lookup(a) == "See you, bye!"
+
+
+def test_only_validated_rewrites_are_recorded():
+    learned = LearnedPhrases(min_count=1)
+    assert lib.demojify("meh 🙃", FakeClient(verdict="0"), learned=learned).reason == "validator_rejected"
+    assert len(learned) == 0
+
+
+def test_bounded_lru():
+    learned = LearnedPhrases(min_count=1, max_entries=2)
+    for text in ("a 🍕", "b 🍕", "c 🍕"):
+        learned.observe(lib.analyze_emoji(text), text.upper())
+    assert set(learned.rules()) == {_key("b 🍕"), _key("c 🍕")}
+    assert learned.stats()["evictions"] == 1
+
+
+def test_export_import_round_trip(tmp_path):
+    warm = LearnedPhrases(min_count=2)
+    a = lib.analyze_emoji("party 🎉")
+    warm.observe(a, "Let's celebrate!")
+    warm.observe(a, "Let's celebrate!")
+    path = str(tmp_path / "learned.json")
+    warm.save_file(path)
+
+    replica = LearnedPhrases(min_count=2)
+    assert replica.load_file(path) == 1
+    assert replica.lookup(a) == "Let's celebrate!"
+    assert replica.export() == warm.export()
+    assert LearnedPhrases().load_file(str(tmp_path / "missing.json")) == 0
+    with pytest.raises(ValueError):
+        replica.load({"format": 99})
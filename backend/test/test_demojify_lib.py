@@ -0,0 +1,314 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import demojify_lib as lib
+from demojify_lib import SemanticCleaner
+from fakes import FakeAsyncClient, FakeClient, completion
+
+
+def test_semantic_clean_known_outputs():
+    assert lib.emoji_semantic_clean("That exam was 😭 but I finally passed 🎉") == \
+        "that exam was (crying) but i finally passed (congrats)"
+    assert lib.emoji_semantic_clean("LOL soooo funny 😂😂") == "lol soo funny!"
+    assert lib.emoji_semantic_clean("pizza night 🍕🍺", keep_case=True) == "pizza night (pizza and beer)"
+
+
+def test_semantic_cleaner_custom_map():
+    cleaner = SemanticCleaner(emoji_map={**lib.EMOJI_MAP, "🦄": "magical"})
+    assert cleaner.clean("so rare 🦄") == "so rare (magical)"
+    # the shared default instance is unaffected
+    assert lib.emoji_semantic_clean("so rare 🦄") == "so rare (unicorn)"
+
+
+def test_semantic_cleaner_is_reusable():
+    cleaner = SemanticCleaner()
+    first = cleaner.clean("Nice 😂")
+    assert cleaner.clean("Nice 😂") == first == lib.emoji_semantic_clean("Nice 😂")
+
+
+def test_tokenize_single_pass_stream():
+    toks, had_repeat = SemanticCleaner().tokenize(
+        "LOL 😂😂 pizza 🍕🍺 soooo 👍🏽")
+    assert toks == ["lol", "(laughing)", "pizza", "(pizza", "and", "beer)", "soo", "(okay)"]
+    assert had_repeat is True
+
+
+def test_custom_combos_longest_match():
+    cleaner = SemanticCleaner(combos={"🍕🍺": "pizza and beer", "🍕🍺🎉": "pizza party"})
+    assert cleaner.clean("friday 🍕🍺🎉") == "friday (pizza party)"
+    assert cleaner.clean("friday 🍕🍺") == "friday (pizza and beer)"
+
+
+def test_combo_keys_must_be_emoji():
+    with pytest.raises(ValueError):
+        SemanticCleaner(combos={"lol😂": "funny"})
+
+
+def test_demojify_sync_pipeline():
+    client = FakeClient()
+    res = lib.demojify("LOL 😂😂", client)
+    assert (res.final_text, res.source, res.reason) == ("That is hilarious!", "llm", "llm_valid")
+    assert res.standard_text == lib.emoji_semantic_clean("LOL 😂😂")
+    assert client.calls == 2
+
+
+@pytest.mark.parametrize("client_cls", [FakeClient, FakeAsyncClient])
+def test_ademojify_matches_sync(client_cls):
+    res = asyncio.run(lib.ademojify("LOL 😂😂", client_cls(verdict="0")))
+    assert res == lib.demojify("LOL 😂😂", FakeClient(verdict="0"))
+    assert res.reason == "validator_rejected"
+
+
+@pytest.mark.parametrize("prevalidate", [None, lib.LocalGate()])
+def test_stage_timings_attached_on_request(prevalidate):
+    res = lib.demojify("LOL 😂😂", FakeClient(), timings=True, prevalidate=prevalidate)
+    assert {"standard", "llm", "parse", "total"} <= set(res.timings)
+    assert ("local_gate" if prevalidate else "validator") in res.timings
+    assert all(ms >= 0 for ms in res.timings.values())
+    assert lib.demojify("LOL 😂😂", FakeClient()).timings is None
+
+    ares = asyncio.run(lib.ademojify("LOL 😂😂", FakeAsyncClient(), timings=True))
+    assert {"standard", "llm", "parse", "validator", "total"} <= set(ares.timings)
+
+
+def test_emoji_analysis_shared_by_stages():
+    a = lib.analyze_emoji("LOL 😂😂 soooo 👍🏽")
+    assert a.has_emoji and [e for _, _, e in a.spans] == ["😂", "😂", "👍🏽"]
+    assert a.spans[0][:2] == (4, 5) and a.repeats == (("😂", 2),)
+    assert lib.emoji_semantic_clean(a.text, analysis=a) == lib.emoji_semantic_clean(a.text)
+
+    plain = lib.analyze_emoji("just words")
+    assert not plain.has_emoji and plain.repeats == ()
+    client = FakeClient()
+    assert json.loads(lib.emoji_to_meaning(client, plain.text, analysis=plain)) == {"response": "just words"}
+    assert lib.evaluate_consistency_zero_one(client, "just words", "just words", analysis=plain) == 1
+    assert client.calls == 0
+
+
+@pytest.mark.parametrize("client_cls", [FakeClient, FakeAsyncClient])
+def test_emoji_free_input_skips_every_stage(client_cls, monkeypatch):
+    monkeypatch.setattr(lib, "emoji_semantic_clean", lambda *a, **k: pytest.fail("rules engine ran"))
+    client = client_cls()
+    if client_cls is FakeClient:
+        res = lib.demojify("  Sooo plain, no emoji  ", client, timings=True)
+    else:
+        res = asyncio.run(lib.ademojify("  Sooo plain, no emoji  ", client, timings=True))
+    assert (res.final_text, res.source, res.reason) == ("Sooo plain, no emoji", "standard", "no_emoji")
+    assert client.calls == 0
+    assert set(res.timings) == {"analyze", "total"}
+
+
+def test_no_log_formatting_at_info(monkeypatch, caplog):
+    class Loud:
+        def __repr__(self):
+            raise AssertionError("formatted a debug record")
+
+    monkeypatch.setattr(lib, "parse_llm_demojify_output", lambda raw: "That is hilarious!")
+    monkeypatch.setattr(lib, "emoji_to_meaning", lambda client, text, **k: Loud())
+    with caplog.at_level("INFO", logger="demojify"):
+        res = lib.demojify("LOL 😂😂", FakeClient())
+    assert res.reason == "llm_valid"
+    assert not caplog.records
+
+
+def test_ademojify_llm_error_falls_back():
+    class Broken:
+        chat = SimpleNamespace(completions=SimpleNamespace(create=None))
+    res = asyncio.run(lib.ademojify("Nice 😂", Broken()))
+    assert res.source == "standard" and res.reason.startswith("llm_error")
+    assert res.final_text == lib.emoji_semantic_clean("Nice 😂")
+
+
+def test_ademojify_many_in_flight():
+    client = FakeAsyncClient(delay=0.05)
+
+    async def run():
+        return await asyncio.gather(*(lib.ademojify(f"msg {i} 🎉", client) for i in range(200)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    assert all(r.reason == "llm_valid" for r in results)
+    # two sequential 50 ms calls each; serial execution would take ~20 s
+    assert time.perf_counter() - start < 2.0
+
+
+@pytest.mark.parametrize("standard, llm, expected", [
+    ("lol soo funny!", "That's hilarious!", 1),                 # meaning families: lol ~ hilarious
+    ("great job (congrats)", "Great job, congratulations!", 1),
+    ("lol soo funny (laughing)!", "hello world!", 0),           # nothing in common
+    ("(congrats)", "Well done!", None),                         # too short to reject locally
+    ("that exam was (crying) but i finally passed (congrats)",
+     "That exam was really tough, but I finally passed and I'm so relieved.", None),
+    # inverted or missing emoji meaning: never accepted locally, however many words match
+    ("my dog ran away from home this morning and i am (crying)",
+     "My dog ran away from home this morning and I am so happy.", None),
+    ("great job on the report you finished (eyeroll)", "Great job on the report you finished!", None),
+    ("so tired today (laughing hard)", "So tired today, hard day.", None),
+    ("my red car (love)", "My red car.", None),
+    # a negator added (or dropped) flips the meaning: the LLM validator decides
+    ("i love this (love)", "I do not love this", None),
+    ("you did it (congrats)", "You did not do it, no congrats", None),
+    ("i love this (love)", "I love this", 1),
+])
+def test_local_consistency(standard, llm, expected):
+    assert lib.local_consistency(standard, llm) == expected
+
+
+def test_prevalidate_skips_llm_validator_on_clear_cases():
+    gate = lib.LocalGate()
+    accept = FakeClient(response="That is hilarious!")
+    res = lib.demojify("LOL soooo funny 😂😂", accept, prevalidate=gate)
+    assert (res.source, res.reason) == ("llm", "local_accept")
+    assert accept.calls == 1
+
+    reject = FakeAsyncClient(response="The weather is nice today.")
+    res = asyncio.run(lib.ademojify("lol so funny, cannot stop 😂😂", reject, prevalidate=gate))
+    assert (res.source, res.reason) == ("standard", "local_reject")
+    assert reject.calls == 1
+
+
+def test_prevalidate_ambiguous_goes_to_llm_validator():
+    client = FakeClient(response="Well done!", verdict="1")
+    res = lib.demojify("🎉", client, prevalidate=lib.LocalGate())
+    assert res.reason == "llm_valid"
+    assert client.calls == 2
+
+
+@pytest.mark.parametrize("content, expected", [
+    ('{"response": "hi there"}', "hi there"),
+    ('```json\n{"response": "hi there"}\n```', "hi there"),
+    ('Sure! Here you go: {"response": "hi there"} Hope it helps.', "hi there"),
+    ('{"response": null}', ""),
+    ('response: hi there', "hi there"),
+])
+def test_parse_llm_output_hardened(content, expected):
+    assert lib.parse_llm_demojify_output(content) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("1", 1), ("`0`", 0), ("Answer: 1.", 1), (True, 1), (False, 0), (1, 1), (2, None),
+    ("true", 1), ("No", 0), ("maybe", None), (None, None),
+])
+def test_extract_verdict_hardened(raw, expected):
+    assert lib._extract_verdict_char(raw) == expected
+
+
+class FakeFusedClient(FakeClient):
+    def __init__(self, reply):
+        super().__init__()
+        self.reply = reply
+
+    def create(self, *, messages, **kwargs):
+        self.calls += 1
+        return completion(self.reply)
+
+
+@pytest.mark.parametrize("reply, source, reason", [
+    ('{"response": "That is hilarious!", "consistent": 1}', "llm", "llm_valid"),
+    ('```json\n{"response": "That is hilarious!", "consistent": "0"}\n```', "standard", "validator_rejected"),
+    ('{"response": "That is hilarious!"}', "standard", "validator_error"),
+    ("1", "standard", "llm_empty_output"),
+])
+def test_fused_mode_single_call(reply, source, reason):
+    client = FakeFusedClient(reply)
+    res = lib.demojify("LOL 😂😂", client, fused=True)
+    assert (res.source, res.reason) == (source, reason)
+    assert client.calls == 1
+    if source == "standard":
+        assert res.final_text == lib.emoji_semantic_clean("LOL 😂😂")
+    assert asyncio.run(lib.ademojify("LOL 😂😂", FakeFusedClient(reply), fused=True)) == res
+
+
+class SlowClient(FakeClient):
+    """Sync client whose rewrite/validator calls take the given number of seconds."""
+
+    def __init__(self, rewrite_delay=0.0, validator_delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.delays = (rewrite_delay, validator_delay)
+        self.timeouts = []
+
+    def create(self, *, messages, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        is_validator = "evaluator" in messages[0]["content"]
+        time.sleep(self.delays[is_validator])
+        return self._answer(messages)
+
+
+def test_sync_deadline_on_slow_rewrite():
+    client = SlowClient(rewrite_delay=0.5)
+    start = time.perf_counter()
+    res = lib.demojify("Nice 😂", client, deadline=0.1)
+    assert time.perf_counter() - start < 0.3
+    assert (res.source, res.reason, res.llm_text) == ("standard", "deadline_exceeded", None)
+    assert res.final_text == lib.emoji_semantic_clean("Nice 😂")
+    assert client.timeouts[0] == pytest.approx(0.06, abs=0.02)  # rewrite share forwarded to the SDK
+
+
+def test_sync_deadline_on_slow_validator_keeps_llm_text():
+    res = lib.demojify("Nice 😂", SlowClient(validator_delay=0.5), deadline=0.1)
+    assert res.reason == "deadline_exceeded" and res.llm_text == "That is hilarious!"
+
+
+def test_async_deadline_cancels_llm_call():
+    client = FakeAsyncClient(delay=1.0)
+    start = time.perf_counter()
+    res = asyncio.run(lib.ademojify("Nice 😂", client, deadline=0.05))
+    assert time.perf_counter() - start < 0.5
+    assert (res.source, res.reason) == ("standard", "deadline_exceeded")
+
+
+def test_deadline_not_hit():
+    res = asyncio.run(lib.ademojify("Nice 😂", FakeAsyncClient(delay=0.01), deadline=1.0))
+    assert res.reason == "llm_valid"
+
+
+DOC = ("No emojis in this opening line.\n\n"
+       "Party tonight 🎉 at eight! Bring snacks 🍕.\n\n\n"
+       "Plain middle paragraph.\n\n"
+       "Love you ❤️ so much!")
+
+
+def test_split_chunks_keeps_layout_and_emoji_with_sentence():
+    text = "Great job! 🎉 🎉 See you soon. Bye 👋\n\nNext one."
+    chunks = lib.split_chunks(text, 20)
+    assert [text[s:e] for s, e in chunks] == ["Great job! 🎉 🎉", "See you soon. Bye 👋", "Next one."]
+    assert lib.split_chunks(text, 1000) == [(0, 34), (36, 45)]  # paragraphs always split
+    assert lib.split_chunks("one very long sentence 😂 without any break", 5) == [(0, 42)]
+
+
+class FailingPizzaClient(FakeAsyncClient):
+    async def create(self, *, messages, **kwargs):
+        if "🍕" in messages[-1]["content"]:
+            raise RuntimeError("boom")
+        return await super().create(messages=messages, **kwargs)
+
+
+def test_chunked_document_converted_concurrently():
+    client = FakeAsyncClient(response="REWRITE", delay=0.1)
+    start = time.perf_counter()
+    res = asyncio.run(lib.ademojify(DOC, client, chunk_chars=30, timings=True))
+    assert time.perf_counter() - start < 0.35  # 3 chunks x (rewrite + validator), not 0.6s in sequence
+    assert client.calls == 6
+    assert (res.source, res.reason) == ("llm", "chunked")
+    assert res.final_text == ("No emojis in this opening line.\n\nREWRITE REWRITE\n\n\n"
+                              "Plain middle paragraph.\n\nREWRITE")
+    assert {"analyze", "split", "chunks", "total"} <= set(res.timings)
+    assert lib.demojify(DOC, FakeClient(response="REWRITE"), chunk_chars=30) == res
+    assert asyncio.run(lib.ademojify(DOC, FakeAsyncClient(), chunk_chars=5000)).reason == "llm_valid"
+
+
+def test_chunk_fallback_is_per_chunk():
+    res = asyncio.run(lib.ademojify(DOC, FailingPizzaClient(response="REWRITE"), chunk_chars=30))
+    assert res.reason == "chunked: llm_error: boom" and res.source == "llm"
+    assert "REWRITE " + lib.emoji_semantic_clean("Bring snacks 🍕.") + "\n\n\n" in res.final_text
+    assert res.final_text.endswith("\n\nREWRITE")
+
+
+def test_chunk_chains_counts_concurrent_llm_chains():
+    assert lib.chunk_chains(DOC, 30) == 3
+    assert lib.chunk_chains(DOC, 30, concurrency=2) == 2
+    assert lib.chunk_chains(DOC, 5000) == lib.chunk_chains(DOC, None) == 1
@@ -0,0 +1,90 @@
+import asyncio
+
+import demojify_lib as lib
+from demojify_live import LiveSessions
+
+DOC = "Party tonight 🎉. Bring snacks 🍕!\n\nNo emoji here. See you 👋"
+
+
+class Runner:
+    def __init__(self):
+        self.seen = []
+
+    async def __call__(self, segment):
+        self.seen.append(segment)
+        out = segment.upper()
+        return lib.DemojifyResult(final_text=out, source="llm", standard_text=out, llm_text=out, reason="llm_valid")
+
+
+def _convert(live, session, text, run, **kw):
+    return asyncio.run(live.convert(session, text, run, **kw))
+
+
+def test_only_changed_segments_are_reconverted():
+    live, run = LiveSessions(), Runner()
+    session = live.get()
+    first = _convert(live, session, DOC, run)
+    assert run.seen == ["Party tonight 🎉.", "Bring snacks 🍕!", "See you 👋"]
+    assert first.output == "PARTY TONIGHT 🎉. BRING SNACKS 🍕!\n\nNo emoji here. SEE YOU 👋"
+    assert [s.changed for s in first.segments] == [True] * 4 and first.converted == 3
+
+    run.seen.clear()
+    edited = _convert(live, session, DOC.replace("snacks", "drinks"), run)
+    assert run.seen == ["Bring drinks 🍕!"]
+    assert (edited.converted, edited.reused) == (1, 3)
+    assert [s.changed for s in edited.segments] == [False, True, False, False]
+    for seg in edited.segments:
+        assert edited.output[seg.start:seg.end] in ("PARTY TONIGHT 🎉.", "BRING DRINKS 🍕!", "No emoji here.",
+                                                    "SEE YOU 👋")
+
+
+def test_repeated_sentences_and_modes_are_keyed_separately():
+    live, run = LiveSessions(), Runner()
+    session = live.get()
+    _convert(live, session, "Yay 🎉. Yay 🎉.", run)
+    assert run.seen == ["Yay 🎉."]
+    _convert(live, session, "Yay 🎉.", run, mode="fused")
+    assert run.seen == ["Yay 🎉.", "Yay 🎉."]
+
+
+def test_standard_mode_cleans_every_segment():
+    live, seen = LiveSessions(), []
+
+    async def standard(segment):
+        seen.append(segment)
+        out = lib.emoji_semantic_clean(segment)
+        return lib.DemojifyResult(final_text=out, source="standard", standard_text=out, llm_text=None,
+                                  reason="rules_only")
+
+    res = _convert(live, live.get(), "No emoji HERE. Party 🎉", standard, mode="standard")
+    assert seen == ["No emoji HERE.", "Party 🎉"]
+    assert res.output == lib.emoji_semantic_clean("No emoji HERE.") + " " + lib.emoji_semantic_clean("Party 🎉")
+
+
+def test_transient_results_are_retried():
+    live, calls = LiveSessions(), []
+
+    async def flaky(segment):
+        calls.append(segment)
+        out = lib.emoji_semantic_clean(segment)
+        return lib.DemojifyResult(final_text=out, source="standard", standard_text=out, llm_text=None,
+                                  reason="llm_error: boom")
+
+    session = live.get()
+    _convert(live, session, "Nice 👍", flaky)
+    _convert(live, session, "Nice 👍", flaky)
+    assert calls == ["Nice 👍", "Nice 👍"]
+
+
+def test_sessions_expire_and_are_bounded():
+    now = [0.0]
+    live = LiveSessions(max_sessions=2, ttl_s=10, clock=lambda: now[0])
+    a = live.get()
+    assert live.get(a.session_id) is a
+    live.get(), live.get()
+    assert live.stats()["evicted"] == 1 and live.get(a.session_id) is not a
+    now[0] = 100.0
+    assert live.stats()["sessions"] == 0
+    minted = live.get("client-chosen")
+    assert minted.session_id != "client-chosen" and len(minted.session_id) == 32
+    assert live.get(minted.session_id) is minted
@@ -0,0 +1,59 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import demojify_lib as lib
+from demojify_metrics import Histogram, MeteredClient, PipelineMetrics
+from fakes import completion
+
+
+class UsageClient:
+    def __init__(self):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, *, messages, **kwargs):
+        if messages[0]["content"] == lib.VALIDATOR_SYSTEM:
+            return completion("1", prompt_tokens=50, completion_tokens=1)
+        return completion(json.dumps({"response": "That is hilarious!"}), prompt_tokens=100, completion_tokens=7)
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("lat_seconds", "help", ("stage",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v, stage="x")
+    lines = h.render()
+    assert 'lat_seconds_bucket{stage="x",le="0.1"} 1' in lines
+    assert 'lat_seconds_bucket{stage="x",le="1.0"} 2' in lines
+    assert 'lat_seconds_bucket{stage="x",le="+Inf"} 3' in lines
+    assert 'lat_seconds_count{stage="x"} 3' in lines
+
+
+def test_metered_client_counts_tokens_and_pipeline_outcomes():
+    metrics = PipelineMetrics()
+    client = MeteredClient(UsageClient(), metrics)
+    res = asyncio.run(lib.ademojify("LOL 😂😂", client, timings=True))
+    metrics.observe_verdict(res)
+    metrics.observe_result(res)
+    metrics.observe_stages(res.timings)
+
+    assert metrics.tokens.value(call="rewrite", type="prompt") == 100
+    assert metrics.tokens.value(call="validator", type="completion") == 1
+    assert metrics.llm_calls.value(call="rewrite", outcome="ok") == 1
+    assert metrics.stage_seconds.count(stage="emoji_to_meaning") == 1
+    assert metrics.stage_seconds.count(stage="evaluate_consistency_zero_one") == 1
+    assert metrics.validator_accept_rate() == 1.0
+
+    body = metrics.render()
+    assert 'demojify_requests_total{source="llm",reason="llm_valid"} 1' in body
+    assert "demojify_validator_accept_ratio 1.0" in body
+
+
+def test_error_reasons_do_not_explode_label_cardinality():
+    metrics = PipelineMetrics()
+    for msg in ("timeout", "connection reset"):
+        metrics.observe_result(SimpleNamespace(source="standard", reason=f"llm_error: {msg}"))
+    metrics.observe_result(SimpleNamespace(source="standard", reason="validator_rejected"))
+    assert metrics.requests.value(source="standard", reason="llm_error") == 2
+    assert metrics.validator_accept_rate() is None  # serving a response is not a verdict
+    metrics.observe_verdict(SimpleNamespace(source="standard", reason="validator_rejected"))
+    assert metrics.validator_accept_rate() == 0.0
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+import demojify_lib as lib
+from demojify_pool import CleanPool
+
+TEXTS = [f"message {i} {'😂' * (i % 3)} pizza 🍕🍺 🇺🇸" for i in range(40)]
+
+
+@pytest.fixture(scope="module")
+def pool():
+    p = CleanPool(workers=2, min_chars=200, chunk_size=8)
+    p.start()
+    yield p
+    p.shutdown()
+
+
+def test_small_inputs_stay_inline(pool):
+    before = pool.stats()
+    assert asyncio.run(pool.clean("hi 👋")) == lib.emoji_semantic_clean("hi 👋")
+    assert pool.stats()["inline"] == before["inline"] + 1
+    assert pool.stats()["offloaded"] == before["offloaded"]
+
+
+def test_large_input_offloaded_with_identical_output(pool):
+    text = " ".join(TEXTS)
+    assert asyncio.run(pool.clean(text)) == lib.emoji_semantic_clean(text)
+    assert pool.stats()["offloaded"] >= 1
+
+
+def test_batch_chunked_in_order(pool):
+    chunks = pool.stats()["chunks"]
+    assert asyncio.run(pool.clean_batch(TEXTS)) == lib.emoji_semantic_clean_batch(TEXTS)
+    assert pool.stats()["chunks"] == chunks + 5
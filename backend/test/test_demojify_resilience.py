@@ -0,0 +1,209 @@
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from demojify_lib import CircuitOpenError, ademojify, demojify
+from demojify_resilience import AdmissionController, BreakerClient, CircuitBreaker, OverloadedError
+from fakes import completion
+
+
+class FlakyClient:
+    """Sync OpenAI-style client that fails while `failing` is set."""
+
+    def __init__(self):
+        self.failing, self.calls = False, 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, *, messages, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("provider down")
+        if "evaluator" in messages[0]["content"]:
+            return completion("1")
+        return completion(json.dumps({"response": "That is hilarious!"}))
+
+
+class FlakyAsyncClient(FlakyClient):
+    async def create(self, *, messages, **kwargs):
+        return super().create(messages=messages, **kwargs)
+
+
+def test_breaker_opens_on_failure_rate_and_recovers_via_probes(clock):
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4, window_s=10, open_s=5, half_open_probes=2, clock=clock)
+    for ok in (True, False, True):
+        breaker.record(ok)
+    assert breaker.state == "closed"
+    breaker.record(False)  # 2/4 failed
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 5.0
+    assert breaker.state == "half_open"
+    assert breaker.allow() and breaker.allow()
+    assert not breaker.allow()  # only two probes
+    breaker.record(True)
+    breaker.record(True)
+    assert breaker.state == "closed"
+    assert breaker.stats()["opened"] == 1 and breaker.stats()["rejected"] == 2
+
+
+def test_breaker_failed_probe_reopens_and_window_forgets_old_failures(clock):
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, window_s=10, open_s=5, half_open_probes=1, clock=clock)
+    breaker.record(False)
+    clock.now = 20.0  # first failure left the window
+    breaker.record(True)
+    assert breaker.state == "closed"
+
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == "open"
+    clock.now = 30.0
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == "open"
+
+
+def test_breaker_counts_slow_calls_as_failures(clock):
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, slow_call_s=1.0, clock=clock)
+    breaker.record(True, latency_s=2.0)
+    breaker.record(True, latency_s=3.0)
+    assert breaker.state == "open"
+
+
+def test_open_circuit_short_circuits_to_standard():
+    inner = FlakyClient()
+    client = BreakerClient(inner, CircuitBreaker(failure_rate=0.5, min_calls=2, open_s=60))
+    inner.failing = True
+    assert demojify("lol 😂", client).reason.startswith("llm_error")
+    assert demojify("lol 😂", client).reason.startswith("llm_error")
+
+    calls = inner.calls
+    res = demojify("lol 😂", client)
+    assert (res.source, res.reason) == ("standard", "circuit_open")
+    assert res.final_text == res.standard_text
+    assert inner.calls == calls  # provider not contacted
+
+
+def test_async_breaker_client_and_half_open_recovery(clock):
+    inner = FlakyAsyncClient()
+    client = BreakerClient(inner, CircuitBreaker(failure_rate=0.5, min_calls=1, open_s=5, half_open_probes=2, clock=clock))
+
+    async def run():
+        inner.failing = True
+        await ademojify("lol 😂", client)
+        res = await ademojify("lol 😂", client)
+        assert res.reason == "circuit_open"
+
+        inner.failing = False
+        clock.now = 5.0
+        return await ademojify("lol 😂", client)  # rewrite + validator are the two probes
+
+    res = asyncio.run(run())
+    assert (res.source, res.reason) == ("llm", "llm_valid")
+    assert client.breaker.state == "closed"
+
+
+def test_breaker_client_raises_circuit_open_error():
+    breaker = CircuitBreaker(min_calls=1)
+    breaker.record(False)
+    client = BreakerClient(FlakyClient(), breaker)
+    with pytest.raises(CircuitOpenError):
+        client.chat.completions.create(model="m", messages=[])
+
+
+def test_admission_bounds_in_flight_queues_then_sheds():
+    admission = AdmissionController(max_in_flight=2, max_queue=1)
+    release = asyncio.Event()
+    peak = []
+
+    async def work():
+        peak.append(admission.in_flight)
+        await release.wait()
+        return "ok"
+
+    async def run():
+        tasks = [asyncio.ensure_future(admission.run(work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert admission.stats()["queue_depth"] == 1
+        with pytest.raises(OverloadedError):
+            await admission.run(work)  # 2 running + 1 queued: shed
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(run()) == ["ok"] * 3
+    assert max(peak) == 2
+    stats = admission.stats()
+    assert (stats["admitted"], stats["shed"], stats["in_flight"], stats["queue_depth"]) == (3, 1, 0, 0)
+
+
+def test_admission_permits_hold_several_slots_in_fifo_order():
+    admission = AdmissionController(max_in_flight=4, max_queue=4)
+    release = asyncio.Event()
+    order = []
+
+    def work(name):
+        async def fn():
+            order.append((name, admission.in_flight))
+            await release.wait()
+            return name
+        return fn
+
+    async def run():
+        wide = asyncio.ensure_future(admission.run(work("wide"), permits=3))
+        await asyncio.sleep(0)
+        wider = asyncio.ensure_future(admission.run(work("wider"), permits=10))  # capped at 4: waits
+        narrow = asyncio.ensure_future(admission.run(work("narrow")))  # fits, but queued behind "wider"
+        await asyncio.sleep(0)
+        assert admission.stats()["queue_depth"] == 2 and admission.in_flight == 3
+        release.set()
+        return await asyncio.gather(wide, wider, narrow)
+
+    assert asyncio.run(run()) == ["wide", "wider", "narrow"]
+    assert order == [("wide", 3), ("wider", 4), ("narrow", 1)]
+    assert (admission.in_flight, admission.stats()["queue_depth"]) == (0, 0)
+
+
+def test_tight_request_deadlines_leave_breaker_closed():
+    class SlowAsyncClient(FlakyClient):
+        async def create(self, *, messages, **kwargs):
+            await asyncio.sleep(0.05)
+            return super().create(messages=messages, **kwargs)
+
+    client = BreakerClient(SlowAsyncClient(), CircuitBreaker(failure_rate=0.5, min_calls=2, open_s=60))
+
+    async def run():
+        for _ in range(10):
+            assert (await ademojify("lol 😂", client, deadline=0.001)).reason == "deadline_exceeded"
+        return await ademojify("lol 😂", client)
+
+    assert asyncio.run(run()).reason == "llm_valid"
+    assert client.breaker.state == "closed"
+
+
+def test_tight_sync_deadlines_leave_breaker_closed():
+    class SlowSyncClient(FlakyClient):
+        def create(self, *, messages, timeout=None, **kwargs):
+            if timeout is not None and timeout < 0.2:
+                time.sleep(timeout)  # the SDK gives up at the forwarded deadline
+                raise TimeoutError("request timed out")
+            return super().create(messages=messages, **kwargs)
+
+    client = BreakerClient(SlowSyncClient(), CircuitBreaker(failure_rate=0.5, min_calls=2, open_s=60))
+    for _ in range(4):
+        assert demojify("lol 😂", client, deadline=0.05).reason == "deadline_exceeded"
+    time.sleep(0.1)  # abandoned worker threads finish and report to the breaker
+    assert client.breaker.state == "closed"
+    assert demojify("lol 😂", client).reason == "llm_valid"
+
+
+def test_abandoned_calls_count_only_when_already_slow(clock):
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=2, slow_call_s=1.0, clock=clock)
+    breaker.abandon(0.01)
+    breaker.abandon(0.01)
+    assert breaker.state == "closed" and breaker.stats()["window_calls"] == 0
+    breaker.abandon(2.0)
+    breaker.abandon(2.0)
+    assert breaker.state == "open"
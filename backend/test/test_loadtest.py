@@ -0,0 +1,73 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+
+import demojify_lib as lib
+import main
+from demojify_resilience import AdmissionController
+from loadtest.load_driver import percentile, run_load
+from loadtest.stub_server import StubConfig, create_app, parse_latency
+
+
+def _chat(app, system, user):
+    r = TestClient(app).post("/v1/chat/completions", json={
+        "model": "m", "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}]})
+    return r.status_code, r.json()
+
+
+def test_stub_answers_each_prompt_kind():
+    app = create_app(StubConfig(seed=1))
+    request = lib._meaning_request("great job 👍", "m")
+    status, body = _chat(app, *(m["content"] for m in request["messages"]))
+    assert status == 200 and body["usage"]["prompt_tokens"] > 0
+    assert lib.parse_llm_demojify_output(body["choices"][0]["message"]["content"]) == "great job okay"
+
+    request = lib._validator_batch_request([("a", "b"), ("c", "d")], "m")
+    _, body = _chat(app, *(m["content"] for m in request["messages"]))
+    assert lib.parse_validator_batch_output(body["choices"][0]["message"]["content"], 2) == [1, 1]
+
+
+def test_stub_failure_modes():
+    app = create_app(StubConfig(bare_digit_rate=1.0, seed=1))
+    _, body = _chat(app, lib.JSON_ONLY_SYSTEM, lib._llm_user_prompt_plain("hi 👋"))
+    assert body["choices"][0]["message"]["content"] in ("0", "1")
+
+    assert _chat(create_app(StubConfig(error_rate=1.0)), lib.JSON_ONLY_SYSTEM, "x")[0] == 500
+    assert _chat(create_app(StubConfig(rate_limit_rate=1.0)), lib.JSON_ONLY_SYSTEM, "x")[0] == 429
+
+    _, body = _chat(create_app(StubConfig(malformed_rate=1.0)), lib.JSON_ONLY_SYSTEM, lib._llm_user_prompt_plain("hi 👋"))
+    with pytest.raises(ValueError):
+        json.loads(body["choices"][0]["message"]["content"])
+
+
+def test_parse_latency_specs():
+    assert parse_latency("fixed:250")() == 0.25
+    assert 0.01 <= parse_latency("uniform:10:20")() <= 0.02
+    with pytest.raises(ValueError):
+        parse_latency("zipf:1")
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+    assert (percentile(values, 50), percentile(values, 95), percentile(values, 99)) == (50, 95, 99)
+    assert percentile([], 50) is None
+
+
+def test_driver_against_app_and_stub_fully_offline(monkeypatch):
+    stub = httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(StubConfig(reject_rate=0.0, seed=1))))
+    monkeypatch.setattr(main, "OpenAIClient", AsyncOpenAI(base_url="http://stub/v1", api_key="x", http_client=stub))
+    monkeypatch.setattr(main, "ADMISSION", AdmissionController(max_in_flight=8, max_queue=64))
+    main.RESULT_CACHE.clear()
+
+    report = asyncio.run(run_load("http://app", rps=200, duration=0.1, texts=["nice 👍", "plain text", "party 🎉"],
+                                  transport=httpx.ASGITransport(app=main.app)))
+    main.RESULT_CACHE.clear()
+
+    assert report["sent"] == report["completed"] == 20 and not report["errors"]
+    assert report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    reasons = {(b["source"], b["reason"]) for b in report["breakdown"]}
+    assert ("llm", "llm_valid") in reasons
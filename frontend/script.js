@@ -11,7 +11,42 @@ const API_BASE = "http://127.0.0.1:8000"
       statusEl.hidden = !show;
     }
 
+    // Live conversion: after a pause in typing, the server reconverts only the
+    // sentences this session has not seen before (/api/convert/live)
+    let liveSession = null;
+    let liveTimer = null;
+    let liveSeq = 0;
+
+    async function convertLive() {
+      const seq = ++liveSeq;
+      try {
+        const res = await fetch(`${API_BASE}/api/convert/live`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ text: input.value, mode: "auto", session_id: liveSession })
+        });
+        if (!res.ok) throw new Error(`HTTP ${res.status}`);
+        const data = await res.json();
+        if (seq !== liveSeq) return;  // a newer edit was sent meanwhile
+        liveSession = data.session_id;
+        output.value = data.output;
+        const changed = data.segments.filter(s => s.changed).length;
+        setStatus(data.segments.length
+          ? `${data.source} • ${changed}/${data.segments.length} sentences updated`
+          : '', data.segments.length > 0);
+      } catch (err) {
+        if (seq === liveSeq) setStatus('live conversion unavailable');
+      }
+    }
+
+    input.addEventListener('input', () => {
+      clearTimeout(liveTimer);
+      liveTimer = setTimeout(convertLive, 400);
+    });
+
     clear.addEventListener('click', () => {
+      clearTimeout(liveTimer);
+      liveSeq++;
       input.value = '';
       output.value = '';
       setStatus('cleared');
@@ -21,20 +56,40 @@ const API_BASE = "http://127.0.0.1:8000"
     btn.addEventListener('click', async () => {
       const text = input.value.trim();
       if (!text) { output.value = ''; return; }
+      clearTimeout(liveTimer);
+      liveSeq++;  // the full conversion below supersedes any live one in flight
       setStatus('converting…');
       btn.disabled = true;
 
       try {
-        const res = await fetch(`${API_BASE}/api/convert`, {
+        // Server-Sent Events: the rules result arrives first, the LLM result upgrades it
+        const res = await fetch(`${API_BASE}/api/convert/stream`, {
           method: 'POST',
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({ text: text, mode: "auto" })
         });
         if (!res.ok) throw new Error(`HTTP ${res.status}`);
-        const data = await res.json();
 
-        output.value = data.output || '';
-        setStatus(`${data.source} • ${data.reason}`);
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          let sep;
+          while ((sep = buffer.indexOf('\n\n')) !== -1) {
+            const block = buffer.slice(0, sep);
+            buffer = buffer.slice(sep + 2);
+            const event = (block.match(/^event: (.*)$/m) || [])[1];
+            const data = JSON.parse((block.match(/^data: (.*)$/m) || [])[1] || '{}');
+
+            output.value = data.output || '';
+            setStatus(event === 'final'
+              ? `${data.source} • ${data.reason}`
+              : `${data.source} • refining…`);
+          }
+        }
       } catch (err) {
         output.value = '';
         setStatus('error');